@@ -0,0 +1,107 @@
+from __future__ import annotations
+from typing import Iterator, List, Optional, Tuple
+from collections import deque
+from random import Random
+import os
+import sys
+from board import Board
+from structures import CellObserver
+from dlx import DancingLinks
+from transforms import TransformBackend
+
+ENGINES = ('greedy', 'dlx', 'transform')
+
+
+def make_board(size: int, engine: str, rng: Random) -> Board:
+    if engine == 'greedy':
+        return Board(size, rng=rng)
+    if engine == 'dlx':
+        return Board(size, DancingLinks(rng), rng=rng)
+    if engine == 'transform':
+        # one searched grid per chunk, the rest are transforms of it
+        return Board(size, TransformBackend(rng=rng), rng=rng)
+    raise ValueError(f'Unknown engine {engine!r}, expected one of {ENGINES}.')
+
+
+def fill_chunk(task: Tuple[int, int, int, str], observer: Optional[CellObserver] = None) -> Iterator[str]:
+    """Fill `count` grids on one reused board seeded with `seed`, yielding each as it is done.
+
+    The board is reset between grids instead of being rebuilt. `observer`,
+    a renderer for instance, is attached to the board for the whole chunk.
+    """
+    size, count, seed, engine = task
+    board = make_board(size, engine, Random(seed))
+    if observer is not None:
+        board.attach(observer)
+    try:
+        for _ in range(count):
+            board.reset()
+            board.fill()
+            yield board.to_string()
+    finally:  # also when the caller stops early, as a closed pipe does
+        if observer is not None:
+            board.detach(observer)
+
+
+def generate_chunk(task: Tuple[int, int, int, str]) -> List[str]:
+    """All grids of `fill_chunk`; runs inside a worker process and goes back to the parent as one list."""
+    return list(fill_chunk(task))
+
+
+def chunk_tasks(count: int, size: int, seed: Optional[int], chunk_size: int, engine: str) -> Iterator[Tuple[int, int, int, str]]:
+    """Split `count` grids into tasks, each seeded from the master seed in order."""
+    master = Random(seed)
+    while count > 0:
+        n = min(chunk_size, count)
+        yield size, n, master.getrandbits(64), engine
+        count -= n
+
+
+def generate(
+        count: int,
+        size: int = 9,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        chunk_size: int = 64,
+        engine: str = 'greedy',
+) -> Iterator[str]:
+    """Yield `count` filled grids in `Board.to_string` form, built across processes.
+
+    Chunks are yielded in submission order and each chunk only depends on its
+    own seed, so the same master seed gives the same grids for any number of
+    workers. At most a few chunks per worker are in flight at a time. With
+    one worker the grids are filled in this process and yielded one by one.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = chunk_tasks(count, size, seed, chunk_size, engine)
+    if workers == 1:
+        for task in tasks:
+            yield from fill_chunk(task)
+        return
+    # imported here: the process pool machinery alone takes longer to load than a small serial run
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(generate_chunk, task))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Generate filled grids, one per line.')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--workers', type=int, default=None, help='default: number of CPUs')
+    parser.add_argument('--seed', type=int, default=None, help='master seed for reproducible runs')
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--engine', choices=ENGINES, default='greedy')
+    args = parser.parse_args()
+
+    for grid in generate(args.count, args.size, args.workers, args.seed, args.chunk_size, args.engine):
+        sys.stdout.write(grid + '\n')
@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+
+import batch
+from board import Board
+from structures import CellObserver
+
+
+class TestBatch(unittest.TestCase):
+    def test_chunk_gives_valid_distinct_grids(self):
+        grids = batch.generate_chunk((9, 5, 42, 'greedy'))
+        self.assertEqual(5, len(grids))
+        self.assertEqual(5, len(set(grids)))
+        for grid in grids:
+            self.assertTrue(Board.from_string(grid).validate())
+
+    def test_chunk_is_reproducible(self):
+        self.assertListEqual(batch.generate_chunk((4, 3, 7, 'dlx')), batch.generate_chunk((4, 3, 7, 'dlx')))
+
+    def test_transform_chunk_gives_valid_grids(self):
+        grids = batch.generate_chunk((9, 20, 5, 'transform'))
+        self.assertEqual(20, len(grids))
+        for grid in grids:
+            self.assertTrue(Board.from_string(grid).validate())
+
+    def test_tasks_cover_requested_count(self):
+        tasks = list(batch.chunk_tasks(10, 9, 1, 4, 'greedy'))
+        self.assertListEqual([4, 4, 2], [task[1] for task in tasks])
+
+    def test_same_seed_gives_same_grids_for_any_worker_count(self):
+        serial = list(batch.generate(6, 4, workers=1, seed=3, chunk_size=2))
+        parallel = list(batch.generate(6, 4, workers=2, seed=3, chunk_size=2))
+        self.assertEqual(6, len(serial))
+        self.assertListEqual(serial, parallel)
+
+    def test_observer_is_detached_when_chunk_is_abandoned(self):
+        observer = mock.Mock(spec=CellObserver)
+        grids = batch.fill_chunk((4, 3, 1, 'greedy'), observer)
+        next(grids)
+        observer.detach.assert_not_called()
+        grids.close()
+        observer.detach.assert_called_once_with()
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            batch.generate_chunk((9, 1, 0, 'magic'))
@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+import bench
+
+
+class TestBench(unittest.TestCase):
+    def test_reports_every_phase(self):
+        results = bench.bench_size(4, 'greedy', 3, seed=1)
+        self.assertListEqual(list(bench.PHASES), [r['phase'] for r in results])
+        for result in results:
+            self.assertEqual(3, result['count'])
+            self.assertLessEqual(result['p50'], result['p99'])
+            self.assertGreater(result['peak_bytes'], 0)
+
+    def test_peak_memory_is_traced_per_phase(self):
+        peaks = bench.phase_peaks(9, 'greedy', seed=1)
+        self.assertListEqual(list(bench.PHASES), list(peaks))
+        self.assertGreater(peaks['construct'], peaks['validate'])
+
+    def test_large_greedy_solve_needs_a_policy(self):
+        self.assertFalse(bench.times_solve(25, 'greedy', None))
+        self.assertTrue(bench.times_solve(25, 'greedy', 'luby'))
+        self.assertTrue(bench.times_solve(25, 'dlx', None))
+        self.assertTrue(bench.times_solve(16, 'greedy', None))
+        results = bench.bench_size(25, 'greedy', 1, seed=1)
+        self.assertListEqual(['construct', 'fill', 'validate'], [r['phase'] for r in results])
+
+    def test_invalid_solution_is_not_timed(self):
+        with mock.patch.object(bench.Board, 'solve', return_value=True):
+            with self.assertRaises(RuntimeError):
+                bench.bench_size(4, 'greedy', 1, seed=1)
+
+    def test_fixed_seed_repeats_backtracks(self):
+        first = bench.bench_size(9, 'greedy', 2, seed=7)
+        second = bench.bench_size(9, 'greedy', 2, seed=7)
+        self.assertListEqual([r['backtracks_max'] for r in first], [r['backtracks_max'] for r in second])
+
+    def test_over_budget_checks_greedy_fill(self):
+        slow = {'size': 9, 'engine': 'greedy', 'phase': 'fill', 'p50': 1.0}
+        fast = {'size': 16, 'engine': 'greedy', 'phase': 'fill', 'p50': 0.001}
+        solve = {'size': 9, 'engine': 'greedy', 'phase': 'solve', 'p50': 1.0}
+        self.assertEqual(1, len(bench.over_budget({'results': [slow, fast, solve]})))
+
+    def test_percentile(self):
+        samples = [float(i) for i in range(100)]
+        self.assertEqual(50.0, bench.percentile(samples, 0.5))
+        self.assertEqual(99.0, bench.percentile(samples, 0.99))
+
+    def test_compare_flags_slower_phase(self):
+        baseline = {'results': [{'size': 9, 'engine': 'dlx', 'phase': 'fill', 'p50': 1.0}]}
+        current = {'results': [{'size': 9, 'engine': 'dlx', 'phase': 'fill', 'p50': 1.5}]}
+        self.assertEqual(1, len(bench.compare(baseline, current, 0.2)))
+        self.assertListEqual([], bench.compare(baseline, current, 0.6))
@@ -1,140 +1,218 @@
 from __future__ import annotations
-from typing import List
-from math import sqrt
-from functools import partial
-from random import choice
-from structures import Cell, Row, Column, Square, OutOfOptions
-from turtle import Turtle, Screen
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from bisect import bisect_right
+from math import isqrt
+from random import Random
+from time import perf_counter
+from structures import Cell, CellGroup, CellObserver, FreeCellIndex, LinkedCells, Row, Column, Square, Trail, OutOfOptions, bit, to_mask, to_values
+from stats import SearchStats
+from policies import POLICIES, SearchPolicy, get_policy
+from steps import ASSIGN, BACKTRACK, CLEAR, ELIMINATE, FORCE, RESTART, Step
 
+# single-character cell symbols: '1'..'9' then 'A' = 10 up to 'Z' = 35
+SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+BLANKS = '.0_'
 
-def x_print(*args, **kwargs):
-    pass
-    # print(*args, **kwargs)
+# what Board._search pauses after
+_FORWARD, _BACK, _RESTART = range(3)
 
 
-class Board:
-    def __init__(self, size: int) -> None:
-        self.size: int = size
+def box_shape(size: int) -> Tuple[int, int]:
+    """(rows, columns) of the boxes of a `size` board, as close to square as possible.
+
+    Square sizes get square boxes (9 -> 3x3); others are split into the
+    nearest factors with fewer rows than columns (6 -> 2x3, 12 -> 3x4).
+    """
+    for rows in range(isqrt(size), 1, -1):
+        if size % rows == 0:
+            return rows, size // rows
+    raise ValueError(f'Board size {size} cannot be split into boxes.')
 
-        self.screen = self.setup_screen(1000)
-        self.screen.listen()
-        self.screen.tracer(0)
-        self.screen.onclick(self.get_cell_options_from_pos)
 
-        self.turtle = self.setup_turtle()
+class Topology:
+    """Cell positions, unit membership and peers of every board of one size.
+
+    Nothing in here depends on the cell values, so it is computed once per
+    size by `topology` and shared by all boards of that size.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.box_rows, self.box_cols = box_shape(size)
+        self.full_mask = to_mask(range(1, size + 1))
+        # (row, column, square) of every cell
+        self.positions: Tuple[Tuple[int, int, int], ...] = tuple(
+            (r, c, (r // self.box_rows) * self.box_rows + c // self.box_cols)
+            for r in range(size) for c in range(size)
+        )
+        # cell indices of every row, column and square
+        members: List[List[List[int]]] = [[[] for _ in range(size)] for _ in range(3)]
+        for index, position in enumerate(self.positions):
+            for kind, unit in enumerate(position):
+                members[kind][unit].append(index)
+        self.rows, self.columns, self.squares = (tuple(map(tuple, units)) for units in members)
+        # indices of the other cells sharing a unit with every cell, in index order
+        self.peers: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(sorted(set(self.rows[r] + self.columns[c] + self.squares[s]) - {index}))
+            for index, (r, c, s) in enumerate(self.positions)
+        )
+
+
+_topologies: Dict[int, Topology] = {}
+
+
+def topology(size: int) -> Topology:
+    if size not in _topologies:
+        _topologies[size] = Topology(size)
+    return _topologies[size]
 
-        self.draw_board()
 
+class Board:
+    def __init__(
+            self,
+            size: int,
+            backend=None,
+            rng: Optional[Random] = None,
+            stats: Optional[SearchStats] = None,
+            strategies=None,
+    ) -> None:
+        start = perf_counter()
+        self.size: int = size
+        # every random decision of this board and its cells comes from here; seed it for reproducible runs
+        self.rng: Random = rng if rng is not None else Random()
+        # object with a fill(board) method that replaces the built-in greedy fill, e.g. dlx.DancingLinks
+        self.backend = backend
+        # search statistics; None keeps the fill loop free of any bookkeeping
+        self.stats: Optional[SearchStats] = stats
+        # strategies.Pipeline run after every assignment; None leaves inference to singles
+        self.strategies = strategies
+
+        # observers (renderers, recorders) are attached on demand; an empty list keeps the board headless
+        self.observers: List[CellObserver] = []
+
+        # boxes are box_rows x box_cols; they are still called squares after the classic 3x3 case
+        self.topology = topology(size)
+        self.box_rows, self.box_cols = self.topology.box_rows, self.topology.box_cols
         options = set(range(1, self.size + 1))
+        self.free_cells = FreeCellIndex(self.size)
+        self.trail = Trail()
         self.cells: List[Cell] = []
         self.rows: List[Row] = [Row() for _ in range(self.size)]
         self.columns: List[Column] = [Column() for _ in range(self.size)]
         self.squares: List[Square] = [Square() for _ in range(self.size)]
         self.history: List[Cell] = []
-        for i in range(self.size ** 2):
-            pos = self.cell_index_to_pos(i, self.screen.window_width(), self.size)
-            cell = Cell(options, i, pos)
+        self.backtracks: int = 0
+        # (unit, digit) pairs whose count dropped to one or zero, checked by propagate
+        self.pending: List[tuple] = []
+        self.forced: int = 0  # hidden singles assigned by propagate
+        # large boards tend to get stuck in a hopeless corner of a random fill; after this many
+        # backtracks fill starts over (the budget doubles every time, so it still completes)
+        self.restart_after: Optional[int] = 1000 if size >= 36 else None
+        # search policy for fills that do not pass their own; None means the default above
+        self.policy: Union[str, SearchPolicy, None] = None
+        self._shuffle_ties = False  # set during fills with a shuffle_ties policy
+        self.restarts: int = 0
+        for i, (row, col, sq) in enumerate(self.topology.positions):
+            cell = Cell(options, i, self.observers, self.free_cells, self.trail, self.rng)
             self.cells.append(cell)
-            sq_size = int(sqrt(self.size))
-            row = i // self.size
-            col = i % self.size
-            sq = (row // sq_size) * sq_size + col // sq_size
             self.rows[row].append(cell)
             self.columns[col].append(cell)
             self.squares[sq].append(cell)
+        cells = self.cells
+        for cell, peers in zip(cells, self.topology.peers):
+            cell.rcs = (cell.row, cell.column, cell.square)
+            cell.linked_cells = LinkedCells.from_cells([cells[i] for i in peers])
+        self.units: List[CellGroup] = self.rows + self.columns + self.squares
+        for unit in self.units:
+            unit.start_counting(self.size, self.pending)
+        self.last_cell = self.cells[0]
+        if stats is not None:
+            stats.times['construct'] = stats.times.get('construct', 0.0) + perf_counter() - start
+
+    def reset(self) -> None:
+        """Empty the board in place: every cell free with all candidates, no history.
+
+        The board then behaves exactly like a new `Board` of its size, which
+        saves rebuilding cells and units between grids. The random generator,
+        stats, strategies and observers stay; observers see the cleared cells.
+        """
+        full = self.topology.full_mask
+        cleared = [cell for cell in self.cells if cell._value is not None]
         for cell in self.cells:
-            cell.set_linked_cells()
+            cell.mask = full
+            cell._value = None
+            cell._mark = -1
+            cell.placeholder = '_'
+        for unit in self.units:
+            unit.reset_counts()
+        self.free_cells.reset(self.cells, self.size)
+        self.trail.entries.clear()
+        self.history.clear()
+        self.pending.clear()
+        self.backtracks = 0
+        self.forced = 0
+        self.restarts = 0
         self.last_cell = self.cells[0]
-
-    def get_cell_options_from_pos(self, x, y):
-        square_size = self.screen.window_width() // self.size
-        x_zero_start = x + self.screen.window_width() // 2
-        y_zero_start = y + self.screen.window_width() // 2
-        x_i = x_zero_start // square_size
-        y_i = abs(y_zero_start // square_size - 8)
-
-        print(self.cells[int(y_i + x_i * self.size)].options)
-
-    @staticmethod
-    def cell_index_to_pos(index: int, screen_size: int, board_size: int) -> tuple:
-        square_size = screen_size // board_size
-
-        x_pos = index // board_size * square_size + square_size // 2
-        y_pos = index % board_size * square_size + square_size // 2
-
-        return x_pos - screen_size // 2, y_pos - screen_size // 2
-
-    def setup_screen(self, size: int):
-        screen = Screen()
-        screen.setup(width=size, height=size)
-        screen.bgcolor("white")
-        screen.title("Sudoku")
-        return screen
-
-    def setup_turtle(self):
-        turtle = Turtle()
-        turtle.hideturtle()
-        turtle.speed(0)
-        return turtle
-
-    @staticmethod
-    def draw_line(t: Turtle, start: tuple, end: tuple, is_bold=False):
-        t.penup()
-        t.goto(*start)
-        t.pendown()
-        if is_bold:
-            t.pensize(5)
-            t.color("red")
-        t.goto(*end)
-        t.penup()
-        t.pensize(1)
-        t.color("black")
-
-    def draw_board(self):
-        square_width = self.screen.window_width() // self.size
-        square_height = self.screen.window_height() // self.size
-
-        screen_x_right_border = self.screen.window_width() // 2
-        screen_x_left_border = -1 * screen_x_right_border
-
-        screen_y_upper_border = self.screen.window_height() // 2
-        screen_y_down_border = -1 * screen_y_upper_border
-
-        n = screen_y_upper_border - square_height
-        c = 0
-        l = 0
-        bold = False
-        while self.size > l:
-            if c == int(sqrt(self.size)) - 1:
-                bold = True
-                c = 0
-            else:
-                c += 1
-            self.draw_line(self.turtle, (screen_x_left_border, n), (screen_x_right_border, n), bold)
-            n = n - square_height
-            bold = False
-            l += 1
-
-
-        c = 0
-        n = screen_x_right_border - square_width
-        bold = False
-        l = 0
-        while self.size > l:
-            if c == int(sqrt(self.size)) - 1:
-                bold = True
-                c = 0
-            else:
-                c += 1
-            self.draw_line(self.turtle, (n, screen_y_upper_border), (n, screen_y_down_border), bold)
-            n = n - square_height
-            bold = False
-            l += 1
-
+        if self.observers:
+            for cell in cleared:
+                for observer in self.observers:
+                    observer.cell_cleared(cell)
+
+    def snapshot(self) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """Candidates and values (0 for free) of every cell as two flat tuples.
+
+        This is the whole search state apart from history, so it is cheap to
+        take and to pickle; `restore` loads it into any board of this size.
+        """
+        return tuple(cell.mask for cell in self.cells), tuple(cell._value or 0 for cell in self.cells)
+
+    def restore(self, snapshot: Tuple[Sequence[int], Sequence[int]]) -> None:
+        """Load a `snapshot` in place; its values become givens, with empty history and trail.
+
+        Digits left with one place or none are queued, so the next `fill`
+        or `propagate` picks them up.
+        """
+        masks, values = snapshot
+        if len(masks) != len(self.cells) or len(values) != len(self.cells):
+            raise ValueError(f'Snapshot of {len(masks)} cells does not fit a board of size {self.size}.')
+        assigned, cleared = [], []
+        for cell, mask, value in zip(self.cells, masks, values):
+            value = value or None
+            if value != cell._value:
+                (cleared if value is None else assigned).append(cell)
+            cell.mask = mask
+            cell._value = value
+            cell._mark = -1
+            cell.placeholder = '_'
+        self.free_cells.rebuild(self.cells)
+        self.trail.entries.clear()
+        self.history.clear()
+        self.pending.clear()
+        for unit in self.units:
+            unit.recount()
+        self.backtracks = 0
+        self.forced = 0
+        self.restarts = 0
+        if self.observers:
+            for observer in self.observers:
+                for cell in cleared:
+                    observer.cell_cleared(cell)
+                for cell in assigned:
+                    observer.cell_assigned(cell)
+
+    def attach(self, observer: CellObserver) -> CellObserver:
+        """Start notifying `observer` about cell changes; a renderer draws the board first."""
+        observer.attach(self)
+        self.observers.append(observer)
+        return observer
+
+    def detach(self, observer: CellObserver) -> None:
+        self.observers.remove(observer)
+        observer.detach()
 
     @property
     def unfilled(self) -> set:
-        return {cell for cell in self.cells if len(cell) > 0}
+        return set(self.free_cells)
 
     @property
     def least_free(self) -> Cell | None:
@@ -145,35 +223,372 @@ class Board:
         return self.size ** 2 - [cell.value for cell in self.cells].count(None)
 
     def _least_free(self) -> Cell | None:
-        try:
-            min_len = min(map(len, self.unfilled))
-        except ValueError:
+        candidates = self.free_cells.least_free()
+        if not candidates:
             return None
-        else:
-            return choice([c for c in self.unfilled if len(c) == min_len])
+        # ties go to the peers of the previous choice, then to reading order: a search that stays
+        # local runs into its conflicts while their cause is still near the top of history, which
+        # cuts backtracking on 36x36 boards about a hundredfold; values stay random (and so do ties
+        # under a policy with shuffle_ties)
+        count = len(candidates[0])
+        if self.history:
+            near = [cell for cell in self.history[-1].linked_cells if cell.value is None and len(cell) == count]
+            if near:
+                candidates = near
+        if self._shuffle_ties:
+            return self.rng.choice(candidates)
+        return min(candidates, key=lambda cell: cell.index)
 
     def fill_one(self, fixed_cell=None):
         cell = fixed_cell or self.least_free
         self.history.append(cell)
-        c = cell.choose_value()
-        x_print(self, '=' * self.size ** 2, sep='\n')
-        return c
+        value = cell.choose_value()
+        self.propagate()
+        if self.strategies is not None:
+            self.strategies.run(self)
+        return value
+
+    def propagate(self) -> None:
+        """Assign every hidden single queued by the unit counters.
+
+        Forced cells are not added to `history`: they were set after the
+        choice that forced them, so undoing that choice also clears them.
+        Raises OutOfOptions when some unit has no place left for a digit.
+        """
+        pending = self.pending
+        try:
+            while pending:
+                unit, value = pending.pop()
+                if unit.placed & bit(value):
+                    continue
+                count = unit.counts[value]
+                if count == 0:
+                    raise OutOfOptions(f'No place left for {value} in {unit!r}.', unit=unit, value=value)
+                if count == 1:
+                    for cell in unit.data:
+                        if cell.mask & bit(value):
+                            self.forced += 1
+                            cell.value = value
+                            break
+        except OutOfOptions:
+            pending.clear()
+            raise
 
     def undo_one(self):
+        self.backtracks += 1
         last_set_cell = self.history.pop()
         last_set_cell.undo()
         return last_set_cell
 
-    def fill(self):
+    def checkpoint(self) -> int:
+        """Mark the current state; `rollback_to` returns to it."""
+        return self.trail.checkpoint()
+
+    def rollback_to(self, mark: int) -> None:
+        """Undo every change made since `checkpoint` returned `mark`."""
+        while self.history and self.history[-1]._mark >= mark:
+            self.history.pop()
+        self.trail.rollback_to(mark)
+        self.pending.clear()
+
+    def fill(self, exhaustive: bool = False, policy: Union[str, SearchPolicy, None] = None):
+        """Fill every free cell; raises OutOfOptions when no solution was found.
+
+        By default backtracking also steps back over cells that have a single
+        option left, which makes generating grids from an empty board fast but
+        can miss the only solution of a puzzle. `exhaustive` backtracks one
+        choice at a time and is what `solve` uses.
+
+        `policy` (a name from `policies.POLICIES` or a `SearchPolicy`) picks
+        restarts and backjumping for this call. Without one the board uses
+        `self.policy`, and failing that restarts with a geometric budget of
+        `restart_after` backtracks (the default from 36x36 up). Policies with
+        restarts or backjumping always backtrack exhaustively.
+        """
+        policy = self._policy(policy)
+        try:
+            if self.stats is None:
+                self._fill(exhaustive, policy)
+            else:
+                self.stats.policy = policy.name
+                with self.stats.phase('fill'):
+                    self._fill(exhaustive, policy)
+        finally:
+            self._shuffle_ties = False
+            for observer in self.observers:
+                observer.flush()
+
+    def iter_fill(self, exhaustive: bool = False, policy: Union[str, SearchPolicy, None] = None) -> Iterator[Step]:
+        """Fill like `fill`, yielding a `steps.Step` for every change on the way.
+
+        Choices come as ASSIGN and the singles they force as FORCE, each
+        followed by the candidates it removed (ELIMINATE). A backtrack
+        yields CLEAR for every cell it empties, then BACKTRACK with the cell
+        to retry and the value ruled out for it; a restart yields its CLEARs
+        and RESTART. The steps are read off the trail after the search has
+        made them, so the search itself runs as in `fill`. A backend fills
+        in one go and shows up as ASSIGNs only. Raises OutOfOptions like
+        `fill` once the steps are exhausted without a solution.
+        """
+        policy = self._policy(policy)
+        if self.stats is not None:
+            self.stats.policy = policy.name
+        entries = self.trail.entries
+        assigned: List[Cell] = []  # cells valued during this fill, in order
+        try:
+            if self.backend is not None:
+                before = [cell._value for cell in self.cells]
+                self._fill(exhaustive, policy)
+                for cell, value in zip(self.cells, before):
+                    if cell._value != value:
+                        yield Step(ASSIGN, cell.index, cell._value)
+                return
+            for kind, first, second in self._search(exhaustive, policy):
+                if kind == _FORWARD:
+                    steps = self._trail_steps(first, second)
+                    assigned.extend(self.cells[step.cell] for step in steps if step.kind <= FORCE)
+                    yield from steps
+                    continue
+                # a rollback empties the cells valued last, so they are at the end of `assigned`
+                while assigned and assigned[-1]._value is None:
+                    yield Step(CLEAR, assigned.pop().index, 0)
+                if kind == _BACK:
+                    cell, mask, _ = entries[-1]
+                    yield Step(BACKTRACK, first.index, (mask & ~first.mask).bit_length() - 1 if cell is first else 0)
+                else:
+                    yield Step(RESTART, -1, 0)
+        finally:
+            self._shuffle_ties = False
+            for observer in self.observers:
+                observer.flush()
+
+    def _trail_steps(self, recorded: int, chosen: Optional[Cell]) -> List[Step]:
+        """Steps for the trail entries from `recorded` on, worked out backwards from the current cells."""
+        steps = []
+        after: Dict[int, Tuple[int, Optional[int]]] = {}
+        for cell, mask, value in reversed(self.trail.entries[recorded:]):
+            now_mask, now_value = after.get(cell.index, (cell.mask, cell._value))
+            if value is None and now_value is not None:
+                steps.append(Step(ASSIGN if cell is chosen else FORCE, cell.index, now_value))
+            else:
+                for removed in reversed(to_values(mask & ~now_mask)):
+                    steps.append(Step(ELIMINATE, cell.index, removed))
+            after[cell.index] = (mask, value)
+        steps.reverse()
+        return steps
+
+    def _policy(self, policy: Union[str, SearchPolicy, None]) -> SearchPolicy:
+        if policy is None:
+            policy = self.policy
+        if policy is not None:
+            return get_policy(policy)
+        if self.restart_after is not None:
+            return SearchPolicy('geometric', restarts='geometric', unit=self.restart_after)
+        return POLICIES['chronological']
+
+    def _fill(self, exhaustive: bool, policy: SearchPolicy) -> None:
+        if self.backend is not None:
+            self.pending.clear()
+            self.backend.fill(self)
+            self.pending.clear()
+            return
+        for _ in self._search(exhaustive, policy):
+            pass
+
+    def _search(self, exhaustive: bool, policy: SearchPolicy) -> Iterator[tuple]:
+        """The built-in fill as a generator that pauses after every step.
+
+        It yields (_FORWARD, trail length before the step, chosen cell or
+        None for the givens' singles) after each assignment and its
+        propagation, also a failed one, (_BACK, cell to retry, undone
+        choices) after backtracking and (_RESTART, None, None) after a restart.
+        """
+        stats = self.stats
+        trail = self.trail
+        # hidden singles left behind by the givens
+        recorded = len(trail)
+        try:
+            self.propagate()
+            if self.strategies is not None:
+                self.strategies.run(self)
+        except OutOfOptions:
+            if stats is not None:
+                stats.failed(0)
+            yield _FORWARD, recorded, None
+            raise OutOfOptions('Board has no solution.')
+        yield _FORWARD, recorded, None
+        start = self.checkpoint()
+        # eliminations by strategies have no recorded cause, so they rule out backjumping
+        backjump = policy.backjump and self.strategies is None
+        if policy.restarts is not None or backjump:
+            # restarts take over escaping bad regions, so backtracking can stay chronological
+            exhaustive = True
+        self._shuffle_ties = policy.shuffle_ties
+        cutoffs = policy.cutoffs()
+        budget = next(cutoffs)
+        restart_at = self.backtracks + budget if budget is not None else None
+        # for backjumping: levels blamed for the values already ruled out at each level
+        conflicts: Dict[int, set] = {}
         undone_cell = None
-        while self.unfilled:
+        while self.free_cells:
+            recorded = len(trail)
+            forced = self.forced
             try:
                 self.fill_one(undone_cell)
-            except OutOfOptions:
-                x_print(*[c.index for c in self.history][::-1])
-                undone_cell = self.undo_one()
-                while len(undone_cell) <= 1:
-                    undone_cell = self.undo_one()
+            except OutOfOptions as failure:
+                if stats is not None:
+                    stats.assigned(len(trail) - recorded, self.forced - forced)
+                yield _FORWARD, recorded, self.history[-1]
+                if backjump:
+                    undone_cell, depth = self._jump_back(failure, conflicts)
+                else:
+                    undone_cell, depth = self._step_back(exhaustive)
+                if stats is not None:
+                    stats.failed(depth)
+                yield _BACK, undone_cell, depth
+                if restart_at is not None and self.backtracks > restart_at:
+                    # start over from the givens with fresh random choices and the next cutoff
+                    self.rollback_to(start)
+                    self.restarts += 1
+                    if stats is not None:
+                        stats.restarts += 1
+                    restart_at = self.backtracks + next(cutoffs)
+                    conflicts.clear()
+                    undone_cell = None
+                    yield _RESTART, None, None
+            else:
+                if stats is not None:
+                    stats.assigned(len(trail) - recorded, self.forced - forced)
+                yield _FORWARD, recorded, self.history[-1]
+
+    def _no_solution(self, depth: int) -> None:
+        if self.stats is not None:
+            self.stats.failed(depth)
+        raise OutOfOptions('Board has no solution.')
+
+    def _step_back(self, exhaustive: bool) -> Tuple[Cell, int]:
+        """Undo choices, latest first, up to one whose cell has another value to try."""
+        undone_cell = None
+        depth = 0
+        while undone_cell is None or len(undone_cell) <= (0 if exhaustive else 1):
+            if not self.history:
+                self._no_solution(depth)
+            undone_cell = self.undo_one()
+            depth += 1
+        return undone_cell, depth
+
+    def _jump_back(self, failure: OutOfOptions, conflicts: Dict[int, set]) -> Tuple[Cell, int]:
+        """Undo choices up to the latest one that took part in `failure`.
+
+        Choices are numbered by level, their position in `history` from 1;
+        givens are level 0. The choices in between are undone without
+        trying their other values. The culprit's value is ruled out and the
+        other culprits are remembered for its level. When it has no value
+        left, those remembered levels are blamed in turn.
+        """
+        history = self.history
+        marks = [cell._mark for cell in history]
+        culprits = self._conflict_levels(failure, marks)
+        depth = 0
+        while True:
+            level = max(culprits, default=0)
+            if level == 0:
+                self._no_solution(depth)
+            if self.stats is not None:
+                self.stats.backjumps += len(history) - level
+            while len(history) > level:
+                conflicts.pop(len(history), None)
+                self.undo_one()
+                depth += 1
+            cell = self.undo_one()
+            depth += 1
+            culprits.discard(level)
+            if len(cell):
+                conflicts.setdefault(level, set()).update(culprits)
+                return cell, depth
+            # no value left for the culprit: blame its earlier failures and whatever emptied it
+            culprits |= conflicts.pop(level, set())
+            culprits |= self._levels(cell.linked_cells, marks[:level - 1])
+
+    @staticmethod
+    def _levels(cells: Iterable[Cell], marks: List[int]) -> set:
+        """Levels at which the filled ones of `cells` were set, given the trail mark of every level."""
+        return {bisect_right(marks, cell._mark) for cell in cells if cell._value is not None}
+
+    def _conflict_levels(self, failure: OutOfOptions, marks: List[int]) -> set:
+        """Levels whose choices together caused `failure`.
+
+        A cell left without candidates lost them to its filled peers. A digit
+        without a place in a unit is kept out of each free cell by a peer
+        holding it, and out of the filled cells by their own values. A
+        forced cell stands in for the choices that forced it; its level is
+        never below theirs, so blaming it never jumps too far. Tracing forced
+        cells back to those choices found more distant culprits, but cost
+        more time per failure than the longer jumps saved.
+        """
+        if failure.cell is not None:
+            return self._levels(failure.cell.linked_cells, marks)
+        if failure.unit is not None:
+            value = failure.value
+            blamed = []
+            for cell in failure.unit.data:
+                if cell._value is not None:
+                    blamed.append(cell)
+                else:
+                    blamed.extend(peer for peer in cell.linked_cells if peer._value == value)
+            return self._levels(blamed, marks)
+        return {len(self.history)}
+
+    def solve(self, policy: Union[str, SearchPolicy, None] = None) -> bool:
+        """Complete the givens on the board; False if they have no solution."""
+        try:
+            self.fill(exhaustive=True, policy=policy)
+        except OutOfOptions:
+            return False
+        return True
+
+    def set_givens(self, values: Iterable[Optional[int]]) -> None:
+        """Place puzzle givens, one entry per cell with None for blanks.
+
+        Givens are not part of `history`, so backtracking never removes them.
+        """
+        for cell, value in zip(self.cells, values):
+            if value is None:
+                continue
+            if not 1 <= value <= self.size:
+                raise ValueError(f'Value {value} does not fit a board of size {self.size}.')
+            if not cell.mask & bit(value):
+                raise OutOfOptions(f'Given {value} in {cell!r} conflicts with another given.')
+            cell.value = value
+
+    @classmethod
+    def from_string(cls, text: str, backend=None, rng: Optional[Random] = None, stats: Optional[SearchStats] = None) -> Board:
+        """Build a board from puzzle text.
+
+        Two layouts are accepted: one character per cell ('1'-'9', then
+        'A'-'Z' for 10-35; '.', '0' or '_' for blanks), as in the common
+        81-character format, or numbers separated by commas or whitespace
+        with 0 or '.' for blanks, which works for any size. Line breaks may
+        appear anywhere.
+        """
+        values = parse_values(text)
+        size = isqrt(len(values))
+        if size * size != len(values) or size == 0:
+            raise ValueError(f'{len(values)} cells do not make a square board.')
+        board = cls(size, backend, rng, stats)
+        board.set_givens(values)
+        return board
+
+    @classmethod
+    def load(cls, path: str, backend=None, rng: Optional[Random] = None) -> Board:
+        with open(path) as f:
+            return cls.from_string(f.read(), backend, rng)
+
+    def to_string(self) -> str:
+        """Single-line form understood by `from_string`."""
+        if self.size <= len(SYMBOLS):
+            return ''.join(SYMBOLS[cell.value - 1] if cell.value else '.' for cell in self.cells)
+        return ','.join(str(cell.value or 0) for cell in self.cells)
 
     def validate(self):
         return \
@@ -185,32 +600,52 @@ class Board:
         return '\n'.join(map(str, self.rows))
 
 
+def _has_boxes(size: int) -> bool:
+    try:
+        box_shape(size)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_values(text: str) -> List[Optional[int]]:
+    """Cell values (None for blanks) from either layout accepted by `Board.from_string`."""
+    tokens = text.replace(',', ' ').replace(';', ' ').split()
+    size = isqrt(len(tokens))
+    # a grid written one row per line splits into as many tokens as each is long, which the numeric
+    # layout never does; four lines of '0000' are an empty 4x4, not a 2x2 board
+    rows = all(len(t) == len(tokens) for t in tokens)
+    if len(tokens) > 1 and size * size == len(tokens) and not rows and _has_boxes(size):
+        try:
+            values = [None if t in BLANKS else int(t) for t in tokens]
+        except ValueError:
+            pass
+        else:
+            if all(v is None or 0 <= v <= size for v in values):
+                return [v or None for v in values]
+    values = []
+    for char in ''.join(tokens).upper():
+        if char in BLANKS:
+            values.append(None)
+        elif char in SYMBOLS:
+            values.append(SYMBOLS.index(char) + 1)
+        else:
+            raise ValueError(f'Unexpected character {char!r} in puzzle.')
+    return values
+
+
 if __name__ == '__main__':
+    from argparse import ArgumentParser
+    from render import TurtleRenderer
+
+    parser = ArgumentParser(description='Fill boards over and over on a turtle screen.')
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--fps', type=float, default=10.0, help='frames drawn per second during a fill; 0 draws each grid once')
+    args = parser.parse_args()
+
+    board = Board(args.size)
+    board.attach(TurtleRenderer(1000, fps=args.fps or None))
     while True:
-        board = Board(9)
         board.fill()
         print(f'the board is {board.validate()}')
-        board.screen.resetscreen()
-    # from sys import argv
-    # from time import monotonic as clock
-
-    # side = int(argv[1]) if len(argv) == 2 else 3
-    # t0 = clock()
-    # rep: int = 0
-    # for rep in range(20_000):
-    #     board = Board(side**2)
-    #     print(f"New Board {rep}")
-    #     try:
-    #         board.fill()
-    #     except IndexError:
-    #         continue
-    #     else:
-    #         if not board.validate():
-    #             print('invalid.')
-    #             continue
-    #         print(board)
-    #         print('=' * (board.size * 2))
-    #         validity = 'valid' if board.validate() else 'NOT valid'
-    #         print(f'the board is {validity}')
-    #         break    # t1 = clock()
-    # print(f'Operation took {t1-t0:.2f} seconds over {rep+1} boards, {(t1-t0)/(rep+1):.3f} seconds on average')
+        board.reset()
@@ -1,6 +1,12 @@
 import unittest
 from unittest import mock
 import board
+from random import Random
+from structures import OutOfOptions
+from steps import ASSIGN, BACKTRACK, CLEAR, ELIMINATE, FORCE, Step
+
+PUZZLE = '530070000600195000098000060800060003400803001700020006060000280000419005000080079'
+SOLUTION = '534678912672195348198342567859761423426853791713924856961537284287419635345286179'
 
 
 def choice(x):
@@ -38,13 +44,255 @@ class TestBoard(unittest.TestCase):
         after = len(self.board.unfilled)
         self.assertEqual(before - 1, after)
 
+    def test_free_cell_index_matches_cell_scan(self):
+        for _ in range(2):
+            self.board.fill_one()
+        expected = {cell for cell in self.board.cells if len(cell) > 0}
+        self.assertSetEqual(expected, self.board.unfilled)
+
     def test_board_fills_with_values(self):
         self.board.fill()
         self.assertSetEqual(self.board.unfilled, set())
 
+    def test_undo_restores_linked_cells(self):
+        options_before = [cell.mask for cell in self.board.cells]
+        self.board.fill_one(self.board.cells[0])
+        value = self.board.undo_one().value
+        self.assertIsNone(value)
+        options_after = [cell.mask for cell in self.board.cells]
+        self.assertListEqual(options_before[1:], options_after[1:])
+        self.assertEqual(3, len(self.board.cells[0]))
+
+    def test_board_can_roll_back_to_checkpoint(self):
+        self.board.fill_one()
+        mark = self.board.checkpoint()
+        state = [(cell.mask, cell.value) for cell in self.board.cells]
+        self.board.fill_one()
+        self.board.fill_one()
+        self.board.rollback_to(mark)
+        self.assertListEqual(state, [(cell.mask, cell.value) for cell in self.board.cells])
+        self.assertEqual(1, len(self.board.history))
+
     def test_board_can_undo_fill(self):
         mock_cell = mock.Mock()
         self.board._least_free = lambda: mock_cell
         self.board.fill_one()
         self.board.undo_one()
         mock_cell.undo.assert_called()
+
+    def test_unit_counters_follow_fill_and_rollback(self):
+        def expected(unit):
+            counts = [0] * (unit_board.size + 1)
+            for cell in unit:
+                for value in ([cell.value] if cell.value else cell.options):
+                    counts[value] += 1
+            return counts
+
+        unit_board = board.Board(9, rng=Random(4))
+        start = unit_board.checkpoint()
+        unit_board.fill()
+        units = unit_board.rows + unit_board.columns + unit_board.squares
+        self.assertTrue(all(unit.counts == expected(unit) for unit in units))
+        unit_board.rollback_to(start)
+        self.assertTrue(all(unit.counts == [0] + [9] * 9 for unit in units))
+        self.assertTrue(all(unit.placed == 0 for unit in units))
+
+    def test_hidden_single_is_propagated(self):
+        # 1 fits nowhere else in the top left square once the other rows and columns hold it
+        puzzle = board.Board.from_string('....' '..1.' '.1..' '....')
+        puzzle.propagate()
+        self.assertEqual(1, puzzle.cells[0].value)
+
+    def test_unit_without_place_for_digit_fails(self):
+        puzzle = board.Board.from_string('12..' '..3.' '....' '...3')
+        with self.assertRaises(OutOfOptions):
+            puzzle.propagate()
+
+    def test_box_shapes(self):
+        self.assertEqual((3, 3), board.box_shape(9))
+        self.assertEqual((2, 3), board.box_shape(6))
+        self.assertEqual((3, 4), board.box_shape(12))
+        with self.assertRaises(ValueError):
+            board.box_shape(7)
+
+    def test_fills_board_with_rectangular_boxes(self):
+        six = board.Board(6, rng=Random(2))
+        self.assertEqual({0, 1, 2, 6, 7, 8}, {cell.index for cell in six.squares[0]})
+        self.assertEqual({3, 4, 5, 9, 10, 11}, {cell.index for cell in six.squares[1]})
+        six.fill()
+        self.assertTrue(six.validate())
+
+    def test_fill_restarts_after_budget(self):
+        large = board.Board(25, rng=Random(1))
+        large.restart_after = 1
+        large.fill()
+        self.assertGreater(large.restarts, 0)
+        self.assertTrue(large.validate())
+
+    def test_large_boards_restart_by_default(self):
+        self.assertIsNone(board.Board(9).restart_after)
+        self.assertIsNotNone(board.Board(36).restart_after)
+
+    def test_board_is_headless_by_default(self):
+        self.assertListEqual([], self.board.observers)
+        self.assertNotIn('turtle', dir(self.board))
+
+    def test_attached_observer_sees_assignments(self):
+        observer = mock.Mock()
+        self.board.attach(observer)
+        observer.attach.assert_called_with(self.board)
+        self.board.cells[0].value = 1
+        observer.cell_assigned.assert_called_with(self.board.cells[0])
+        self.board.detach(observer)
+        self.board.cells[5].value = 1
+        observer.cell_assigned.assert_called_once()
+
+    def test_reset_board_fills_like_a_new_one(self):
+        used = board.Board(9, rng=Random(1))
+        used.set_givens([1, 2, 3])
+        used.fill()
+        used.reset()
+        self.assertEqual(81, len(used.free_cells))
+        self.assertListEqual([], used.history)
+        self.assertEqual(0, len(used.trail))
+        for unit in used.units:
+            self.assertListEqual([0] + [9] * 9, unit.counts)
+            self.assertEqual(0, unit.placed)
+        used.rng.seed(5)
+        used.fill()
+        fresh = board.Board(9, rng=Random(5))
+        fresh.fill()
+        self.assertEqual(fresh.to_string(), used.to_string())
+
+    def test_reset_clears_cells_for_observers(self):
+        self.board.cells[3].value = 2
+        observer = self.board.attach(mock.Mock())
+        self.board.reset()
+        observer.cell_cleared.assert_called_once_with(self.board.cells[3])
+
+    def test_boards_of_one_size_share_their_topology(self):
+        other = board.Board(4)
+        self.assertIs(self.board.topology, other.topology)
+        self.assertIsNot(self.board.topology, board.Board(9).topology)
+        peers = self.board.topology.peers[0]
+        self.assertTupleEqual((1, 2, 3, 4, 5, 8, 12), peers)
+        self.assertListEqual(list(peers), [cell.index for cell in self.board.cells[0].linked_cells])
+        self.assertTupleEqual((0, 1, 0), self.board.topology.positions[1])
+
+    def test_snapshot_restores_into_another_board(self):
+        used = board.Board(9, rng=Random(2))
+        used.set_givens([1, 2, 3])
+        used.fill_one()
+        snapshot = used.snapshot()
+        other = board.Board(9, rng=Random(2))
+        other.fill()
+        other.restore(snapshot)
+        self.assertEqual(snapshot, other.snapshot())
+        self.assertListEqual([], other.history)
+        self.assertEqual(len(used.free_cells), len(other.free_cells))
+        for mine, theirs in zip(used.units, other.units):
+            self.assertListEqual(mine.counts, theirs.counts)
+            self.assertEqual(mine.placed, theirs.placed)
+        self.assertTrue(other.solve())
+        self.assertTrue(other.validate())
+        with self.assertRaises(ValueError):
+            self.board.restore(snapshot)
+
+    def test_restore_queues_hidden_singles(self):
+        masks = [0b11110] * 16
+        for i in (1, 2, 3):
+            masks[i] = 0b11100  # only cell 0 of the first row can take 1
+        self.board.restore((masks, [0] * 16))
+        self.board.propagate()
+        self.assertEqual(1, self.board.cells[0].value)
+
+    def test_iter_fill_makes_the_same_choices_as_fill(self):
+        for size, policy in ((16, None), (16, 'luby'), (16, 'backjump')):
+            filled = board.Board(size, rng=Random(2))
+            filled.fill(policy=policy)
+            stepped = board.Board(size, rng=Random(2))
+            steps = list(stepped.iter_fill(policy=policy))
+            self.assertEqual(filled.to_string(), stepped.to_string())
+            values = [0] * size * size
+            for kind, index, value in steps:
+                if kind in (ASSIGN, FORCE):
+                    self.assertEqual(0, values[index])
+                    values[index] = value
+                elif kind == CLEAR:
+                    values[index] = 0
+            self.assertListEqual([cell.value for cell in stepped.cells], values)
+
+    def test_iter_fill_reports_eliminations_and_backtracks(self):
+        b = board.Board(16, rng=Random(2))
+        masks = {cell.index: cell.mask for cell in b.cells}
+        steps = list(b.iter_fill())
+        kinds = {kind for kind, _, _ in steps}
+        self.assertTrue({ASSIGN, FORCE, ELIMINATE, CLEAR, BACKTRACK} <= kinds)
+        self.assertEqual(ASSIGN, steps[0].kind)
+        for kind, index, value in steps:
+            if kind in (ELIMINATE, BACKTRACK):
+                self.assertTrue(masks[index] & 1 << value)
+
+    def test_iter_fill_of_unsolvable_puzzle_raises_at_the_end(self):
+        b = board.Board.from_string('12..' '..3.' '....' '...3')
+        steps = []
+        with self.assertRaises(OutOfOptions):
+            for step in b.iter_fill(exhaustive=True):
+                steps.append(step)
+        self.assertTrue(steps)
+
+    def test_iter_fill_with_backend_yields_assignments(self):
+        backend = mock.Mock()
+        backend.fill.side_effect = lambda b: [setattr(cell, 'value', v) for cell, v in zip(b.cells, [1, 2, 3, 4])]
+        b = board.Board(4, backend)
+        self.assertListEqual([Step(ASSIGN, i, i + 1) for i in range(4)], list(b.iter_fill()))
+
+
+class TestBoardFromString(unittest.TestCase):
+    def test_reads_81_character_puzzle(self):
+        b = board.Board.from_string(PUZZLE)
+        self.assertEqual(9, b.size)
+        self.assertEqual(5, b.cells[0].value)
+        self.assertIsNone(b.cells[2].value)
+        self.assertEqual(30, b.filled_cells)
+
+    def test_reads_separated_numbers(self):
+        b = board.Board.from_string('1,0,0,0\n0,0,3,0\n0,4,0,0\n0,0,0,2')
+        self.assertEqual(4, b.size)
+        self.assertListEqual([1, 3, 4, 2], [c.value for c in b.cells if c.value])
+
+    def test_reads_one_row_per_line(self):
+        for text, size, filled in (
+                ('0000\n0000\n0000\n0000', 4, 0),
+                ('0000\n0000\n0000\n0001', 4, 1),
+                ('1...\n..3.\n.4..\n...2', 4, 4),
+                ('000000000\n' * 9, 9, 0),
+                ('000000000\n' * 8 + '000000001', 9, 1),
+                ('\n'.join(PUZZLE[i:i + 9] for i in range(0, 81, 9)), 9, 30),
+        ):
+            b = board.Board.from_string(text)
+            self.assertEqual((size, filled), (b.size, b.filled_cells), text)
+        self.assertEqual(PUZZLE.replace('0', '.'), board.Board.from_string(
+            '\n'.join(PUZZLE[i:i + 9] for i in range(0, 81, 9))).to_string())
+
+    def test_round_trips_large_board(self):
+        b = board.Board(16)
+        b.fill()
+        self.assertEqual(b.to_string(), board.Board.from_string(b.to_string()).to_string())
+
+    def test_rejects_conflicting_givens(self):
+        with self.assertRaises(OutOfOptions):
+            board.Board.from_string('11' + '.' * 14)
+
+    def test_rejects_non_square_input(self):
+        with self.assertRaises(ValueError):
+            board.Board.from_string('123')
+
+    def test_solves_puzzle(self):
+        b = board.Board.from_string(PUZZLE)
+        self.assertTrue(b.solve())
+        self.assertEqual(SOLUTION, b.to_string())
+
+    def test_reports_unsolvable_puzzle(self):
+        b = board.Board.from_string('12..' '..3.' '....' '...3')
+        self.assertFalse(b.solve())
@@ -0,0 +1,356 @@
+"""Canonical forms of filled grids and an on-disk index of the ones seen.
+
+Two grids are equivalent when one becomes the other by relabelling the
+digits, permuting rows inside a band, permuting bands, the same for
+columns and stacks, and (for square boxes) transposing. `canonical` maps
+a grid to the lexicographically smallest member of its class, so that
+equivalent grids get the same form and `canonical_key` the same key.
+
+The smallest member always starts with the row 1, 2, ..., size, as the
+relabelling can name the digits of any first row in order. Once the first
+row, the second row and the column order are chosen, the relabelling is
+fixed and the remaining rows just sort. So the search only runs over the
+second row: all (orientation, first row, second row) choices advance
+through it together one column at a time, choosing columns as they go,
+and after every column only the choices with the smallest value so far
+survive. Of the billions of transforms of a 9x9 grid, about a thousand
+partial ones are ever looked at, which takes a few milliseconds.
+
+    index = DedupIndex('grids.idx')
+    for grid in unique(batch.generate(1_000_000, 9), index): ...
+    index.merge(DedupIndex('other.idx'))
+
+The index is an open-addressing hash table in a memory-mapped file that
+doubles when it is half full; inserting, testing and merging never look
+at the grids again, only at their keys.
+"""
+from __future__ import annotations
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from hashlib import blake2b
+from math import isqrt
+from operator import itemgetter
+import mmap
+import os
+import struct
+from board import Board, box_shape, parse_values
+from corpus import Grid
+
+KEY_BYTES = 16
+MAGIC = b'SUDOKUIX'
+# magic, key bytes, capacity, count
+INDEX_HEADER = struct.Struct('<8sHQQ')
+
+
+def grid_values(grid: Grid) -> Tuple[int, List[int]]:
+    """(size, cell values) of a filled grid."""
+    if isinstance(grid, Board):
+        values = [cell.value for cell in grid.cells]
+    elif isinstance(grid, str):
+        values = parse_values(grid)
+    else:
+        values = list(grid)
+    size = isqrt(len(values))
+    if size * size != len(values) or size == 0:
+        raise ValueError(f'{len(values)} cells do not make a square grid.')
+    if not all(values):
+        raise ValueError('Only filled grids have a canonical form.')
+    return size, values
+
+
+def _orientations(rows: List[List[int]], size: int) -> List[List[List[int]]]:
+    box_rows, box_cols = box_shape(size)
+    if box_rows != box_cols:
+        return [rows]
+    return [rows, [list(column) for column in zip(*rows)]]
+
+
+def _second_rows(rows: List[List[int]], size: int) -> Iterator[Tuple[int, int, List[int]]]:
+    """Every (first row, second row, sigma) choice of one orientation.
+
+    sigma[c] is the column of the first row that holds the digit found in
+    column c of the second row; the second row of a transform is sigma
+    conjugated by its column order.
+    """
+    box_rows = box_shape(size)[0]
+    for first in range(size):
+        column_of = [0] * size
+        for c, value in enumerate(rows[first]):
+            column_of[value] = c
+        band = first - first % box_rows
+        for second in range(band, band + box_rows):
+            if second != first:
+                yield first, second, [column_of[value] for value in rows[second]]
+
+
+def canonical_values(grid: Grid) -> List[int]:
+    """Cell values of the smallest grid equivalent to the filled `grid`."""
+    size, values = grid_values(grid)
+    box_rows, box_cols = box_shape(size)
+    rows = [[v - 1 for v in values[r * size:(r + 1) * size]] for r in range(size)]
+    if any(sorted(row) != list(range(size)) for row in rows):
+        raise ValueError('Every row of the grid must hold each digit once.')
+    stacks = size // box_cols
+    # a state: orientation, first row, second row, sigma, column at each position,
+    # position of each column, old stack of each new stack, new stack of each
+    # old stack, positions used in each new stack
+    frontier = [
+        (o, first, second, sigma, [-1] * size, [-1] * size, [-1] * stacks, [-1] * stacks, [0] * stacks)
+        for o, view in enumerate(_orientations(rows, size))
+        for first, second, sigma in _second_rows(view, size)
+    ]
+    for j in range(size):
+        block = j // box_cols
+        best = size
+        survivors = []
+        for state in frontier:
+            o, first, second, sigma, column_at, position, old_stack, new_stack, used = state
+            fresh = column_at[j] < 0
+            if not fresh:
+                choices = [column_at[j]]
+            elif old_stack[block] >= 0:
+                s = old_stack[block]
+                choices = [c for c in range(s * box_cols, (s + 1) * box_cols) if position[c] < 0]
+            else:
+                choices = [c for c in range(size) if new_stack[c // box_cols] < 0]
+            for c in choices:
+                # the value this choice puts at position j, before copying anything
+                stack = c // box_cols
+                target = sigma[c]
+                if target == c:
+                    value = j
+                elif position[target] >= 0:
+                    value = position[target]
+                else:
+                    s = target // box_cols
+                    t = block if s == stack else new_stack[s]
+                    if t < 0:
+                        t = old_stack.index(-1)
+                        if t == block:
+                            t = old_stack.index(-1, block + 1)
+                    value = t * box_cols + used[t] + (fresh and t == block)
+                if value > best:
+                    continue
+                if value < best:
+                    best = value
+                    survivors = []
+                columns, positions, counts = column_at[:], position[:], used[:]
+                olds, news = old_stack, new_stack
+                if fresh:
+                    if olds[block] < 0:
+                        olds, news = olds[:], news[:]
+                        olds[block] = stack
+                        news[stack] = block
+                    columns[j] = c
+                    positions[c] = j
+                    counts[block] += 1
+                if positions[target] < 0:
+                    t = value // box_cols
+                    if olds[t] < 0:
+                        olds, news = olds[:], news[:]
+                        olds[t] = target // box_cols
+                        news[target // box_cols] = t
+                    columns[value] = target
+                    positions[target] = value
+                    counts[t] += 1
+                survivors.append((o, first, second, sigma, columns, positions, olds, news, counts))
+        frontier = survivors
+    # the rest only sorts rows, so it runs on bytes: gather the columns, then translate the digits
+    views = [[bytes(row) for row in view] for view in _orientations(rows, size)]
+    identity = bytes(range(size))
+    smallest: Optional[List[bytes]] = None
+    for o, first, second, sigma, column_at, *_ in frontier:
+        gather = itemgetter(*column_at)
+        view = views[o]
+        labels = bytes.maketrans(bytes(gather(view[first])), identity)
+        relabelled = [bytes(gather(row)).translate(labels) for row in view]
+        band = first - first % box_rows
+        head = [relabelled[first], relabelled[second]] + sorted(
+            relabelled[r] for r in range(band, band + box_rows) if r not in (first, second))
+        others = sorted(
+            sorted(relabelled[b:b + box_rows]) for b in range(0, size, box_rows) if b != band)
+        candidate = head + [row for rows_of_band in others for row in rows_of_band]
+        if smallest is None or candidate < smallest:
+            smallest = candidate
+    return [v + 1 for row in smallest for v in row]
+
+
+def canonical(grid: Grid) -> str:
+    """The smallest equivalent grid in `Board.to_string` form."""
+    values = canonical_values(grid)
+    board = Board(isqrt(len(values)))
+    board.set_givens(values)
+    return board.to_string()
+
+
+def canonical_key(grid: Grid) -> bytes:
+    """A fixed-size hash of the canonical form, the same for every equivalent grid."""
+    values = canonical_values(grid)
+    data = bytes(values) if len(values) < 256 ** 2 else ','.join(map(str, values)).encode()
+    key = blake2b(data, digest_size=KEY_BYTES).digest()
+    return key if any(key) else key[:-1] + b'\x01'  # all zeros marks an empty slot
+
+
+class DedupIndex:
+    """Persistent set of `KEY_BYTES`-byte keys in a memory-mapped hash table.
+
+    Opening a missing path creates an empty index. Inserts go straight to
+    the mapped file; the table is rewritten at twice the capacity whenever
+    it gets half full.
+    """
+
+    def __init__(self, path: str, capacity: int = 1 << 16) -> None:
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, max(capacity, 8))
+        self._open()
+
+    @staticmethod
+    def _create(path: str, capacity: int) -> None:
+        with open(path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(MAGIC, KEY_BYTES, capacity, 0))
+            f.truncate(INDEX_HEADER.size + capacity * KEY_BYTES)
+
+    def _open(self) -> None:
+        with open(self.path, 'r+b') as f:
+            self.map = mmap.mmap(f.fileno(), 0)
+        if len(self.map) < INDEX_HEADER.size:
+            self.map.close()
+            raise ValueError(f'{self.path} is too short for a dedup index.')
+        magic, key_bytes, capacity, count = INDEX_HEADER.unpack_from(self.map)
+        if magic != MAGIC or key_bytes != KEY_BYTES:
+            self.map.close()
+            raise ValueError(f'{self.path} is not a dedup index with {KEY_BYTES}-byte keys.')
+        if len(self.map) != INDEX_HEADER.size + capacity * KEY_BYTES:
+            self.map.close()
+            raise ValueError(f'{self.path} is truncated.')
+        self.capacity = capacity
+        self.count = count
+
+    def _slot(self, key: bytes) -> Tuple[int, bool]:
+        """Offset of `key` in the map, or of the empty slot it would go to, and whether it is there."""
+        if len(key) != KEY_BYTES or not any(key):
+            raise ValueError(f'Keys are {KEY_BYTES} bytes and not all zero.')
+        capacity, data = self.capacity, self.map
+        i = int.from_bytes(key[:8], 'little') % capacity
+        while True:
+            offset = INDEX_HEADER.size + i * KEY_BYTES
+            stored = data[offset:offset + KEY_BYTES]
+            if stored == key:
+                return offset, True
+            if not any(stored):
+                return offset, False
+            i = (i + 1) % capacity
+
+    def __contains__(self, key: bytes) -> bool:
+        return self._slot(key)[1]
+
+    def add(self, key: bytes) -> bool:
+        """Insert `key`; returns False if it was already there."""
+        offset, found = self._slot(key)
+        if found:
+            return False
+        self.map[offset:offset + KEY_BYTES] = key
+        self.count += 1
+        struct.pack_into('<Q', self.map, INDEX_HEADER.size - 8, self.count)
+        if 2 * self.count > self.capacity:
+            self._grow()
+        return True
+
+    def update(self, keys: Iterable[bytes]) -> int:
+        """Insert every key; returns how many were new."""
+        return sum(self.add(key) for key in keys)
+
+    def merge(self, other: DedupIndex) -> int:
+        """Insert the keys of another index; returns how many were new."""
+        return self.update(iter(other))
+
+    def _grow(self) -> None:
+        keys = list(self)
+        self.map.close()
+        temporary = self.path + '.grow'
+        self._create(temporary, self.capacity * 2)
+        os.replace(temporary, self.path)
+        self._open()
+        for key in keys:
+            offset, _ = self._slot(key)
+            self.map[offset:offset + KEY_BYTES] = key
+        self.count = len(keys)
+        struct.pack_into('<Q', self.map, INDEX_HEADER.size - 8, self.count)
+
+    def __iter__(self) -> Iterator[bytes]:
+        data = self.map
+        for offset in range(INDEX_HEADER.size, len(data), KEY_BYTES):
+            key = data[offset:offset + KEY_BYTES]
+            if any(key):
+                yield key
+
+    def __len__(self) -> int:
+        return self.count
+
+    def flush(self) -> None:
+        self.map.flush()
+
+    def close(self) -> None:
+        if not self.map.closed:
+            self.map.flush()
+            self.map.close()
+
+    def __enter__(self) -> DedupIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def unique(grids: Iterable[Grid], index: DedupIndex) -> Iterator[Grid]:
+    """The grids of `grids` whose class is not in `index` yet, adding each one as it passes."""
+    for grid in grids:
+        if index.add(canonical_key(grid)):
+            yield grid
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    import sys
+    from corpus import CorpusReader
+
+    def read_grids(paths: Sequence[str]) -> Iterator[Grid]:
+        for path in paths:
+            if path == '-':
+                yield from (line.strip() for line in sys.stdin if line.strip())
+                continue
+            with open(path, 'rb') as f:
+                packed = f.read(8) == b'SUDOKUPK'
+            if packed:
+                with CorpusReader(path) as reader:
+                    yield from (list(values) for values in reader)
+            else:
+                with open(path) as f:
+                    yield from (line.strip() for line in f if line.strip())
+
+    parser = ArgumentParser(description='Canonical forms of grids and a dedup index of them.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    show = commands.add_parser('show', help='print the canonical form of every grid')
+    show.add_argument('inputs', nargs='*', default=['-'], help='text files with one grid per line, or corpus files')
+    dedup = commands.add_parser('dedup', help='print the grids whose class is not in the index yet, and add them')
+    dedup.add_argument('index')
+    dedup.add_argument('inputs', nargs='*', default=['-'])
+    merge = commands.add_parser('merge', help='add the keys of other indexes to an index')
+    merge.add_argument('index')
+    merge.add_argument('others', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        for grid in read_grids(args.inputs):
+            print(canonical(grid))
+    elif args.command == 'dedup':
+        with DedupIndex(args.index) as index:
+            before = len(index)
+            for grid in unique(read_grids(args.inputs), index):
+                print(grid if isinstance(grid, str) else ','.join(map(str, grid)))
+            print(f'{len(index) - before} new classes, {len(index)} in {args.index}', file=sys.stderr)
+    else:
+        with DedupIndex(args.index) as index:
+            for path in args.others:
+                with DedupIndex(path) as other:
+                    print(f'{index.merge(other)} new keys from {path}', file=sys.stderr)
@@ -0,0 +1,120 @@
+import itertools
+import os
+import tempfile
+import unittest
+from random import Random
+
+import canonical
+import transforms
+from board import Board, box_shape
+
+
+def _smallest_by_brute_force(values, size):
+    """Smallest relabelled grid over every transform, for small sizes only."""
+    box_rows, box_cols = box_shape(size)
+
+    def orders(group):
+        for groups in itertools.permutations(range(size // group)):
+            for inner in itertools.product(*[itertools.permutations(range(g * group, (g + 1) * group)) for g in groups]):
+                yield [line for lines in inner for line in lines]
+
+    rows = [values[r * size:(r + 1) * size] for r in range(size)]
+    views = [rows, [list(column) for column in zip(*rows)]] if box_rows == box_cols else [rows]
+    smallest = None
+    for view in views:
+        for row_order in orders(box_rows):
+            for column_order in list(orders(box_cols)):
+                labels = {}
+                grid = [labels.setdefault(view[r][c], len(labels) + 1) for r in row_order for c in column_order]
+                if smallest is None or grid < smallest:
+                    smallest = grid
+    return smallest
+
+
+class TestCanonical(unittest.TestCase):
+    def test_matches_brute_force_on_small_grids(self):
+        for size in (4, 6):
+            for seed in range(4):
+                grid = transforms.searched_grid(size, Random(seed))
+                self.assertListEqual(_smallest_by_brute_force(grid, size), canonical.canonical_values(grid))
+
+    def test_transformed_grids_share_their_form(self):
+        for size in (9, 12, 16):
+            grid = transforms.searched_grid(size, Random(size))
+            form = canonical.canonical(grid)
+            transformer = transforms.Transformer(grid, size, Random(1))
+            for _ in range(5):
+                self.assertEqual(form, canonical.canonical(transformer.next()))
+            board = Board.from_string(form)
+            self.assertTrue(board.validate())
+            self.assertListEqual(list(range(1, size + 1)), [cell.value for cell in board.cells[:size]])
+
+    def test_keys_tell_classes_apart(self):
+        grids = [transforms.searched_grid(9, Random(seed)) for seed in range(10)]
+        keys = {canonical.canonical_key(grid) for grid in grids}
+        self.assertEqual(10, len(keys))
+        self.assertEqual(canonical.KEY_BYTES, len(keys.pop()))
+
+    def test_accepts_boards_strings_and_values(self):
+        board = Board(9, rng=Random(3))
+        board.fill()
+        values = [cell.value for cell in board.cells]
+        self.assertEqual(canonical.canonical(board), canonical.canonical(board.to_string()))
+        self.assertEqual(canonical.canonical(board), canonical.canonical(values))
+
+    def test_rejects_unfinished_grids(self):
+        with self.assertRaises(ValueError):
+            canonical.canonical('1.' + '.' * 14)
+        with self.assertRaises(ValueError):
+            canonical.canonical([1] * 16)
+
+
+class TestDedupIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'grids.idx')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def keys(self, count, seed=0):
+        rng = Random(seed)
+        return [rng.randbytes(canonical.KEY_BYTES) for _ in range(count)]
+
+    def test_inserts_survive_growth_and_reopening(self):
+        keys = self.keys(200)
+        with canonical.DedupIndex(self.path, capacity=8) as index:
+            self.assertEqual(200, index.update(keys))
+            self.assertFalse(index.add(keys[17]))
+            self.assertGreaterEqual(index.capacity, 400)
+        with canonical.DedupIndex(self.path) as index:
+            self.assertEqual(200, len(index))
+            self.assertTrue(all(key in index for key in keys))
+            self.assertFalse(any(key in index for key in self.keys(50, seed=1)))
+            self.assertSetEqual(set(keys), set(index))
+
+    def test_merge_adds_only_new_keys(self):
+        other_path = os.path.join(self.directory.name, 'other.idx')
+        with canonical.DedupIndex(self.path) as index, canonical.DedupIndex(other_path) as other:
+            index.update(self.keys(30))
+            other.update(self.keys(30)[10:] + self.keys(5, seed=2))
+            self.assertEqual(5, index.merge(other))
+            self.assertEqual(35, len(index))
+
+    def test_unique_skips_equivalent_grids(self):
+        grid = transforms.searched_grid(9, Random(4))
+        variants = list(transforms.generate(5, 9, grid=grid, seed=1))
+        others = [transforms.searched_grid(9, Random(seed)) for seed in (5, 6)]
+        with canonical.DedupIndex(self.path) as index:
+            kept = list(canonical.unique(variants + others + variants, index))
+        self.assertListEqual([variants[0]] + others, kept)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not an index at all, not even close')
+        with self.assertRaises(ValueError):
+            canonical.DedupIndex(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
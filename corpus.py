@@ -0,0 +1,243 @@
+"""Packed binary corpus of grids with memory-mapped random access.
+
+A corpus file is a fixed header, a JSON metadata block and then `count`
+records of `record_bytes` bytes each. A record stores every cell in
+`bits = size.bit_length()` bits, cell i in bits i * bits and up of the
+record read as one little-endian integer, with 0 for a blank. A 9x9 grid
+takes 41 bytes against 82 for a text line, and record i sits at a known
+offset, so the reader never parses more than the record it is asked for.
+
+    with CorpusWriter('grids.sdk', 9, engine='greedy', seed=1) as out:
+        out.extend(batch.generate(10_000_000, 9, seed=1))
+    with CorpusReader('grids.sdk') as corpus:
+        board = corpus.board(1_234_567)
+
+The count in the header is written when the writer closes; a file whose
+writer did not finish is rejected by the reader.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+from array import array
+from random import Random
+import json
+import mmap
+import struct
+from board import Board, SYMBOLS, parse_values
+
+MAGIC = b'SUDOKUPK'
+VERSION = 1
+# magic, version, size, bits per cell, record bytes, count, metadata bytes
+HEADER = struct.Struct('<8sHHHIQI')
+UNFINISHED = 2 ** 64 - 1
+
+Grid = Union[Board, str, Sequence[Optional[int]]]
+
+
+def cell_bits(size: int) -> int:
+    return size.bit_length()
+
+
+def record_bytes(size: int) -> int:
+    return (size * size * cell_bits(size) + 7) // 8
+
+
+class RecordCodec:
+    """Packs the values of one grid into a record and back.
+
+    Both directions go through a binary string of the record integer with a
+    lookup table per cell, which keeps them linear in the number of cells.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.cells = size * size
+        self.bits = cell_bits(size)
+        self.record_bytes = record_bytes(size)
+        self.codes = [format(v, f'0{self.bits}b') for v in range(size + 1)]
+        self.decode_table = {code: v for v, code in enumerate(self.codes)}
+        self.symbols = {symbol: v for v, symbol in enumerate(SYMBOLS[:size], 1)}
+        self.typecode = 'B' if size < 256 else 'H'
+
+    def values(self, grid: Grid) -> List[int]:
+        """Cell values of `grid` with 0 for blanks."""
+        if isinstance(grid, Board):
+            values = [cell.value or 0 for cell in grid.cells]
+        elif isinstance(grid, str):
+            symbols = self.symbols
+            if len(grid) == self.cells and all(c in symbols for c in grid):
+                values = [symbols[c] for c in grid]  # the common single-line form of a filled grid
+            else:
+                values = [v or 0 for v in parse_values(grid)]
+        else:
+            values = [v or 0 for v in grid]
+        if len(values) != self.cells:
+            raise ValueError(f'{len(values)} cells do not fit a corpus of size {self.size}.')
+        return values
+
+    def encode(self, grid: Grid) -> bytes:
+        codes = self.codes
+        try:
+            text = ''.join([codes[v] for v in reversed(self.values(grid))])
+        except IndexError:
+            raise ValueError(f'Grid has a value above {self.size}.')
+        return int(text, 2).to_bytes(self.record_bytes, 'little')
+
+    def decode(self, record: bytes) -> array:
+        bits = self.bits
+        width = self.cells * bits
+        text = format(int.from_bytes(record, 'little'), f'0{width}b')
+        table = self.decode_table
+        return array(self.typecode, [table[text[i - bits:i]] for i in range(width, 0, -bits)])
+
+
+class CorpusWriter:
+    """Streams grids into a new corpus file.
+
+    `metadata` is stored as JSON in the header, typically the engine and
+    seed that produced the grids.
+    """
+
+    def __init__(self, path: str, size: int, **metadata) -> None:
+        self.path = path
+        self.codec = RecordCodec(size)
+        self.count = 0
+        self.file: BinaryIO = open(path, 'wb')
+        meta = json.dumps(metadata, sort_keys=True).encode()
+        self.file.write(HEADER.pack(
+            MAGIC, VERSION, size, self.codec.bits, self.codec.record_bytes, UNFINISHED, len(meta)))
+        self.file.write(meta)
+
+    def write(self, grid: Grid) -> None:
+        self.file.write(self.codec.encode(grid))
+        self.count += 1
+
+    def extend(self, grids: Iterable[Grid]) -> int:
+        """Write every grid of `grids`; returns how many were written."""
+        before = self.count
+        encode = self.codec.encode
+        write = self.file.write
+        for grid in grids:
+            write(encode(grid))
+            self.count += 1
+        return self.count - before
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.file.seek(HEADER.size - 12)
+        self.file.write(struct.pack('<Q', self.count))
+        self.file.close()
+
+    def __enter__(self) -> CorpusWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_corpus(path: str, grids: Iterable[Grid], size: int, **metadata) -> int:
+    """Write `grids` to a new corpus at `path`; returns the number of records."""
+    with CorpusWriter(path, size, **metadata) as out:
+        return out.extend(grids)
+
+
+class CorpusReader:
+    """Random access to the records of a corpus file through `mmap`.
+
+    Only the header is read up front. `corpus[i]` (or `values(i)`) decodes
+    record i into an array of cell values, `board(i)` builds a `Board` from
+    it and `record(i)` is the packed record itself.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            self.map.close()
+            raise ValueError(f'{path} is too short for a corpus header.')
+        magic, version, size, bits, width, count, meta_len = HEADER.unpack_from(self.map)
+        try:
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a corpus file.')
+            if version != VERSION:
+                raise ValueError(f'{path} has corpus version {version}, expected {VERSION}.')
+            if count == UNFINISHED:
+                raise ValueError(f'{path} was not closed by its writer.')
+            self.codec = RecordCodec(size)
+            if (bits, width) != (self.codec.bits, self.codec.record_bytes):
+                raise ValueError(f'{path} has {bits}-bit cells in {width}-byte records, which do not fit size {size}.')
+            self.offset = HEADER.size + meta_len
+            if len(self.map) < self.offset + count * width:
+                raise ValueError(f'{path} is truncated: {count} records announced.')
+        except ValueError:
+            self.map.close()
+            raise
+        self.size = size
+        self.count = count
+        self.record_bytes = width
+        self.metadata: Dict = json.loads(self.map[HEADER.size:self.offset])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, index: int) -> bytes:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f'Record {index} is outside a corpus of {self.count}.')
+        start = self.offset + index * self.record_bytes
+        return self.map[start:start + self.record_bytes]
+
+    def values(self, index: int) -> array:
+        return self.codec.decode(self.record(index))
+
+    __getitem__ = values
+
+    def board(self, index: int, rng: Optional[Random] = None) -> Board:
+        board = Board(self.size, rng=rng)
+        board.set_givens([v or None for v in self.values(index)])
+        return board
+
+    def __iter__(self) -> Iterator[array]:
+        for index in range(self.count):
+            yield self.values(index)
+
+    def close(self) -> None:
+        self.map.close()
+
+    def __enter__(self) -> CorpusReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    import sys
+    import batch
+
+    parser = ArgumentParser(description='Write generated grids to a corpus file, or print records of one.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    write = commands.add_parser('write', help='generate grids into a new corpus')
+    write.add_argument('path')
+    write.add_argument('count', type=int)
+    write.add_argument('--size', type=int, default=9)
+    write.add_argument('--workers', type=int, default=None)
+    write.add_argument('--seed', type=int, default=None)
+    write.add_argument('--engine', choices=batch.ENGINES, default='greedy')
+    show = commands.add_parser('show', help='print the header and some records of a corpus')
+    show.add_argument('path')
+    show.add_argument('indices', type=int, nargs='*', default=[0])
+    args = parser.parse_args()
+
+    if args.command == 'write':
+        grids = batch.generate(args.count, args.size, args.workers, args.seed, engine=args.engine)
+        written = write_corpus(args.path, grids, args.size, engine=args.engine, seed=args.seed)
+        print(f'{written} grids written to {args.path}', file=sys.stderr)
+    else:
+        with CorpusReader(args.path) as corpus:
+            print(f'size {corpus.size}, {len(corpus)} records of {corpus.record_bytes} bytes, {corpus.metadata}')
+            for index in args.indices:
+                print(index, corpus.board(index).to_string())
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from random import Random
+
+import corpus
+import transforms
+from board import Board
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self) -> None:
+        handle, self.path = tempfile.mkstemp(suffix='.sdk')
+        os.close(handle)
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+    def test_round_trip_gives_the_same_grids(self):
+        grids = list(transforms.generate(50, 9, seed=1))
+        self.assertEqual(50, corpus.write_corpus(self.path, grids, 9, engine='transform', seed=1))
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(50, len(reader))
+            self.assertEqual(9, reader.size)
+            self.assertDictEqual({'engine': 'transform', 'seed': 1}, reader.metadata)
+            self.assertEqual(grids[17], reader.board(17).to_string())
+            self.assertEqual(grids[-1], reader.board(-1).to_string())
+            self.assertListEqual(grids, [Board.from_string(','.join(map(str, v))).to_string() for v in reader])
+
+    def test_records_use_the_fewest_bits_per_cell(self):
+        self.assertEqual(41, corpus.record_bytes(9))     # 81 cells of 4 bits
+        self.assertEqual(160, corpus.record_bytes(16))   # 256 cells of 5 bits
+        grids = list(transforms.generate(3, 16, seed=2))
+        corpus.write_corpus(self.path, grids, 16)
+        header = corpus.HEADER.size + len(b'{}')
+        self.assertEqual(header + 3 * 160, os.path.getsize(self.path))
+
+    def test_blanks_boards_and_large_sizes(self):
+        filled = Board(4, rng=Random(3))
+        filled.fill()
+        puzzle = [None, 2, None, 4] + [None] * 12
+        with corpus.CorpusWriter(self.path, 4) as out:
+            out.write(filled)
+            out.write(puzzle)
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(filled.to_string(), reader.board(0).to_string())
+            self.assertListEqual([v or 0 for v in puzzle], list(reader[1]))
+            self.assertEqual(2, reader.board(1).filled_cells)
+
+        big = next(transforms.generate(1, 36, seed=4))
+        corpus.write_corpus(self.path, [big], 36)
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(big, reader.board(0).to_string())
+
+    def test_bad_input_is_rejected(self):
+        with corpus.CorpusWriter(self.path, 4) as out:
+            with self.assertRaises(ValueError):
+                out.write([5] * 16)
+            with self.assertRaises(ValueError):
+                out.write([1] * 15)
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(0, len(reader))
+            with self.assertRaises(IndexError):
+                reader.values(0)
+
+    def test_unfinished_and_foreign_files_are_rejected(self):
+        out = corpus.CorpusWriter(self.path, 4)
+        out.write([1, 2, 3, 4] * 4)
+        out.file.flush()
+        with self.assertRaises(ValueError):
+            corpus.CorpusReader(self.path)
+        out.close()
+        with open(self.path, 'wb') as f:
+            f.write(b'123456789,' * 10)
+        with self.assertRaises(ValueError):
+            corpus.CorpusReader(self.path)
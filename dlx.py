@@ -0,0 +1,225 @@
+from __future__ import annotations
+from typing import Iterator, List, Tuple, TYPE_CHECKING
+import random
+from structures import OutOfOptions, to_values
+
+if TYPE_CHECKING:
+    from board import Board
+
+
+class DancingLinks:
+    """Exact-cover (Algorithm X) backend for `Board.fill`.
+
+    Every (cell, value) candidate is a row covering four columns: the cell
+    itself and the value in its row, column and square. Both the rows and the
+    ring of column headers are linked in random order, so the search breaks
+    ties differently each time and consecutive fills give different grids.
+
+    Random orderings occasionally walk into a huge dead subtree. `fill`
+    therefore abandons the current ordering after `restart_after` dead ends,
+    reshuffles the column ring and starts over, doubling the budget each time
+    so a solution is still found whenever one exists.
+    """
+
+    def __init__(self, rng: random.Random | None = None, restart_after: int | None = 100) -> None:
+        self.rng = rng if rng is not None else random.Random()
+        self.restart_after = restart_after
+        self.restarts = 0
+
+    def fill(self, board: Board) -> None:
+        matrix = _Matrix(board, self.rng)
+        for solution in matrix.search(self.restart_after):
+            placed = 0
+            for cell_index, value in solution:
+                cell = board.cells[cell_index]
+                if cell.value is None:
+                    board.history.append(cell)
+                    cell.value = value
+                    placed += 1
+            self.restarts += matrix.restarts
+            board.backtracks += matrix.backtracks
+            if board.stats is not None:
+                # the matrix search has no per-cell eliminations; report the cells it filled and its dead ends,
+                # leaving out the rows of givens as the greedy search does
+                board.stats.assignments += placed
+                board.stats.failures += matrix.backtracks
+            return
+        raise OutOfOptions('Board has no solution.')
+
+    def solutions(self, board: Board) -> Iterator[List[Tuple[int, int]]]:
+        """Yield each completion of `board` once, as a list of (cell index, value)."""
+        yield from _Matrix(board, self.rng).search()
+
+
+class _Matrix:
+    def __init__(self, board: Board, rng: random.Random) -> None:
+        self.rng = rng
+        size = board.size
+        unit_of = [[0, 0, 0] for _ in board.cells]
+        for kind, units in enumerate((board.rows, board.columns, board.squares)):
+            for u, unit in enumerate(units):
+                for cell in unit:
+                    unit_of[cell.index][kind] = u
+
+        candidates = []
+        for cell in board.cells:
+            values = [cell.value] if cell.value is not None else to_values(cell.mask)
+            for value in values:
+                candidates.append((cell.index, value))
+        rng.shuffle(candidates)
+
+        n_columns = 4 * size * size
+        # node 0 is the root, nodes 1..n_columns are column headers linked in a shuffled ring
+        self.left = [0] * (n_columns + 1)
+        self.right = [0] * (n_columns + 1)
+        self._link_ring(list(range(1, n_columns + 1)))
+        self.up = list(range(n_columns + 1))
+        self.down = list(range(n_columns + 1))
+        self.column = list(range(n_columns + 1))
+        self.sizes = [0] * (n_columns + 1)
+        self.row_of: List[int] = [-1] * (n_columns + 1)
+        self.rows: List[Tuple[int, int]] = []
+        self.dead_ends = 0
+        self.backtracks = 0
+        self.restarts = 0
+
+        area = size * size
+        for cell_index, value in candidates:
+            r, c, s = unit_of[cell_index]
+            digit = value - 1
+            columns = (
+                1 + cell_index,
+                1 + area + r * size + digit,
+                1 + 2 * area + c * size + digit,
+                1 + 3 * area + s * size + digit,
+            )
+            self._add_row(columns, len(self.rows))
+            self.rows.append((cell_index, value))
+
+    def _link_ring(self, columns: List[int]) -> None:
+        self.rng.shuffle(columns)
+        ring = [0] + columns
+        for i, col in enumerate(ring):
+            self.right[col] = ring[(i + 1) % len(ring)]
+            self.left[col] = ring[i - 1]
+
+    def _add_row(self, columns: tuple, row: int) -> None:
+        first = len(self.column)
+        for i, col in enumerate(columns):
+            node = first + i
+            self.column.append(col)
+            self.row_of.append(row)
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.sizes[col] += 1
+            self.left.append(node - 1 if i else first + len(columns) - 1)
+            self.right.append(node + 1 if i < len(columns) - 1 else first)
+
+    def cover(self, col: int) -> None:
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col: int) -> None:
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def _choose_column(self) -> int:
+        right, sizes = self.right, self.sizes
+        best = col = right[0]
+        best_size = sizes[col]
+        while col != 0 and best_size > 1:
+            if sizes[col] < best_size:
+                best_size = sizes[col]
+                best = col
+            col = right[col]
+        return best
+
+    def _select(self, node: int) -> None:
+        j = self.right[node]
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    def _deselect(self, node: int) -> None:
+        j = self.left[node]
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+
+    def search(self, restart_after: int | None = None) -> Iterator[List[Tuple[int, int]]]:
+        """Depth-first search yielding every exact cover.
+
+        With `restart_after`, the search unwinds to the root and reshuffles
+        the column ring whenever that many dead ends have been hit, doubling
+        the limit each time. Solutions may then repeat, so that mode is only
+        meant for taking the first one.
+        """
+        chosen: List[int] = []
+        down = self.down
+        budget = restart_after
+        while True:
+            if self.right[0] == 0:
+                yield [self.rows[self.row_of[node]] for node in chosen]
+                node = None
+            else:
+                col = self._choose_column()
+                self.cover(col)
+                node = down[col]
+                if node == col:
+                    self.uncover(col)
+                    node = None
+                    self.dead_ends += 1
+                    self.backtracks += 1
+                    if budget is not None and self.dead_ends > budget:
+                        self._restart(chosen)
+                        budget *= 2
+                        continue
+            # walk back up until some column has an untried row left
+            while node is None:
+                if not chosen:
+                    return
+                previous = chosen.pop()
+                self._deselect(previous)
+                col = self.column[previous]
+                node = down[previous]
+                if node == col:
+                    self.uncover(col)
+                    node = None
+            chosen.append(node)
+            self._select(node)
+
+    def _restart(self, chosen: List[int]) -> None:
+        while chosen:
+            node = chosen.pop()
+            self._deselect(node)
+            self.uncover(self.column[node])
+        columns = []
+        col = self.right[0]
+        while col != 0:
+            columns.append(col)
+            col = self.right[col]
+        self._link_ring(columns)
+        self.dead_ends = 0
+        self.restarts += 1
@@ -0,0 +1,47 @@
+import unittest
+from random import Random
+
+import board
+from dlx import DancingLinks
+from structures import OutOfOptions
+
+
+class TestDancingLinks(unittest.TestCase):
+    def setUp(self) -> None:
+        self.backend = DancingLinks(Random(1))
+
+    def test_fills_board_with_valid_grid(self):
+        b = board.Board(9, self.backend)
+        b.fill()
+        self.assertSetEqual(set(), b.unfilled)
+        self.assertTrue(b.validate())
+
+    def test_keeps_values_already_on_board(self):
+        b = board.Board(4, self.backend)
+        b.cells[0].value = 3
+        b.cells[5].value = 1
+        b.fill()
+        self.assertEqual(3, b.cells[0].value)
+        self.assertEqual(1, b.cells[5].value)
+        self.assertTrue(b.validate())
+
+    def test_different_seeds_give_different_grids(self):
+        grids = set()
+        for seed in range(5):
+            b = board.Board(9, DancingLinks(Random(seed)))
+            b.fill()
+            grids.add(str(b))
+        self.assertGreater(len(grids), 1)
+
+    def test_unsolvable_board_raises(self):
+        b = board.Board(4, self.backend)
+        b.cells[0].value = 1
+        b.cells[1].value = 2
+        b.cells[6].value = 3
+        b.cells[15].value = 3
+        with self.assertRaises(OutOfOptions):
+            b.fill()
+
+    def test_enumerates_all_completions(self):
+        b = board.Board(4)
+        self.assertEqual(288, sum(1 for _ in self.backend.solutions(b)))
@@ -1 +1,295 @@
+"""Command line for generating, solving, validating and benchmarking boards.
 
+    python main.py generate 1000 --size 9 --seed 1 > grids.txt
+    python main.py generate 100 --puzzles --clues 30 --format jsonl
+    python main.py generate 100000 --workers 0 --format packed --output grids.sdk
+    python main.py generate 5 --gui
+    python main.py solve puzzles.txt --format jsonl
+    python main.py validate grids.sdk puzzles.txt --puzzles
+    python main.py bench --sizes 9 16 --format jsonl
+
+Only `argparse` and `sys` are loaded up front. Every command imports the
+modules it needs when it runs, NumPy only for `validate` and turtle only
+with `--gui`, so a short run starts in milliseconds. Records are written
+and flushed one by one as they are produced; a summary goes to stderr.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+from argparse import ArgumentParser, Namespace
+import sys
+
+FORMATS = ('text', 'jsonl', 'packed')
+
+
+class TextOutput:
+    """One line per record holding its `field`; an empty line where the field is None."""
+
+    def __init__(self, out: TextIO, field: str) -> None:
+        self.out = out
+        self.field = field
+
+    def write(self, record: Dict) -> None:
+        self.out.write((record[self.field] or '') + '\n')
+        self.out.flush()
+
+    def close(self) -> None:
+        if self.out is not sys.stdout:
+            self.out.close()
+
+
+class JsonlOutput:
+    """One JSON object per line per record."""
+
+    def __init__(self, out: TextIO) -> None:
+        import json
+
+        self.out = out
+        self.dumps = json.dumps
+
+    def write(self, record: Dict) -> None:
+        self.out.write(self.dumps(record) + '\n')
+        self.out.flush()
+
+    def close(self) -> None:
+        if self.out is not sys.stdout:
+            self.out.close()
+
+
+class PackedOutput:
+    """The `field` of every record in a corpus file; records where it is None are left out.
+
+    A corpus gets its record count written on close, so it needs a real
+    file, not a pipe. Without a known `size` the file is created at the
+    first record, and not at all when no record arrives.
+    """
+
+    def __init__(self, path: str, field: str, size: Optional[int] = None, **metadata) -> None:
+        self.path = path
+        self.field = field
+        self.size = size
+        self.metadata = metadata
+        self.writer = None
+        self.skipped = 0
+        if size is not None:
+            self._open(size)
+
+    def _open(self, size: int) -> None:
+        from corpus import CorpusWriter
+
+        self.writer = CorpusWriter(self.path, size, **self.metadata)
+
+    def write(self, record: Dict) -> None:
+        grid = record[self.field]
+        if grid is None:
+            self.skipped += 1
+            return
+        if self.writer is None:
+            from math import isqrt
+            from board import parse_values
+
+            self._open(isqrt(len(parse_values(grid))))
+        self.writer.write(grid)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_output(args: Namespace, field: str, size: Optional[int] = None, **metadata):
+    if args.format == 'packed':
+        return PackedOutput(args.output, field, size, **metadata)
+    out = open(args.output, 'w') if args.output else sys.stdout
+    return TextOutput(out, field) if args.format == 'text' else JsonlOutput(out)
+
+
+def run_generate(args: Namespace) -> int:
+    from random import Random
+    from time import perf_counter
+    import batch
+
+    if args.gui:
+        from render import TurtleRenderer
+
+        renderer = TurtleRenderer(1000, fps=args.fps or None)
+        tasks = batch.chunk_tasks(args.count, args.size, args.seed, args.chunk, args.engine)
+        grids: Iterable[str] = (grid for task in tasks for grid in batch.fill_chunk(task, renderer))
+    else:
+        grids = batch.generate(args.count, args.size, args.workers or None, args.seed, args.chunk, args.engine)
+    if args.puzzles:
+        records = puzzle_records(grids, args.size, args.clues, args.symmetry, Random(args.seed))
+    else:
+        records = ({'size': args.size, 'grid': grid} for grid in grids)
+    field = 'puzzle' if args.puzzles else 'grid'
+    output = open_output(args, field, args.size, kind=field, engine=args.engine, seed=args.seed)
+    start = perf_counter()
+    count = 0
+    try:
+        for record in records:
+            output.write(record)
+            count += 1
+    finally:
+        output.close()
+    elapsed = perf_counter() - start
+    print(f'{count} {field}s in {elapsed:.2f}s', file=sys.stderr)
+    return 0
+
+
+def puzzle_records(grids: Iterable[str], size: int, clues: Optional[int], symmetry: str, rng) -> Iterator[Dict]:
+    from board import Board
+    from puzzle import make_puzzle
+
+    for grid in grids:
+        puzzle = make_puzzle(Board.from_string(grid, rng=rng), clues, symmetry, rng)
+        yield {'size': size, 'puzzle': puzzle.to_string(), 'solution': grid}
+
+
+def read_lines(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        if path == '-':
+            yield from sys.stdin
+        else:
+            with open(path) as f:
+                yield from f
+
+
+def run_solve(args: Namespace) -> int:
+    from solver import iter_solutions
+
+    backend = None
+    if args.engine == 'dlx':
+        from dlx import DancingLinks
+
+        backend = DancingLinks()
+    output = open_output(args, 'solution')
+    solved = unsolvable = 0  # unsolvable puzzles give an empty line, a null solution or no record
+    try:
+        for puzzle, solution in iter_solutions(read_lines(args.puzzles), backend):
+            output.write({'puzzle': puzzle, 'solution': solution})
+            if solution is None:
+                unsolvable += 1
+            else:
+                solved += 1
+    finally:
+        output.close()
+    print(f'solved {solved}, unsolvable {unsolvable}', file=sys.stderr)
+    return 0
+
+
+def run_validate(args: Namespace) -> int:
+    from verify import validate_chunks
+    import numpy as np
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    if args.format == 'jsonl':
+        import json
+
+        line = lambda path, index: json.dumps({'path': path, 'record': index})
+    else:
+        line = lambda path, index: f'{path}:{index}'
+    failed = False
+    for path in args.paths:
+        records = invalid = 0
+        for first, valid in validate_chunks(path, args.puzzles, args.size, args.chunk):
+            bad = np.nonzero(~valid)[0].tolist()
+            if bad:
+                out.write(''.join(line(path, first + i) + '\n' for i in bad))
+                out.flush()
+            records += len(valid)
+            invalid += len(bad)
+        print(f'{path}: {records} records, {invalid} invalid', file=sys.stderr)
+        failed |= invalid > 0
+    if out is not sys.stdout:
+        out.close()
+    return 1 if failed else 0
+
+
+def run_bench(args: Namespace) -> int:
+    import bench
+
+    output = open_output(args, 'line')
+    results = []
+    for size in args.sizes:
+        count = args.count or bench.DEFAULT_COUNTS.get(size, 10)
+        for engine in args.engines:
+            for result in bench.bench_size(size, engine, count, args.seed + size, args.holes, None, args.policy):
+                results.append(result)
+                output.write({'line': bench.format_result(result)} if args.format == 'text' else result)
+    output.close()
+    if args.budget:
+        over = bench.over_budget({'results': results})
+        for line in over:
+            print(f'OVER BUDGET {line}', file=sys.stderr)
+        return 1 if over else 0
+    return 0
+
+
+def build_parser() -> ArgumentParser:
+    """The argument parser; choices are spelled out here so that `--help` imports nothing else."""
+    parser = ArgumentParser(prog='main.py', description='Generate, solve, validate and benchmark sudoku boards.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='fill grids, or make puzzles from them')
+    generate.add_argument('count', type=int)
+    generate.add_argument('--size', type=int, default=9)
+    generate.add_argument('--engine', choices=('greedy', 'dlx', 'transform'), default='greedy')
+    generate.add_argument('--seed', type=int, default=None)
+    generate.add_argument('--workers', type=int, default=1, help='generator processes (default 1; 0 uses every CPU)')
+    generate.add_argument('--chunk', type=int, default=64, help='grids per worker task')
+    generate.add_argument('--puzzles', action='store_true', help='write puzzles with a unique solution instead of grids')
+    generate.add_argument('--clues', type=int, default=None, help='target number of clues of a puzzle')
+    generate.add_argument('--symmetry', choices=('none', 'rotational', 'horizontal', 'vertical', 'diagonal'),
+                          default='none')
+    generate.add_argument('--gui', action='store_true', help='draw every fill with turtle graphics')
+    generate.add_argument('--fps', type=float, default=10.0, help='frames per second with --gui; 0 draws each grid once')
+    generate.add_argument('--format', choices=FORMATS, default='text')
+    generate.add_argument('--output', '-o', default=None, help='output file (default: stdout)')
+    generate.set_defaults(run=run_generate)
+
+    solve = commands.add_parser('solve', help='solve puzzles, one per line')
+    solve.add_argument('puzzles', nargs='*', default=['-'], help="puzzle files, '-' for stdin (default)")
+    solve.add_argument('--engine', choices=('greedy', 'dlx'), default='greedy')
+    solve.add_argument('--format', choices=FORMATS, default='text')
+    solve.add_argument('--output', '-o', default=None, help='output file (default: stdout)')
+    solve.set_defaults(run=run_solve)
+
+    validate = commands.add_parser('validate', help='print the invalid records of grid or puzzle files (needs NumPy)')
+    validate.add_argument('paths', nargs='+', help='text files with one record per line, or corpus files')
+    validate.add_argument('--puzzles', action='store_true', help='records may have blanks; check only the givens')
+    validate.add_argument('--size', type=int, default=None, help='expected size (default: the most common one)')
+    validate.add_argument('--chunk', type=int, default=1 << 16, help='records held in memory at a time')
+    validate.add_argument('--format', choices=FORMATS[:2], default='text')
+    validate.add_argument('--output', '-o', default=None, help='output file (default: stdout)')
+    validate.set_defaults(run=run_validate)
+
+    timing = commands.add_parser('bench', help='time construction, filling, validation and solving')
+    timing.add_argument('--sizes', type=int, nargs='+', default=[4, 9, 16, 25])
+    timing.add_argument('--engines', nargs='+', choices=('greedy', 'dlx'), default=['greedy', 'dlx'])
+    timing.add_argument('--count', type=int, default=None, help='boards per size (default depends on size)')
+    timing.add_argument('--seed', type=int, default=2024)
+    timing.add_argument('--holes', type=float, default=0.5, help='share of cells blanked for the solve phase')
+    timing.add_argument('--policy', choices=('chronological', 'geometric', 'luby', 'backjump', 'luby+backjump'),
+                        default=None, help='search policy for the greedy engine (default depends on size)')
+    timing.add_argument('--budget', action='store_true', help='fail when a fill is over its time budget')
+    timing.add_argument('--format', choices=FORMATS[:2], default='text')
+    timing.add_argument('--output', '-o', default=None, help='output file (default: stdout)')
+    timing.set_defaults(run=run_bench)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.format == 'packed' and not args.output:
+        parser.error('--format packed needs --output: a corpus file gets its record count written when closed.')
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # the reader went away early, as with `| head`; keep the exit quiet
+        import os
+
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
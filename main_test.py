@@ -0,0 +1,133 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from unittest import mock
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import render
+except ImportError:  # turtle needs tkinter
+    render = None
+
+import batch
+import main
+from board import Board
+from corpus import CorpusReader
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PUZZLE = '530070000600195000098000060800060003400803001700020006060000280000419005000080079'
+SOLUTION = '534678912672195348198342567859761423426853791713924856961537284287419635345286179'
+
+
+def run(*argv, stdin=''):
+    out = StringIO()
+    with redirect_stdout(out), redirect_stderr(StringIO()), mock.patch.object(sys, 'stdin', StringIO(stdin)):
+        status = main.main(list(argv))
+    return status, out.getvalue()
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def test_generate_text_matches_batch(self):
+        status, out = run('generate', '5', '--size', '4', '--seed', '3', '--chunk', '2')
+        self.assertEqual(0, status)
+        self.assertListEqual(list(batch.generate(5, 4, workers=1, seed=3, chunk_size=2)), out.splitlines())
+
+    def test_generate_puzzles_as_jsonl(self):
+        status, out = run('generate', '2', '--puzzles', '--seed', '1', '--format', 'jsonl')
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(2, len(records))
+        for record in records:
+            self.assertEqual(9, record['size'])
+            self.assertTrue(Board.from_string(record['solution']).validate())
+            board = Board.from_string(record['puzzle'])
+            self.assertTrue(board.solve())
+            self.assertEqual(record['solution'], board.to_string())
+
+    def test_generate_packed_needs_output(self):
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            main.main(['generate', '1', '--format', 'packed'])
+
+    def test_generate_packed(self):
+        path = self.path('grids.sdk')
+        run('generate', '4', '--size', '6', '--seed', '2', '--format', 'packed', '--output', path)
+        _, text = run('generate', '4', '--size', '6', '--seed', '2')
+        with CorpusReader(path) as corpus:
+            self.assertEqual(4, len(corpus))
+            self.assertListEqual(text.splitlines(), [corpus.board(i).to_string() for i in range(4)])
+
+    def test_solve_reads_stdin(self):
+        status, out = run('solve', stdin=f'{PUZZLE}\n12..' '..3.' '....' '...3\n')
+        self.assertEqual(0, status)
+        self.assertListEqual([SOLUTION, ''], out.splitlines())
+
+    def test_solve_survives_malformed_lines(self):
+        status, out = run('solve', '--format', 'jsonl', stdin=f'1234\n{PUZZLE}\n')
+        self.assertEqual(0, status)
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual({'puzzle': '1234', 'solution': None}, records[0])
+        self.assertEqual(SOLUTION, records[1]['solution'])
+
+    def test_solve_jsonl_and_packed(self):
+        path = self.path('puzzles.txt')
+        with open(path, 'w') as f:
+            f.write(f'{PUZZLE}\n12..' '..3.' '....' '...3\n')
+        _, out = run('solve', path, '--format', 'jsonl', '--engine', 'dlx')
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual({'puzzle': PUZZLE, 'solution': SOLUTION}, records[0])
+        self.assertIsNone(records[1]['solution'])
+        packed = self.path('solutions.sdk')
+        run('solve', path, '--format', 'packed', '-o', packed)
+        with CorpusReader(packed) as corpus:
+            self.assertEqual(1, len(corpus))
+            self.assertEqual(SOLUTION, corpus.board(0).to_string())
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_validate_reports_invalid_records(self):
+        path = self.path('grids.txt')
+        with open(path, 'w') as f:
+            f.write(f'{SOLUTION}\n{SOLUTION[1:]}1\n')
+        status, out = run('validate', path)
+        self.assertEqual(1, status)
+        self.assertEqual(f'{path}:1\n', out)
+        status, out = run('validate', path, '--format', 'jsonl')
+        self.assertEqual({'path': path, 'record': 1}, json.loads(out))
+
+    def test_bench_jsonl(self):
+        _, out = run('bench', '--sizes', '4', '--engines', 'greedy', '--count', '2', '--format', 'jsonl')
+        phases = [json.loads(line)['phase'] for line in out.splitlines()]
+        self.assertListEqual(['construct', 'fill', 'validate', 'solve'], phases)
+
+    @unittest.skipIf(render is None, 'turtle graphics are not available')
+    def test_gui_draws_the_grids_it_prints(self):
+        with mock.patch.object(render, 'Screen') as screen, mock.patch.object(render, 'Turtle', side_effect=mock.Mock):
+            screen.return_value.window_width.return_value = 1000
+            screen.return_value.window_height.return_value = 1000
+            _, out = run('generate', '2', '--size', '4', '--seed', '5', '--gui', '--fps', '0')
+            self.assertGreater(screen.return_value.update.call_count, 0)
+        self.assertEqual(run('generate', '2', '--size', '4', '--seed', '5')[1], out)
+
+    def test_startup_imports_nothing_heavy(self):
+        code = ("import sys, main; main.build_parser().parse_args(['generate', '1']); "
+                "print(sorted(m for m in ('board', 'numpy', 'turtle', 'tkinter', 'json') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True, check=True)
+        self.assertEqual('[]', result.stdout.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
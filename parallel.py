@@ -0,0 +1,213 @@
+"""`Board.fill` backend that explores first-branch choices in worker processes.
+
+The board is split into branches as `Board.fill` hands it over: a
+branch fixes the value of the most constrained cell, and branches are
+split again until there are enough for every worker. The branches partition the search, so
+the board has no solution exactly when every branch fails. Each worker
+gets `Board.snapshot` of the split point plus its share of branches,
+restores that onto a board of its own and fills it. The first completed
+grid wins and the other workers are terminated.
+
+    board = Board.from_string(puzzle, ParallelFill(workers=8))
+    board.solve()
+
+Splitting only pays for boards whose single fill takes seconds, e.g.
+half-blank 25x25 puzzles; `python parallel.py --size 25` compares it with
+the serial fill on the same puzzles.
+"""
+from __future__ import annotations
+from typing import List, Optional, Sequence, Tuple
+from collections import deque
+from random import Random
+import multiprocessing
+import os
+import queue
+import traceback
+from board import Board
+from structures import OutOfOptions, to_values
+
+Branch = List[Tuple[int, int]]  # (cell index, value) assignments
+Snapshot = Tuple[Sequence[int], Sequence[int]]
+
+
+def _apply(board: Board, branch: Branch) -> None:
+    for index, value in branch:
+        board.cells[index].value = value
+    board.propagate()
+
+
+def split(board: Board, count: int) -> List[Branch]:
+    """At least `count` branches below the current state of `board`, if there are that many.
+
+    The board itself is used to test each branch and is rolled back
+    afterwards. An empty list means the board has no solution; a single
+    empty branch means it needs no search at all.
+    """
+    mark = board.checkpoint()
+    frontier = deque([[]])
+    try:
+        while frontier and len(frontier) < count:
+            branch = frontier.popleft()
+            _apply(board, branch)
+            cell = board.least_free
+            if cell is None:  # the branch is already a complete grid
+                frontier.appendleft(branch)
+                break
+            values = to_values(cell.mask)
+            board.rng.shuffle(values)
+            inner = board.checkpoint()
+            for value in values:
+                try:
+                    _apply(board, [(cell.index, value)])
+                    frontier.append(branch + [(cell.index, value)])
+                except OutOfOptions:
+                    pass
+                board.rollback_to(inner)
+            board.rollback_to(mark)
+    finally:
+        board.rollback_to(mark)
+    return list(frontier)
+
+
+def search(size: int, snapshot: Snapshot, branches: List[Branch], seed: int, exhaustive: bool) -> Optional[Tuple[List[int], int]]:
+    """Fill the snapshot below each branch in turn; (values, backtracks) of the first grid, or None."""
+    board = Board(size, rng=Random(seed))
+    board.restore(snapshot)
+    try:
+        board.propagate()
+    except OutOfOptions:
+        return None
+    start = board.checkpoint()
+    for branch in branches:
+        board.rollback_to(start)
+        try:
+            for index, value in branch:
+                board.cells[index].value = value
+            board.fill(exhaustive)
+        except OutOfOptions:
+            continue
+        return [cell.value for cell in board.cells], board.backtracks
+    return None
+
+
+def _worker(results, number: int, *task) -> None:
+    try:
+        results.put((number, 'done', search(*task)))
+    except BaseException:
+        results.put((number, 'error', traceback.format_exc()))
+
+
+class ParallelFill:
+    """Fills a board by racing branches of its search in `workers` processes.
+
+    Workers fill exhaustively by default, so a failed branch really has no
+    solution; that also makes `solve` with this backend exact. A worker
+    killed before it reports, by the OOM killer for instance, leaves its
+    branches unexplored: unless another worker finds a grid, the fill
+    raises RuntimeError rather than claiming there is no solution.
+    """
+
+    # seconds between checks for workers that died without a result
+    poll = 0.1
+
+    def __init__(
+            self,
+            workers: Optional[int] = None,
+            rng: Optional[Random] = None,
+            exhaustive: bool = True,
+            branches_per_worker: int = 1,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.rng = rng if rng is not None else Random()
+        self.exhaustive = exhaustive
+        self.branches_per_worker = branches_per_worker
+
+    def fill(self, board: Board) -> None:
+        # no propagation here: cells it assigned would be missing from board.history,
+        # and each worker propagates the snapshot on its own board anyway
+        branches = split(board, self.workers * self.branches_per_worker)
+        if not branches:
+            raise OutOfOptions('Board has no solution.')
+        snapshot = board.snapshot()
+        workers = min(self.workers, len(branches))
+        tasks = [
+            (board.size, snapshot, branches[w::workers], self.rng.getrandbits(64), self.exhaustive)
+            for w in range(workers)
+        ]
+        if workers == 1:
+            found = search(*tasks[0])
+        else:
+            found = self._race(tasks)
+        if found is None:
+            raise OutOfOptions('Board has no solution.')
+        values, backtracks = found
+        for cell, value in zip(board.cells, values):
+            if cell.value is None:
+                board.history.append(cell)
+                cell.value = value
+        board.backtracks += backtracks
+
+    @classmethod
+    def _race(cls, tasks: List[tuple]) -> Optional[Tuple[List[int], int]]:
+        """Run every task in its own process; the first grid found ends all of them."""
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        processes = [context.Process(target=_worker, args=(results, number, *task), daemon=True)
+                     for number, task in enumerate(tasks)]
+        for process in processes:
+            process.start()
+        pending = set(range(len(processes)))
+        died = []
+        try:
+            while pending:
+                try:
+                    number, kind, found = results.get(timeout=cls.poll)
+                except queue.Empty:
+                    # a worker that exited normally has reported; one that was killed never will
+                    for number in sorted(pending):
+                        if processes[number].exitcode not in (None, 0):
+                            pending.discard(number)
+                            died.append(f'worker {number} (exit code {processes[number].exitcode})')
+                    continue
+                pending.discard(number)
+                if kind == 'error':
+                    raise RuntimeError(f'A fill worker failed:\n{found}')
+                if found is not None:
+                    return found
+            if died:
+                raise RuntimeError(f'Fill workers died before reporting a result: {", ".join(died)}.')
+            return None
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    from time import perf_counter
+
+    parser = ArgumentParser(description='Compare serial and parallel solving of the same puzzles.')
+    parser.add_argument('--size', type=int, default=25)
+    parser.add_argument('--count', type=int, default=5)
+    parser.add_argument('--holes', type=float, default=0.5, help='share of cells blanked in each puzzle')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args()
+
+    rng = Random(args.seed)
+    for number in range(args.count):
+        grid = Board(args.size, rng=rng)
+        grid.fill()
+        puzzle = [None if rng.random() < args.holes else cell.value for cell in grid.cells]
+        times = []
+        for backend in (None, ParallelFill(args.workers, Random(args.seed))):
+            board = Board(args.size, backend, Random(args.seed))
+            board.set_givens(puzzle)
+            start = perf_counter()
+            solved = board.solve()
+            times.append(perf_counter() - start)
+            assert solved and board.validate()
+        print(f'puzzle {number}: serial {times[0]:8.2f}s  parallel {times[1]:8.2f}s')
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import signal
+import unittest
+from random import Random
+from unittest import mock
+
+import parallel
+from board import Board
+from board_test import PUZZLE, SOLUTION
+
+
+def killed(size, snapshot, branches, seed, exhaustive):
+    if seed:
+        os.kill(os.getpid(), signal.SIGKILL)
+    return None
+
+
+class TestParallelFill(unittest.TestCase):
+    def test_branches_partition_the_search(self):
+        b = Board(9, rng=Random(1))
+        b.set_givens([int(v) for v in SOLUTION[:9]])
+        before = b.snapshot()
+        branches = parallel.split(b, 4)
+        self.assertGreaterEqual(len(branches), 4)
+        self.assertEqual(before, b.snapshot())
+        self.assertEqual(1, len({branch[0][0] for branch in branches}))
+        # distinct branches, each of them consistent with the givens
+        self.assertEqual(len(branches), len({tuple(branch) for branch in branches}))
+        for branch in branches:
+            board = Board(9)
+            board.restore(before)
+            parallel._apply(board, branch)
+
+    def test_split_of_complete_board_needs_no_search(self):
+        b = Board.from_string(SOLUTION)
+        self.assertListEqual([[]], parallel.split(b, 4))
+
+    def test_solves_puzzle_across_workers(self):
+        b = Board.from_string(PUZZLE, parallel.ParallelFill(workers=3, rng=Random(2)))
+        self.assertTrue(b.solve())
+        self.assertEqual(SOLUTION, b.to_string())
+
+    def test_fills_empty_board(self):
+        b = Board(16, parallel.ParallelFill(workers=2, rng=Random(3)), Random(3))
+        b.fill()
+        self.assertTrue(b.validate())
+        self.assertEqual(256, b.filled_cells)
+
+    def test_every_filled_cell_is_in_history(self):
+        b = Board.from_string(PUZZLE, parallel.ParallelFill(workers=2, rng=Random(5)))
+        blanks = 81 - b.filled_cells
+        b.fill()
+        self.assertEqual(SOLUTION, b.to_string())
+        self.assertEqual(blanks, len(b.history))
+
+    def test_single_worker_fills_in_process(self):
+        b = Board(9, parallel.ParallelFill(workers=1, rng=Random(4)))
+        b.fill()
+        self.assertTrue(b.validate())
+
+    def test_reports_unsolvable_puzzle(self):
+        # 3 and 4 both have to go into cell 3 of the first row
+        b = Board.from_string('1...' '..34' '....' '....', parallel.ParallelFill(workers=2))
+        self.assertFalse(b.solve())
+        b = Board.from_string('12..' '..3.' '....' '...3', parallel.ParallelFill(workers=2))
+        self.assertFalse(b.solve())
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', 'the patched search reaches forked workers only')
+    def test_killed_worker_is_a_failure_not_an_unsolvable_board(self):
+        tasks = [(4, None, [], 0, True), (4, None, [], 1, True)]
+        with mock.patch.object(parallel, 'search', killed):
+            with self.assertRaisesRegex(RuntimeError, 'worker 1'):
+                parallel.ParallelFill._race(tasks)
@@ -0,0 +1,98 @@
+"""Search policies for `Board.fill`: when to restart and how far to backtrack.
+
+A policy combines a restart schedule with a backtracking rule. Without
+restarts, one unlucky early choice can keep a fill busy in a dead region
+for a long time. A cutoff, counted in backtracks, bounds every run: when
+the run overshoots, the fill goes back to the givens and starts again
+with fresh random choices and the next cutoff of the schedule. The
+geometric schedule doubles its cutoff every time; the Luby schedule
+(1, 1, 2, 1, 1, 2, 4, ...) times `unit` keeps most runs short but still
+grows without bound, so every fill completes.
+
+Backjumping replaces chronological backtracking: after a failure the
+fill takes back every choice up to the most recent one that actually
+took part in the conflict, instead of trying new values on the choices
+in between.
+
+    board.fill(policy='luby+backjump')
+    board.solve(policy=SearchPolicy('custom', restarts='luby', unit=20))
+"""
+from __future__ import annotations
+from typing import Dict, Iterator, Optional, Union
+
+
+def luby(i: int) -> int:
+    """Term `i` (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class SearchPolicy:
+    """A restart schedule ('geometric', 'luby' or None) and a backtracking rule.
+
+    With `shuffle_ties`, the fill picks at random among equally constrained
+    cells instead of by position. Position order suits generating large
+    grids from an empty board; random order makes the restarts of a hard
+    puzzle explore differently shaped trees.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            restarts: Optional[str] = None,
+            unit: int = 100,
+            backjump: bool = False,
+            shuffle_ties: bool = False,
+    ) -> None:
+        if restarts not in (None, 'geometric', 'luby'):
+            raise ValueError(f"Unknown restart schedule {restarts!r}, expected 'geometric', 'luby' or None.")
+        self.name = name
+        self.restarts = restarts
+        self.unit = unit
+        self.backjump = backjump
+        self.shuffle_ties = shuffle_ties
+
+    def cutoffs(self) -> Iterator[Optional[int]]:
+        """Backtracks allowed to each run; None means the run is never cut off."""
+        run = 1
+        while True:
+            if self.restarts == 'geometric':
+                yield self.unit << (run - 1)
+            elif self.restarts == 'luby':
+                yield self.unit * luby(run)
+            else:
+                yield None
+            run += 1
+
+    def __repr__(self) -> str:
+        return (
+            f'SearchPolicy({self.name!r}, restarts={self.restarts!r}, unit={self.unit}, '
+            f'backjump={self.backjump}, shuffle_ties={self.shuffle_ties})'
+        )
+
+
+POLICIES: Dict[str, SearchPolicy] = {
+    policy.name: policy
+    for policy in (
+        SearchPolicy('chronological'),
+        SearchPolicy('geometric', restarts='geometric', unit=1000),
+        SearchPolicy('luby', restarts='luby', unit=100, shuffle_ties=True),
+        SearchPolicy('backjump', backjump=True),
+        SearchPolicy('luby+backjump', restarts='luby', unit=100, backjump=True, shuffle_ties=True),
+    )
+}
+
+
+def get_policy(policy: Union[str, SearchPolicy]) -> SearchPolicy:
+    if isinstance(policy, SearchPolicy):
+        return policy
+    if policy not in POLICIES:
+        raise ValueError(f'Unknown search policy {policy!r}, expected one of {tuple(POLICIES)}.')
+    return POLICIES[policy]
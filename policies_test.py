@@ -0,0 +1,83 @@
+import unittest
+from random import Random
+
+import policies
+from board import Board
+from board_test import PUZZLE, SOLUTION
+from stats import SearchStats
+
+
+class TestPolicies(unittest.TestCase):
+    def test_luby_sequence(self):
+        self.assertListEqual([1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, 1], [policies.luby(i) for i in range(1, 17)])
+
+    def test_cutoff_schedules(self):
+        def first(policy, n=7):
+            cutoffs = policy.cutoffs()
+            return [next(cutoffs) for _ in range(n)]
+        self.assertListEqual([None] * 3, first(policies.POLICIES['chronological'], 3))
+        self.assertListEqual([10, 20, 40, 80], first(policies.SearchPolicy('g', 'geometric', 10), 4))
+        self.assertListEqual([5, 5, 10, 5, 5, 10, 20], first(policies.SearchPolicy('l', 'luby', 5)))
+
+    def test_policies_are_looked_up_by_name(self):
+        self.assertIs(policies.POLICIES['luby'], policies.get_policy('luby'))
+        custom = policies.SearchPolicy('custom', backjump=True)
+        self.assertIs(custom, policies.get_policy(custom))
+        with self.assertRaises(ValueError):
+            policies.get_policy('magic')
+        with self.assertRaises(ValueError):
+            policies.SearchPolicy('bad', restarts='fibonacci')
+
+
+class TestFillWithPolicies(unittest.TestCase):
+    def test_every_policy_solves_puzzle(self):
+        for name in policies.POLICIES:
+            b = Board.from_string(PUZZLE, rng=Random(1))
+            self.assertTrue(b.solve(policy=name), name)
+            self.assertEqual(SOLUTION, b.to_string(), name)
+
+    def test_every_policy_fills_empty_boards(self):
+        for name in policies.POLICIES:
+            for size in (9, 16):
+                b = Board(size, rng=Random(size))
+                b.fill(policy=name)
+                self.assertTrue(b.validate(), (name, size))
+
+    def test_every_policy_reports_unsolvable_puzzle(self):
+        for name in policies.POLICIES:
+            b = Board.from_string('12..' '..3.' '....' '...3')
+            self.assertFalse(b.solve(policy=name), name)
+
+    def test_backjumping_matches_exhaustive_search_on_hard_puzzles(self):
+        rng = Random(5)
+        for n in range(10):
+            grid = Board(9, rng=rng)
+            grid.fill()
+            givens = [None if rng.random() < 0.72 else cell.value for cell in grid.cells]
+            chronological = Board(9, rng=Random(n))
+            chronological.set_givens(givens)
+            backjumping = Board(9, rng=Random(n))
+            backjumping.set_givens(givens)
+            self.assertEqual(chronological.solve(), backjumping.solve(policy='backjump'))
+            self.assertTrue(backjumping.validate())
+            for cell, given in zip(backjumping.cells, givens):
+                if given is not None:
+                    self.assertEqual(given, cell.value)
+
+    def test_policy_and_jumps_are_reported_in_stats(self):
+        stats = SearchStats()
+        b = Board(16, rng=Random(3), stats=stats)
+        b.fill(policy='luby+backjump')
+        report = stats.as_dict()
+        self.assertEqual('luby+backjump', report['policy'])
+        self.assertGreaterEqual(report['backjumps'], 0)
+        b.reset()
+        b.policy = 'geometric'
+        b.fill()
+        self.assertEqual('geometric', stats.policy)
+
+    def test_luby_restarts_from_the_givens(self):
+        b = Board(16, rng=Random(2))
+        b.fill(policy=policies.SearchPolicy('tiny', 'luby', unit=1))
+        self.assertTrue(b.validate())
+        self.assertGreater(b.restarts, 0)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from itertools import islice
+from random import Random
+from board import Board
+from dlx import DancingLinks
+from structures import OutOfOptions
+
+
+def _rotational(index: int, size: int) -> List[int]:
+    return [index, size * size - 1 - index]
+
+
+def _horizontal(index: int, size: int) -> List[int]:
+    row, col = divmod(index, size)
+    return [index, row * size + size - 1 - col]
+
+
+def _vertical(index: int, size: int) -> List[int]:
+    row, col = divmod(index, size)
+    return [index, (size - 1 - row) * size + col]
+
+
+def _diagonal(index: int, size: int) -> List[int]:
+    row, col = divmod(index, size)
+    return [index, col * size + row]
+
+
+SYMMETRIES: Dict[str, Callable[[int, int], List[int]]] = {
+    'none': lambda index, size: [index],
+    'rotational': _rotational,
+    'horizontal': _horizontal,
+    'vertical': _vertical,
+    'diagonal': _diagonal,
+}
+
+
+def count_solutions(board: Board, limit: int = 2) -> int:
+    """Number of completions of `board`, counting no further than `limit`."""
+    return sum(1 for _ in islice(DancingLinks().solutions(board), limit))
+
+
+class UniquenessChecker:
+    """Tells whether a puzzle obtained by removing clues still has one solution.
+
+    The grid being carved is a known solution, and the puzzle before a
+    removal was unique. Any other solution must therefore differ from the
+    grid in one of the removed cells, so the checker looks for a single
+    completion in which the first removed cell that differs takes another
+    value. It stops at the first one it finds.
+
+    One work board holds the current clues, each placed and propagated on
+    the undo trail in turn, those to be tried first (`order`) on top. A
+    check rolls back to just below the removed clues and puts back the
+    few above them, each branch rolls back to that point, and a rejected
+    removal only places the removed clues again. The board is rebuilt
+    only when the clues passed in are not the ones it holds.
+    """
+
+    def __init__(self, solution: Board, rng: Optional[Random] = None, order: Sequence[int] = ()) -> None:
+        self.solution = [cell.value for cell in solution.cells]
+        self.work = Board(solution.size, rng=rng)
+        self.rank = {index: i for i, index in enumerate(order)}
+        self.stack: List[Tuple[int, int]] = []  # placed clues from the bottom, with the trail mark before each
+        self.placed: Set[int] = set()
+        self.checks = 0
+        self.rebuilds = 0
+
+    def _place(self, index: int) -> None:
+        mark = self.work.checkpoint()
+        self.work.cells[index].value = self.solution[index]
+        self.work.propagate()
+        self.stack.append((index, mark))
+        self.placed.add(index)
+
+    def _rebuild(self, clues: Dict[int, int]) -> None:
+        self.rebuilds += 1
+        self.work.reset()
+        self.stack = []
+        self.placed = set()
+        last = len(self.rank)
+        for index in sorted(clues, key=lambda i: -self.rank.get(i, last)):
+            self._place(index)
+
+    def _take_off(self, removed: Set[int]) -> None:
+        """Roll back to below the lowest clue in `removed` and place again the other clues above it."""
+        depth = next((d for d, (index, _) in enumerate(self.stack) if index in removed), None)
+        if depth is None:
+            return
+        above = [index for index, _ in self.stack[depth:] if index not in removed]
+        self.work.rollback_to(self.stack[depth][1])
+        for index, _ in self.stack[depth:]:
+            self.placed.discard(index)
+        del self.stack[depth:]
+        for index in above:
+            self._place(index)
+
+    def is_unique_without(self, clues: Dict[int, int], removed: List[int]) -> bool:
+        """True if `clues` minus the cells in `removed` still has a single solution.
+
+        Afterwards the work board holds `clues` without `removed` when the
+        answer is True and all of `clues` otherwise, which is what the next
+        check of `make_puzzle` starts from.
+        """
+        self.checks += 1
+        if self.placed != clues.keys():
+            self._rebuild(clues)
+        self._take_off(set(removed))
+        work = self.work
+        base = work.checkpoint()
+        unique = True
+        for i, index in enumerate(removed):
+            work.rollback_to(base)
+            try:
+                for same in removed[:i]:
+                    if work.cells[same].value is None:
+                        work.cells[same].value = self.solution[same]
+                if work.cells[index].value is not None:
+                    continue  # forced by the clues that stay
+                work.cells[index].reduce(self.solution[index])
+            except OutOfOptions:
+                continue
+            if work.solve():
+                unique = False
+                break
+        work.rollback_to(base)
+        if not unique:
+            for index in removed:
+                if index in clues:
+                    self._place(index)
+        return unique
+
+
+def make_puzzle(
+        solution: Board,
+        target_clues: Optional[int] = None,
+        symmetry: str = 'none',
+        rng: Optional[Random] = None,
+) -> Board:
+    """Remove clues from the filled `solution` while its solution stays unique.
+
+    Cells are tried in random order, together with their mirror images for
+    the chosen `symmetry`. Removal stops once `target_clues` is reached; by
+    default it goes on until no further clue can be removed.
+    """
+    if symmetry not in SYMMETRIES:
+        raise ValueError(f'Unknown symmetry {symmetry!r}, expected one of {tuple(SYMMETRIES)}.')
+    if any(cell.value is None for cell in solution.cells):
+        raise ValueError('Puzzle generation needs a completely filled board.')
+    rng = rng if rng is not None else Random()
+    size = solution.size
+    clues = {cell.index: cell.value for cell in solution.cells}
+    order = list(clues)
+    rng.shuffle(order)
+    orbit = SYMMETRIES[symmetry]
+    # every orbit kept together, in the order its cells come up, so a removal takes off neighbouring clues
+    layout = list(dict.fromkeys(i for index in order for i in orbit(index, size)))
+    checker = UniquenessChecker(solution, rng, layout)
+    for index in order:
+        if target_clues is not None and len(clues) <= target_clues:
+            break
+        group = [i for i in dict.fromkeys(orbit(index, size)) if i in clues]
+        if not group:
+            continue
+        if target_clues is not None and len(clues) - len(group) < target_clues:
+            continue
+        if checker.is_unique_without(clues, group):
+            for i in group:
+                del clues[i]
+    puzzle = Board(size, rng=rng)
+    puzzle.set_givens([clues.get(i) for i in range(size * size)])
+    return puzzle
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    import sys
+
+    parser = ArgumentParser(description='Generate puzzles with a unique solution, one per line.')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--clues', type=int, default=None, help='target number of clues')
+    parser.add_argument('--symmetry', choices=tuple(SYMMETRIES), default='none')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    master = Random(args.seed)
+    for _ in range(args.count):
+        grid = Board(args.size, rng=master)
+        grid.fill()
+        sys.stdout.write(make_puzzle(grid, args.clues, args.symmetry, master).to_string() + '\n')
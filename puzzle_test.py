@@ -0,0 +1,58 @@
+import unittest
+from random import Random
+
+import board
+import puzzle
+
+
+class TestPuzzle(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rng = Random(4)
+        self.grid = board.Board(9, rng=self.rng)
+        self.grid.fill()
+
+    def test_puzzle_has_unique_solution_matching_grid(self):
+        p = puzzle.make_puzzle(self.grid, rng=self.rng)
+        self.assertLess(p.filled_cells, 81)
+        self.assertEqual(1, puzzle.count_solutions(p))
+        self.assertTrue(p.solve())
+        self.assertEqual(self.grid.to_string(), p.to_string())
+
+    def test_stops_at_target_clue_count(self):
+        p = puzzle.make_puzzle(self.grid, target_clues=40, rng=self.rng)
+        self.assertEqual(40, p.filled_cells)
+
+    def test_rotational_symmetry_keeps_mirrored_clues(self):
+        p = puzzle.make_puzzle(self.grid, symmetry='rotational', rng=self.rng)
+        for cell in p.cells:
+            mirrored = p.cells[80 - cell.index]
+            self.assertEqual(cell.value is None, mirrored.value is None)
+
+    def test_counting_stops_at_limit(self):
+        self.assertEqual(2, puzzle.count_solutions(board.Board(4), limit=2))
+
+    def test_checker_sees_second_solution(self):
+        checker = puzzle.UniquenessChecker(self.grid)
+        clues = {cell.index: cell.value for cell in self.grid.cells}
+        self.assertTrue(checker.is_unique_without(clues, [0]))
+        self.assertFalse(checker.is_unique_without({}, [0]))
+
+    def test_checker_keeps_its_board_between_removals(self):
+        clues = {cell.index: cell.value for cell in self.grid.cells}
+        order = list(clues)
+        self.rng.shuffle(order)
+        checker = puzzle.UniquenessChecker(self.grid, Random(1), order)
+        for index in order:
+            unique = checker.is_unique_without(clues, [index])
+            self.assertEqual(puzzle.UniquenessChecker(self.grid).is_unique_without(clues, [index]), unique)
+            if unique:
+                del clues[index]
+        self.assertEqual(1, checker.rebuilds)
+        self.assertEqual(81, checker.checks)
+        p = board.Board(9)
+        p.set_givens([clues.get(i) for i in range(81)])
+        self.assertEqual(1, puzzle.count_solutions(p))
+
+    def test_rejects_unfilled_board(self):
+        with self.assertRaises(ValueError):
+            puzzle.make_puzzle(board.Board(4))
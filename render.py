@@ -0,0 +1,248 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, TYPE_CHECKING
+from time import perf_counter, sleep
+from turtle import Turtle, Screen
+from steps import TraceReader, replay_frames
+from structures import Cell, CellObserver
+
+if TYPE_CHECKING:
+    from board import Board
+
+BACKGROUND = "white"
+
+
+class TurtleRenderer(CellObserver):
+    """Draws a board on a turtle screen in batched frames.
+
+    Nothing here is imported or created by `Board` itself; attach a renderer
+    with `Board.attach` only when the board should be visible.
+
+    A cell change only marks the cell dirty. Dirty cells are drawn at most
+    `fps` times a second, or with `fps=None` only when a fill ends, so a
+    value that is set and rolled back between two frames is never drawn.
+    Screen updates stay off except for one `update` per frame, and all
+    values are drawn by one shared pen: a changed cell is painted over and
+    rewritten. Painted-over drawings stay on the canvas, so after
+    `repaint_after` cell drawings the pen starts over with the current
+    values. The grid has a turtle of its own and is drawn once per screen
+    and board size.
+    """
+
+    def __init__(self, screen_size: int = 1000, fps: Optional[float] = 10.0, repaint_after: Optional[int] = None) -> None:
+        self.screen_size = screen_size
+        self.fps = fps
+        self.repaint_after = repaint_after
+        self.board: Optional[Board] = None
+        self.screen = None
+        self.turtle: Optional[Turtle] = None  # draws the grid
+        self.pen: Optional[Turtle] = None     # draws every value
+        self.grid_size: Optional[int] = None  # size of the grid on the screen
+        self.shown: List[int] = []            # value drawn in every cell, 0 for none
+        self.dirty: Dict[int, int] = {}       # cells changed since the last frame and their values
+        self.drawings = 0
+        self.next_frame = 0.0
+        self.square_size = 0
+        self.font = ("Arial", 20, "normal")
+
+    def attach(self, board: Board) -> None:
+        self.board = board
+        if self.screen is None:
+            self.screen = self.setup_screen(self.screen_size)
+            self.screen.listen()
+            self.screen.tracer(0)
+            self.screen.onclick(self.get_cell_options_from_pos)
+            self.turtle = self.setup_turtle()
+            self.pen = self.setup_turtle()
+            self.pen.penup()
+        self.square_size = self.screen.window_width() // board.size
+        self.font = ("Arial", max(6, self.square_size // 2 - 2), "normal")
+        if self.grid_size != board.size:
+            self.turtle.clear()
+            self.draw_board()
+            self.grid_size = board.size
+        self.pen.clear()
+        self.shown = [0] * len(board.cells)
+        self.drawings = 0
+        self.dirty = {cell.index: cell.value for cell in board.cells if cell.value is not None}
+        self.flush()
+
+    def detach(self) -> None:
+        self.flush()
+        self.board = None
+
+    def cell_assigned(self, cell: Cell) -> None:
+        self.dirty[cell.index] = cell._value
+        if self.fps is not None and perf_counter() >= self.next_frame:
+            self.flush()
+
+    def cell_cleared(self, cell: Cell) -> None:
+        self.dirty[cell.index] = 0
+        if self.fps is not None and perf_counter() >= self.next_frame:
+            self.flush()
+
+    def flush(self) -> None:
+        """Draw the dirty cells whose value differs from the one shown, then update the screen once."""
+        if self.screen is None:
+            return
+        changed = [(index, value) for index, value in self.dirty.items() if self.shown[index] != value]
+        self.dirty = {}
+        if self.repaint_after is not None:
+            limit = self.repaint_after
+        else:
+            limit = 4 * len(self.shown)
+        if self.drawings + len(changed) > limit:
+            for index, value in changed:
+                self.shown[index] = value
+            self.repaint()
+        else:
+            for index, value in changed:
+                self.draw_cell(index, value, self.shown[index] != 0)
+                self.shown[index] = value
+            self.drawings += len(changed)
+        self.screen.update()
+        if self.fps:
+            self.next_frame = perf_counter() + 1.0 / self.fps
+
+    def repaint(self) -> None:
+        """Drop everything the pen drew and write the shown values afresh."""
+        self.pen.clear()
+        self.drawings = 0
+        for index, value in enumerate(self.shown):
+            if value:
+                self.draw_cell(index, value, False)
+                self.drawings += 1
+
+    def draw_cell(self, index: int, value: int, covered: bool) -> None:
+        """Write `value` into cell `index`, first painting over what `covered` it."""
+        pen = self.pen
+        x, y = self.cell_index_to_pos(index, self.screen.window_width(), self.board.size)
+        if covered:
+            half = self.square_size // 2 - 4  # keeps clear of the grid lines
+            pen.goto(x - half, y - half)
+            pen.fillcolor(BACKGROUND)
+            pen.begin_fill()
+            for corner in ((x + half, y - half), (x + half, y + half), (x - half, y + half), (x - half, y - half)):
+                pen.goto(corner)
+            pen.end_fill()
+        if value:
+            pen.goto(x, y - self.font[1] * 2 // 3)
+            pen.write(value, align="center", font=self.font)
+
+    def get_cell_options_from_pos(self, x, y):
+        size = self.board.size
+        square_size = self.screen.window_width() // size
+        x_zero_start = x + self.screen.window_width() // 2
+        y_zero_start = y + self.screen.window_width() // 2
+        x_i = x_zero_start // square_size
+        y_i = abs(y_zero_start // square_size - (size - 1))
+
+        print(self.board.cells[int(y_i + x_i * size)].options)
+
+    @staticmethod
+    def cell_index_to_pos(index: int, screen_size: int, board_size: int) -> tuple:
+        square_size = screen_size // board_size
+
+        x_pos = index // board_size * square_size + square_size // 2
+        y_pos = index % board_size * square_size + square_size // 2
+
+        return x_pos - screen_size // 2, y_pos - screen_size // 2
+
+    def setup_screen(self, size: int):
+        screen = Screen()
+        screen.setup(width=size, height=size)
+        screen.bgcolor(BACKGROUND)
+        screen.title("Sudoku")
+        return screen
+
+    def setup_turtle(self):
+        turtle = Turtle()
+        turtle.hideturtle()
+        turtle.speed(0)
+        return turtle
+
+    @staticmethod
+    def draw_line(t: Turtle, start: tuple, end: tuple, is_bold=False):
+        t.penup()
+        t.goto(*start)
+        t.pendown()
+        if is_bold:
+            t.pensize(5)
+            t.color("red")
+        t.goto(*end)
+        t.penup()
+        t.pensize(1)
+        t.color("black")
+
+    def draw_board(self):
+        size = self.board.size
+        square_width = self.screen.window_width() // size
+        square_height = self.screen.window_height() // size
+
+        screen_x_right_border = self.screen.window_width() // 2
+        screen_x_left_border = -1 * screen_x_right_border
+
+        screen_y_upper_border = self.screen.window_height() // 2
+        screen_y_down_border = -1 * screen_y_upper_border
+
+        # cells are laid out with board rows along x and columns along y,
+        # so horizontal lines separate box columns and vertical ones box rows
+        n = screen_y_upper_border - square_height
+        c = 0
+        l = 0
+        bold = False
+        while size > l:
+            if c == self.board.box_cols - 1:
+                bold = True
+                c = 0
+            else:
+                c += 1
+            self.draw_line(self.turtle, (screen_x_left_border, n), (screen_x_right_border, n), bold)
+            n = n - square_height
+            bold = False
+            l += 1
+
+        c = 0
+        n = screen_x_right_border - square_width
+        bold = False
+        l = 0
+        while size > l:
+            if c == self.board.box_rows - 1:
+                bold = True
+                c = 0
+            else:
+                c += 1
+            self.draw_line(self.turtle, (n, screen_y_upper_border), (n, screen_y_down_border), bold)
+            n = n - square_width
+            bold = False
+            l += 1
+
+
+class ReplayRenderer(TurtleRenderer):
+    """Draws a recorded trace (see `steps`) frame by frame, long after the fill.
+
+    Each frame applies `steps_per_frame` steps and draws only the cells
+    whose value they changed, at most `fps` frames a second.
+    """
+
+    def __init__(self, screen_size: int = 1000, steps_per_frame: int = 50, fps: float = 30.0) -> None:
+        super().__init__(screen_size, fps=None)
+        self.steps_per_frame = steps_per_frame
+        self.frame_rate = fps
+
+    def play(self, trace: TraceReader) -> None:
+        from board import Board
+
+        board = Board(trace.size)
+        board.set_givens([value or None for value in trace.values])
+        self.attach(board)
+        frame_time = 1.0 / self.frame_rate if self.frame_rate else 0.0
+        next_frame = perf_counter()
+        for changes in replay_frames(trace, self.steps_per_frame):
+            self.dirty.update(changes)
+            self.flush()
+            next_frame += frame_time
+            delay = next_frame - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            else:
+                next_frame = perf_counter()
@@ -0,0 +1,92 @@
+import unittest
+from random import Random
+from unittest import mock
+
+try:
+    import render
+except ImportError:  # turtle needs tkinter
+    render = None
+
+import steps
+from board import Board
+
+
+@unittest.skipIf(render is None, 'turtle graphics are not available')
+class TestTurtleRenderer(unittest.TestCase):
+    def setUp(self) -> None:
+        patches = [mock.patch.object(render, 'Screen'), mock.patch.object(render, 'Turtle', side_effect=mock.Mock)]
+        self.screen = patches[0].start().return_value
+        patches[1].start()
+        for patch in patches:
+            self.addCleanup(patch.stop)
+        self.screen.window_width.return_value = 1000
+        self.screen.window_height.return_value = 1000
+
+    def writes(self, renderer):
+        return renderer.pen.write.call_count
+
+    def test_fill_is_drawn_once_at_the_end_without_frame_rate(self):
+        board = Board(16, rng=Random(2))
+        renderer = board.attach(render.TurtleRenderer(fps=None))
+        updates = self.screen.update.call_count
+        board.fill()
+        self.assertGreater(board.backtracks, 0)
+        self.assertEqual(updates + 1, self.screen.update.call_count)
+        self.assertEqual(256, self.writes(renderer))
+        self.assertListEqual([cell.value for cell in board.cells], renderer.shown)
+
+    def test_rolled_back_values_are_never_drawn(self):
+        board = Board(4, rng=Random(1))
+        renderer = board.attach(render.TurtleRenderer(fps=None))
+        mark = board.checkpoint()
+        board.fill_one()
+        board.rollback_to(mark)
+        renderer.flush()
+        self.assertEqual(0, self.writes(renderer))
+        self.assertEqual(0, renderer.pen.begin_fill.call_count)
+
+    def test_grid_is_drawn_once_per_size(self):
+        renderer = render.TurtleRenderer(fps=None)
+        board = Board(9, rng=Random(3))
+        board.attach(renderer)
+        lines = renderer.turtle.goto.call_count
+        board.fill()
+        board.reset()
+        board.detach(renderer)
+        Board(9).attach(renderer)
+        self.assertEqual(lines, renderer.turtle.goto.call_count)
+        Board(4).attach(renderer)
+        self.assertGreater(renderer.turtle.goto.call_count, lines)
+
+    def test_pen_starts_over_after_many_drawings(self):
+        board = Board(9, rng=Random(4))
+        renderer = board.attach(render.TurtleRenderer(fps=None, repaint_after=100))
+        board.fill()
+        self.assertEqual(1, renderer.pen.clear.call_count)  # on attach
+        board.reset()
+        renderer.flush()
+        self.assertEqual(2, renderer.pen.clear.call_count)
+        self.assertEqual(0, renderer.pen.begin_fill.call_count)
+        self.assertEqual(0, sum(renderer.shown))
+
+    def test_frame_rate_flushes_during_a_fill(self):
+        board = Board(9, rng=Random(5))
+        renderer = board.attach(render.TurtleRenderer(fps=1e9))
+        updates = self.screen.update.call_count
+        board.fill()
+        self.assertGreater(self.screen.update.call_count - updates, 10)
+        self.assertListEqual([cell.value for cell in board.cells], renderer.shown)
+
+    def test_replay_draws_the_recorded_grid(self):
+        board = Board(9, rng=Random(6))
+        trace = [step for step in board.iter_fill()]
+        reader = mock.Mock(size=9, values=[0] * 81)
+        reader.__iter__ = lambda _: iter(trace)
+        renderer = render.ReplayRenderer(steps_per_frame=20, fps=0)
+        renderer.play(reader)
+        self.assertListEqual([cell.value for cell in board.cells], renderer.shown)
+        self.assertEqual(len(list(steps.replay_frames(trace, 20))) + 1, self.screen.update.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
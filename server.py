@@ -0,0 +1,307 @@
+"""Local asyncio HTTP service that hands out grids and puzzles from warm pools.
+
+Every (kind, size) pool keeps between `low` and `high` items in memory.
+A request takes one item at once; whenever a pool drops below `low`, its
+refill task generates chunks in a process pool until it is back at
+`high`. A request only waits for generation when its pool is empty.
+
+    python server.py --port 8765 --pool grid:9:100:500 --pool puzzle:9:20:100
+
+    GET /grid?size=9     {"size": 9, "grid": "534678..."}
+    GET /puzzle?size=9   {"size": 9, "puzzle": "53..7....", "solution": "534678..."}
+    GET /metrics         depth, served, produced and refill rate of every pool
+
+Everything runs in this process and its workers; nothing else is needed.
+When a worker dies, the process pool is replaced. A request answers 503
+when its pool stays empty for `timeout` seconds, or at once when the pool
+is empty and its last refill failed.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor
+from functools import partial
+from random import Random
+from time import perf_counter
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import json
+import batch
+from puzzle import make_puzzle
+
+KINDS = ('grid', 'puzzle')
+
+
+def puzzle_chunk(task: Tuple[int, int, int]) -> List[Dict]:
+    """Make `count` puzzles of one size from seed `seed`; runs inside a worker process."""
+    size, count, seed = task
+    rng = Random(seed)
+    board = batch.make_board(size, 'greedy', rng)
+    items = []
+    for _ in range(count):
+        board.reset()
+        board.fill()
+        puzzle = make_puzzle(board, rng=rng)
+        items.append({'size': size, 'puzzle': puzzle.to_string(), 'solution': board.to_string()})
+    return items
+
+
+def grid_chunk(task: Tuple[int, int, int]) -> List[Dict]:
+    size, count, seed = task
+    return [{'size': size, 'grid': grid} for grid in batch.generate_chunk((size, count, seed, 'greedy'))]
+
+
+CHUNKS = {'grid': grid_chunk, 'puzzle': puzzle_chunk}
+
+
+class Workers:
+    """The process pool shared by all refills, rebuilt once one of its workers has died."""
+
+    def __init__(self, factory: Callable[[], Executor]) -> None:
+        self.factory = factory
+        self.executor = factory()
+        self.restarts = 0
+
+    def renew(self, broken: Executor) -> None:
+        """Replace `broken`, unless another refill already did."""
+        if self.executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self.factory()
+            self.restarts += 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Pool:
+    """Ready items of one kind and size, refilled between two watermarks."""
+
+    def __init__(self, kind: str, size: int, low: int, high: int, chunk: int = 16) -> None:
+        if kind not in KINDS:
+            raise ValueError(f'Unknown pool kind {kind!r}, expected one of {KINDS}.')
+        if not 0 <= low < high:
+            raise ValueError(f'Watermarks need 0 <= low < high, not {low} and {high}.')
+        self.kind = kind
+        self.size = size
+        self.low = low
+        self.high = high
+        self.chunk = chunk
+        self.items: deque = deque()
+        self.served = 0
+        self.produced = 0
+        self.waits = 0            # requests that found the pool empty
+        self.refill_seconds = 0.0  # time spent waiting on chunks
+        self.last_rate = 0.0      # items per second of the latest chunk
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.failing = False      # the latest chunk failed
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._ready = asyncio.Event()
+
+    async def get(self, timeout: Optional[float] = None) -> Dict:
+        """Take one item, waiting at most `timeout` seconds for a refill (asyncio.TimeoutError after that)."""
+        if self.items:
+            item = self.items.popleft()
+        else:
+            self.waits += 1
+            self._drained.set()
+            item = await asyncio.wait_for(self._take_when_ready(), timeout)
+        self.served += 1
+        if len(self.items) < self.low:
+            self._drained.set()
+        return item
+
+    async def _take_when_ready(self) -> Dict:
+        # all waiters wake on one chunk; checking and taking with no await in between
+        # sends those who find it empty back to waiting
+        while not self.items:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.items.popleft()
+
+    async def refill(self, workers: Workers, rng: Random) -> None:
+        """Run forever: whenever drained, generate chunks until `high` items are ready."""
+        loop = asyncio.get_running_loop()
+        make = CHUNKS[self.kind]
+        while True:
+            await self._drained.wait()
+            while len(self.items) < self.high:
+                count = min(self.chunk, self.high - len(self.items))
+                start = perf_counter()
+                executor = workers.executor
+                try:
+                    items = await loop.run_in_executor(executor, make, (self.size, count, rng.getrandbits(64)))
+                except BrokenExecutor as e:  # a worker died; every later submit to this executor fails too
+                    self.errors += 1
+                    self.last_error = repr(e)
+                    self.failing = True
+                    workers.renew(executor)
+                    await asyncio.sleep(0.1)
+                    continue
+                except Exception as e:  # a failing chunk must not stop the refills for good
+                    self.errors += 1
+                    self.last_error = repr(e)
+                    self.failing = True
+                    await asyncio.sleep(1.0)
+                    continue
+                self.failing = False
+                elapsed = perf_counter() - start
+                self.refill_seconds += elapsed
+                self.last_rate = len(items) / elapsed if elapsed else 0.0
+                self.produced += len(items)
+                self.items.extend(items)
+                self._ready.set()
+            self._drained.clear()
+
+    def metrics(self) -> Dict:
+        return {
+            'kind': self.kind,
+            'size': self.size,
+            'depth': len(self.items),
+            'low': self.low,
+            'high': self.high,
+            'served': self.served,
+            'produced': self.produced,
+            'waits': self.waits,
+            'refill_rate': self.produced / self.refill_seconds if self.refill_seconds else 0.0,
+            'last_refill_rate': self.last_rate,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
+class BoardServer:
+    """Serves the pools over HTTP/1.1, one request per connection."""
+
+    def __init__(
+            self,
+            pools: List[Pool],
+            workers: Optional[int] = None,
+            seed: Optional[int] = None,
+            timeout: float = 10.0,
+    ) -> None:
+        self.pools: Dict[Tuple[str, int], Pool] = {(pool.kind, pool.size): pool for pool in pools}
+        self.executor_factory: Callable[[], Executor] = partial(ProcessPoolExecutor, max_workers=workers)
+        self.timeout = timeout
+        self.rng = Random(seed)
+        self.workers: Optional[Workers] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.tasks: List[asyncio.Task] = []
+        self.started = perf_counter()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> int:
+        """Start refilling and listening; returns the port, useful with port 0."""
+        self.workers = Workers(self.executor_factory)
+        self.tasks = [asyncio.create_task(pool.refill(self.workers, Random(self.rng.getrandbits(64))))
+                      for pool in self.pools.values()]
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.workers is not None:
+            self.workers.shutdown()
+
+    def metrics(self) -> Dict:
+        return {
+            'uptime': perf_counter() - self.started,
+            'worker_restarts': self.workers.restarts if self.workers else 0,
+            'pools': [pool.metrics() for pool in self.pools.values()],
+        }
+
+    async def respond(self, method: str, target: str) -> Tuple[int, Dict]:
+        if method != 'GET':
+            return 405, {'error': f'Method {method} is not allowed.'}
+        url = urlsplit(target)
+        kind = url.path.strip('/')
+        if kind == 'metrics':
+            return 200, self.metrics()
+        if kind not in KINDS:
+            return 404, {'error': f'Unknown path {url.path!r}.'}
+        try:
+            size = int(parse_qs(url.query).get('size', ['9'])[0])
+        except ValueError:
+            return 400, {'error': 'size must be a number.'}
+        pool = self.pools.get((kind, size))
+        if pool is None:
+            sizes = sorted(s for k, s in self.pools if k == kind)
+            return 404, {'error': f'No {kind} pool of size {size}; sizes served: {sizes}.'}
+        if not pool.items and pool.failing:
+            return 503, {'error': f'The {kind} pool is empty and failing: {pool.last_error}'}
+        try:
+            return 200, await pool.get(self.timeout)
+        except asyncio.TimeoutError:
+            return 503, {'error': f'No {kind} was ready within {self.timeout}s.'}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass  # headers are not needed
+            parts = request.decode('latin-1').split()
+            if len(parts) != 3:
+                status, body = 400, {'error': 'Malformed request line.'}
+            else:
+                try:
+                    status, body = await self.respond(parts[0], parts[1])
+                except Exception as e:  # the client still gets an answer
+                    status, body = 500, {'error': f'Internal error: {e!r}'}
+            payload = json.dumps(body).encode()
+            writer.write(
+                f'HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n'
+                f'Connection: close\r\n\r\n'.encode() + payload
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def parse_pool(spec: str) -> Pool:
+    """A pool from 'kind:size:low:high', e.g. 'grid:9:100:500'."""
+    try:
+        kind, size, low, high = spec.split(':')
+        return Pool(kind, int(size), int(low), int(high))
+    except ValueError as e:
+        raise ValueError(f'Bad pool {spec!r}, expected kind:size:low:high. {e}')
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Serve grids and puzzles from pre-generated pools over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pool', action='append', default=None, metavar='KIND:SIZE:LOW:HIGH',
+                        help='a pool to keep warm (repeatable); default grid:9:100:500 and puzzle:9:20:100')
+    parser.add_argument('--workers', type=int, default=None, help='generator processes (default: number of CPUs)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds a request waits for an empty pool')
+    args = parser.parse_args()
+
+    async def main() -> None:
+        pools = [parse_pool(spec) for spec in args.pool or ['grid:9:100:500', 'puzzle:9:20:100']]
+        server = BoardServer(pools, args.workers, args.seed, args.timeout)
+        port = await server.start(args.host, args.port)
+        print(f'serving on http://{args.host}:{port}')
+        try:
+            await server.server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import signal
+import unittest
+
+import server
+from board import Board
+
+
+async def fetch(port: int, target: str, method: str = 'GET'):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'{method} {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+class TestPool(unittest.TestCase):
+    def test_watermarks_are_checked(self):
+        with self.assertRaises(ValueError):
+            server.Pool('grid', 9, 10, 5)
+        with self.assertRaises(ValueError):
+            server.Pool('magic', 9, 1, 5)
+        with self.assertRaises(ValueError):
+            server.parse_pool('grid:9:1')
+        pool = server.parse_pool('puzzle:4:2:8')
+        self.assertEqual(('puzzle', 4, 2, 8), (pool.kind, pool.size, pool.low, pool.high))
+
+
+class TestPoolGet(unittest.IsolatedAsyncioTestCase):
+    async def test_get_times_out_on_an_empty_pool(self):
+        pool = server.Pool('grid', 4, 1, 2)
+        with self.assertRaises(asyncio.TimeoutError):
+            await pool.get(timeout=0.05)
+
+    def test_chunks_make_valid_items(self):
+        for item in server.grid_chunk((4, 3, 1)):
+            self.assertTrue(Board.from_string(item['grid']).validate())
+        item = server.puzzle_chunk((4, 1, 2))[0]
+        puzzle = Board.from_string(item['puzzle'])
+        self.assertTrue(puzzle.solve())
+        self.assertEqual(item['solution'], puzzle.to_string())
+
+
+class TestBoardServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.grids = server.Pool('grid', 4, 2, 6, chunk=3)
+        self.puzzles = server.Pool('puzzle', 4, 1, 3)
+        self.server = server.BoardServer([self.grids, self.puzzles], workers=1, seed=1)
+        self.port = await self.server.start(port=0)
+
+    async def asyncTearDown(self) -> None:
+        await self.server.close()
+
+    async def test_serves_grids_and_puzzles(self):
+        status, body = await fetch(self.port, '/grid?size=4')
+        self.assertEqual(200, status)
+        self.assertTrue(Board.from_string(body['grid']).validate())
+        status, body = await fetch(self.port, '/puzzle?size=4')
+        self.assertEqual(200, status)
+        self.assertEqual(16, len(body['solution']))
+
+    async def wait_full(self, pool: server.Pool) -> None:
+        for _ in range(200):
+            if len(pool.items) == pool.high:
+                return
+            await asyncio.sleep(0.05)
+        self.fail(f'{pool.kind} pool was not refilled')
+
+    async def test_pool_is_refilled_up_to_high_watermark(self):
+        await self.wait_full(self.grids)
+        for _ in range(5):
+            self.assertIn('grid', await self.grids.get())
+        self.assertEqual(1, len(self.grids.items))
+        await self.wait_full(self.grids)
+        status, body = await fetch(self.port, '/metrics')
+        self.assertEqual(200, status)
+        grids = next(pool for pool in body['pools'] if pool['kind'] == 'grid')
+        self.assertEqual(5, grids['served'])
+        self.assertEqual(6, grids['depth'])
+        self.assertEqual(11, grids['produced'])
+        self.assertGreater(grids['refill_rate'], 0)
+
+    async def test_errors_are_reported(self):
+        self.assertEqual(404, (await fetch(self.port, '/grid?size=9'))[0])
+        self.assertEqual(404, (await fetch(self.port, '/solve'))[0])
+        self.assertEqual(400, (await fetch(self.port, '/grid?size=x'))[0])
+        self.assertEqual(405, (await fetch(self.port, '/grid', method='POST'))[0])
+
+    async def test_more_waiters_than_one_chunk_all_get_items(self):
+        cold = server.Pool('grid', 4, 0, 3, chunk=2)
+        cold_server = server.BoardServer([cold], workers=1, seed=2)
+        port = await cold_server.start(port=0)
+        try:
+            items = await asyncio.gather(*(cold.get(timeout=30) for _ in range(8)))
+            self.assertEqual(8, len(items))
+            self.assertTrue(all('grid' in item for item in items))
+            responses = await asyncio.gather(*(fetch(port, '/grid?size=4') for _ in range(8)))
+            self.assertListEqual([200] * 8, [status for status, _ in responses])
+        finally:
+            await cold_server.close()
+
+    async def test_unexpected_error_answers_500(self):
+        async def broken(timeout=None):
+            raise KeyError('boom')
+
+        self.grids.get = broken
+        await self.wait_full(self.grids)
+        status, body = await fetch(self.port, '/grid?size=4')
+        self.assertEqual(500, status)
+        self.assertIn('boom', body['error'])
+
+    async def test_empty_failing_pool_answers_503(self):
+        await self.wait_full(self.puzzles)
+        self.puzzles.items.clear()
+        self.puzzles.failing = True
+        self.puzzles.last_error = 'BrokenProcessPool()'
+        status, body = await fetch(self.port, '/puzzle?size=4')
+        self.assertEqual(503, status)
+        self.assertIn('BrokenProcessPool', body['error'])
+
+    async def test_pool_recovers_after_a_worker_dies(self):
+        await self.wait_full(self.grids)
+        await self.wait_full(self.puzzles)
+        broken = self.server.workers.executor
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+        for _ in range(5):
+            await self.grids.get()
+        await self.wait_full(self.grids)
+        self.assertIsNot(broken, self.server.workers.executor)
+        self.assertEqual(1, self.server.workers.restarts)
+        self.assertGreater(self.grids.errors, 0)
+        self.assertFalse(self.grids.failing)
+        status, body = await fetch(self.port, '/grid?size=4')
+        self.assertEqual(200, status)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, Optional, TextIO, Tuple
+import sys
+from board import Board
+from structures import OutOfOptions
+
+
+def solve_line(line: str, backend=None) -> Optional[str]:
+    """Solution of one puzzle in `Board.to_string` form, or None if it has none or is malformed."""
+    try:
+        board = Board.from_string(line, backend)
+    except (OutOfOptions, ValueError):  # conflicting givens, or not a puzzle at all
+        return None
+    if not board.solve():
+        return None
+    return board.to_string()
+
+
+def iter_solutions(lines: Iterable[str], backend=None) -> Iterator[Tuple[str, Optional[str]]]:
+    """Yield (puzzle, solution) for each puzzle line, skipping blank and '#' lines."""
+    for line in lines:
+        puzzle = line.strip()
+        if not puzzle or puzzle.startswith('#'):
+            continue
+        yield puzzle, solve_line(puzzle, backend)
+
+
+def solve_stream(lines: Iterable[str], out: TextIO, backend=None) -> Tuple[int, int]:
+    """Solve puzzles one per line and write one solution line per puzzle.
+
+    Lines are read and written as they go, so memory use does not depend on
+    the number of puzzles. Unsolvable puzzles produce an empty line to keep
+    output lines aligned with the puzzles. Returns (solved, unsolvable).
+    """
+    solved = unsolvable = 0
+    for _, solution in iter_solutions(lines, backend):
+        if solution is None:
+            unsolvable += 1
+            out.write('\n')
+        else:
+            solved += 1
+            out.write(solution + '\n')
+    return solved, unsolvable
+
+
+def solve_file(in_path: str, out_path: Optional[str] = None, backend=None) -> Tuple[int, int]:
+    with open(in_path) as puzzles:
+        if out_path is None:
+            return solve_stream(puzzles, sys.stdout, backend)
+        with open(out_path, 'w') as out:
+            return solve_stream(puzzles, out, backend)
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Solve puzzles from a file, one per line.')
+    parser.add_argument('puzzles', help="puzzle file, or '-' for stdin")
+    parser.add_argument('output', nargs='?', help='solution file (default: stdout)')
+    args = parser.parse_args()
+
+    if args.puzzles == '-':
+        counts = solve_stream(sys.stdin, sys.stdout)
+    else:
+        counts = solve_file(args.puzzles, args.output)
+    print(f'solved {counts[0]}, unsolvable {counts[1]}', file=sys.stderr)
@@ -0,0 +1,36 @@
+import unittest
+from io import StringIO
+
+import solver
+
+PUZZLE = '530070000600195000098000060800060003400803001700020006060000280000419005000080079'
+SOLUTION = '534678912672195348198342567859761423426853791713924856961537284287419635345286179'
+
+
+class TestSolver(unittest.TestCase):
+    def test_solves_single_line(self):
+        self.assertEqual(SOLUTION, solver.solve_line(PUZZLE))
+
+    def test_unsolvable_line_gives_none(self):
+        self.assertIsNone(solver.solve_line('12..' '..3.' '....' '...3'))
+
+    def test_stream_writes_one_line_per_puzzle(self):
+        lines = ['# comment\n', PUZZLE + '\n', '\n', '12..' '..3.' '....' '...3\n', PUZZLE + '\n']
+        out = StringIO()
+        counts = solver.solve_stream(iter(lines), out)
+        self.assertEqual((2, 1), counts)
+        self.assertListEqual([SOLUTION, '', SOLUTION], out.getvalue().split('\n')[:-1])
+
+    def test_malformed_lines_do_not_end_the_stream(self):
+        lines = [PUZZLE, '1234', 'x' * 81, PUZZLE[:40], PUZZLE]
+        out = StringIO()
+        self.assertEqual((2, 3), solver.solve_stream(iter(lines), out))
+        self.assertListEqual([SOLUTION, '', '', '', SOLUTION], out.getvalue().split('\n')[:-1])
+
+    def test_stream_is_lazy(self):
+        def lines():
+            yield PUZZLE
+            raise AssertionError('read past the first puzzle')
+
+        solutions = solver.iter_solutions(lines())
+        self.assertEqual((PUZZLE, SOLUTION), next(solutions))
@@ -0,0 +1,136 @@
+"""Search statistics for `Board.fill`, collected only when asked for.
+
+A board carries `stats = None` by default and its fill loop then runs without
+any bookkeeping. Passing a `SearchStats` (or setting `board.stats`) counts
+assignments, eliminations, failures and undo depth, and times each phase.
+
+Run `python stats.py 200 --size 16 --out boards.jsonl` to fill boards one by
+one and dump their statistics as JSON lines, slowest boards listed last on
+stdout; `--cprofile` additionally prints a cProfile report of the run.
+"""
+from __future__ import annotations
+from typing import Dict, Iterator, Optional
+from contextlib import contextmanager
+from time import perf_counter
+from random import Random
+import json
+
+
+class SearchStats:
+    def __init__(self) -> None:
+        self.assignments = 0    # values placed by the search, forced or chosen
+        self.forced = 0         # of those, hidden singles placed by propagation
+        self.eliminations = 0   # candidates removed from other cells by those values
+        self.failures = 0       # OutOfOptions raised during the search
+        self.undos = 0          # assignments taken back
+        self.max_undo_depth = 0  # most assignments taken back after a single failure
+        self.restarts = 0       # times the search started over from the givens
+        self.backjumps = 0      # choices undone without trying their other values
+        self.policy: Optional[str] = None  # name of the search policy of the last fill
+        self.times: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent inside the block to `times[name]`."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + perf_counter() - start
+
+    def assigned(self, trail_entries: int, forced: int = 0) -> None:
+        """Count one search step that wrote `trail_entries` entries to the undo trail.
+
+        A step assigns the chosen cell plus `forced` hidden singles, one trail
+        entry each; every further entry is a candidate removed from a linked cell.
+        """
+        self.assignments += 1 + forced
+        self.forced += forced
+        self.eliminations += trail_entries - 1 - forced
+
+    def failed(self, undo_depth: int) -> None:
+        self.failures += 1
+        self.undos += undo_depth
+        if undo_depth > self.max_undo_depth:
+            self.max_undo_depth = undo_depth
+
+    def as_dict(self) -> Dict:
+        return {
+            'assignments': self.assignments,
+            'forced': self.forced,
+            'eliminations': self.eliminations,
+            'failures': self.failures,
+            'undos': self.undos,
+            'max_undo_depth': self.max_undo_depth,
+            'restarts': self.restarts,
+            'backjumps': self.backjumps,
+            'policy': self.policy,
+            'times': dict(self.times),
+        }
+
+    def __repr__(self) -> str:
+        return f'SearchStats({self.as_dict()})'
+
+
+def profile_boards(count: int, size: int = 9, seed: Optional[int] = None, out=None, policy: Optional[str] = None) -> Iterator[Dict]:
+    """Fill `count` boards with statistics enabled and yield one record per board.
+
+    Each record holds the board number, its seed and the statistics, so a slow
+    board can be rebuilt with `Board(size, rng=Random(seed))` and inspected.
+    With `out`, records are also written there as JSON lines. `policy` names
+    the search policy of every fill, see `policies.POLICIES`.
+    """
+    from board import Board
+
+    master = Random(seed)
+    board = Board(size, rng=Random())
+    for number in range(count):
+        board_seed = master.getrandbits(64)
+        board.reset()
+        board.rng.seed(board_seed)  # a reset board fills exactly like a new one with this seed
+        board.stats = stats = SearchStats()
+        board.fill(policy=policy)
+        record = {'board': number, 'seed': board_seed, **stats.as_dict()}
+        if out is not None:
+            out.write(json.dumps(record) + '\n')
+        yield record
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description='Fill boards and report search statistics per board.')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--out', help='write one JSON line per board to this file')
+    parser.add_argument('--slowest', type=int, default=5, help='boards to list at the end')
+    parser.add_argument('--policy', default=None, help='search policy, e.g. luby or luby+backjump')
+    parser.add_argument('--cprofile', action='store_true', help='print a cProfile report of the run')
+    args = parser.parse_args()
+
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    out = open(args.out, 'w') if args.out else None
+    try:
+        records = list(profile_boards(args.count, args.size, args.seed, out, args.policy))
+    finally:
+        if out is not None:
+            out.close()
+    if profiler is not None:
+        import pstats
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+    records.sort(key=lambda r: r['times'].get('fill', 0.0))
+    median = records[len(records) // 2]['times'].get('fill', 0.0)
+    for record in records[-args.slowest:]:
+        fill = record['times'].get('fill', 0.0)
+        print(
+            f"board {record['board']:>5} seed {record['seed']:>20}  fill {fill * 1000:9.2f}ms "
+            f"({fill / median if median else 0:6.1f}x median)  assignments {record['assignments']:>7}  "
+            f"failures {record['failures']:>6}  max undo depth {record['max_undo_depth']:>4}"
+        )
@@ -0,0 +1,66 @@
+import io
+import json
+import unittest
+from random import Random
+from board import Board
+from dlx import DancingLinks
+from stats import SearchStats, profile_boards
+
+
+class TestSearchStats(unittest.TestCase):
+    def test_board_without_stats_collects_nothing(self):
+        board = Board(4, rng=Random(1))
+        board.fill()
+        self.assertIsNone(board.stats)
+
+    def test_fill_counts_assignments_and_eliminations(self):
+        stats = SearchStats()
+        board = Board(9, rng=Random(3), stats=stats)
+        board.fill()
+        self.assertTrue(board.validate())
+        # every cell is assigned at least once, undone choices and the cells they forced again
+        self.assertGreaterEqual(stats.assignments, 81 + stats.undos)
+        self.assertLessEqual(stats.forced, stats.assignments)
+        self.assertGreater(stats.eliminations, 0)
+        self.assertGreaterEqual(stats.undos, stats.failures)
+        self.assertIn('construct', stats.times)
+        self.assertIn('fill', stats.times)
+
+    def test_failures_record_undo_depth(self):
+        stats = SearchStats()
+        stats.failed(3)
+        stats.failed(1)
+        self.assertEqual(2, stats.failures)
+        self.assertEqual(4, stats.undos)
+        self.assertEqual(3, stats.max_undo_depth)
+
+    def test_unsolvable_board_counts_its_failure(self):
+        stats = SearchStats()
+        board = Board.from_string('12..' '..3.' '....' '...3', stats=stats)
+        self.assertFalse(board.solve())
+        self.assertGreater(stats.failures, 0)
+
+    def test_dlx_backend_reports_assignments(self):
+        stats = SearchStats()
+        board = Board(9, DancingLinks(Random(2)), Random(2), stats)
+        board.fill()
+        self.assertEqual(81, stats.assignments)
+        stats = SearchStats()
+        puzzle = Board(9, DancingLinks(Random(3)), Random(3), stats)
+        puzzle.set_givens([int(v) if i % 3 else None for i, v in enumerate(board.to_string())])
+        puzzle.fill()
+        self.assertEqual(27, stats.assignments)
+
+    def test_profile_boards_writes_json_lines(self):
+        out = io.StringIO()
+        records = list(profile_boards(3, 4, seed=5, out=out))
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(records, lines)
+        self.assertEqual([0, 1, 2], [r['board'] for r in records])
+        again = Board(4, rng=Random(records[1]['seed']))
+        again.fill()
+        self.assertTrue(again.validate())
+
+
+if __name__ == '__main__':
+    unittest.main()
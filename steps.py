@@ -0,0 +1,206 @@
+"""Step events of a fill, and compact trace files to replay them from.
+
+`Board.iter_fill` yields a `Step` for every change the search makes. A
+trace file keeps them for later: a header with the board size and the
+values on the board when the fill started, then every step packed into a
+32-bit word (kind in bits 0-2, cell in bits 3-18, value from bit 19 up).
+
+    with TraceWriter('fill.trace', board) as out:
+        out.extend(board.iter_fill())
+    for changes in replay_frames(TraceReader('fill.trace'), steps_per_frame=50): ...
+
+`replay_frames` groups steps into frames and reports only the cells whose
+value changed during each, which is what `render.ReplayRenderer` draws.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, TYPE_CHECKING
+from array import array
+import struct
+
+if TYPE_CHECKING:
+    from board import Board
+
+ASSIGN, FORCE, ELIMINATE, CLEAR, BACKTRACK, RESTART = range(6)
+KINDS = ('assign', 'force', 'eliminate', 'clear', 'backtrack', 'restart')
+
+
+class Step(NamedTuple):
+    kind: int   # one of ASSIGN .. RESTART
+    cell: int   # cell index, -1 for RESTART
+    value: int  # value set, removed or ruled out; 0 for CLEAR and RESTART
+
+    def __str__(self) -> str:
+        return f'{KINDS[self.kind]} {self.cell} {self.value}'
+
+
+MAGIC = b'SUDOKUTR'
+VERSION = 1
+# magic, version, size
+HEADER = struct.Struct('<8sHH')
+CELL_BITS = 16
+VALUE_SHIFT = 3 + CELL_BITS
+
+
+def pack(step: Step) -> int:
+    return step.kind | (step.cell + 1) << 3 | step.value << VALUE_SHIFT
+
+
+def unpack(word: int) -> Step:
+    return Step(word & 7, (word >> 3 & (1 << CELL_BITS) - 1) - 1, word >> VALUE_SHIFT)
+
+
+class TraceWriter:
+    """Writes the steps of one fill of `board`, starting from its current values."""
+
+    def __init__(self, path: str, board: Board, buffer: int = 1 << 16) -> None:
+        if board.size * board.size >= 1 << CELL_BITS:
+            raise ValueError(f'Traces hold boards of up to {(1 << CELL_BITS) - 1} cells.')
+        self.path = path
+        self.count = 0
+        self.buffer = buffer
+        self.words = array('I')
+        self.file: BinaryIO = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, board.size))
+        array('H', [cell.value or 0 for cell in board.cells]).tofile(self.file)
+
+    def write(self, step: Step) -> None:
+        self.words.append(pack(step))
+        self.count += 1
+        if len(self.words) >= self.buffer:
+            self._flush()
+
+    def extend(self, steps: Iterable[Step]) -> int:
+        """Write every step of `steps`; returns how many were written."""
+        before = self.count
+        for step in steps:
+            self.write(step)
+        return self.count - before
+
+    def _flush(self) -> None:
+        self.words.tofile(self.file)
+        self.words = array('I')
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self._flush()
+            self.file.close()
+
+    def __enter__(self) -> TraceWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def record(board: Board, path: str, exhaustive: bool = False, policy=None) -> int:
+    """Fill `board` through `iter_fill` and write its trace to `path`; returns the number of steps.
+
+    The trace is complete even when the fill fails, in which case the
+    OutOfOptions is raised after writing it.
+    """
+    with TraceWriter(path, board) as out:
+        out.extend(board.iter_fill(exhaustive, policy))
+        return out.count
+
+
+class TraceReader:
+    """The start values and steps of a trace file; iterating reads the steps in chunks."""
+
+    def __init__(self, path: str, chunk: int = 1 << 16) -> None:
+        self.path = path
+        self.chunk = chunk
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f'{path} is too short for a trace header.')
+            magic, version, self.size = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a trace file.')
+            if version != VERSION:
+                raise ValueError(f'{path} has trace version {version}, expected {VERSION}.')
+            values = array('H')
+            try:
+                values.fromfile(f, self.size * self.size)
+            except EOFError:
+                raise ValueError(f'{path} is truncated.')
+        self.values: List[int] = values.tolist()
+        self.offset = HEADER.size + values.itemsize * len(values)
+
+    def __iter__(self) -> Iterator[Step]:
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                words = array('I')
+                words.frombytes(f.read(self.chunk * words.itemsize))
+                if not words:
+                    return
+                yield from map(unpack, words)
+
+
+def replay_frames(steps: Iterable[Step], steps_per_frame: int = 50) -> Iterator[Dict[int, int]]:
+    """Per frame of `steps_per_frame` steps, the new value (0 for empty) of every cell it changed.
+
+    A cell assigned and cleared again within one frame is left out, and
+    frames with no change at all are still yielded, so the frame rate of
+    a replay stays tied to the step rate.
+    """
+    changes: Dict[int, int] = {}
+    before: Dict[int, int] = {}  # values at the start of the frame of the cells in `changes`
+    current: Dict[int, int] = {}
+    count = 0
+    for kind, cell, value in steps:
+        if kind <= FORCE or kind == CLEAR:
+            value = value if kind <= FORCE else 0
+            if cell not in changes:
+                before[cell] = current.get(cell, 0)  # cells in steps start out empty
+            changes[cell] = current[cell] = value
+        count += 1
+        if count == steps_per_frame:
+            yield {cell: value for cell, value in changes.items() if before[cell] != value}
+            changes, before, count = {}, {}, 0
+    if count:
+        yield {cell: value for cell, value in changes.items() if before[cell] != value}
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    from collections import Counter
+    from random import Random
+    import os
+    import sys
+    from board import Board
+
+    parser = ArgumentParser(description='Record the steps of a fill to a trace file, or replay or summarize one.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    write = commands.add_parser('record', help='fill a board and write its trace')
+    write.add_argument('path')
+    write.add_argument('--size', type=int, default=9)
+    write.add_argument('--puzzle', default=None, help='puzzle text or file to solve instead of filling an empty board')
+    write.add_argument('--policy', default=None)
+    write.add_argument('--seed', type=int, default=None)
+    show = commands.add_parser('show', help='count the steps of a trace by kind')
+    show.add_argument('path')
+    replay = commands.add_parser('replay', help='draw a trace with turtle graphics')
+    replay.add_argument('path')
+    replay.add_argument('--steps-per-frame', type=int, default=50)
+    replay.add_argument('--fps', type=float, default=30.0)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        rng = Random(args.seed)
+        if args.puzzle is None:
+            board = Board(args.size, rng=rng)
+        elif os.path.exists(args.puzzle):
+            board = Board.load(args.puzzle, rng=rng)
+        else:
+            board = Board.from_string(args.puzzle, rng=rng)
+        steps = record(board, args.path, exhaustive=args.puzzle is not None, policy=args.policy)
+        print(f'{steps} steps written to {args.path}', file=sys.stderr)
+    elif args.command == 'show':
+        trace = TraceReader(args.path)
+        counts = Counter(KINDS[step.kind] for step in trace)
+        print(f'size {trace.size}, {sum(counts.values())} steps: {dict(counts)}')
+    else:
+        from render import ReplayRenderer
+
+        ReplayRenderer(steps_per_frame=args.steps_per_frame, fps=args.fps).play(TraceReader(args.path))
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from random import Random
+
+import steps
+from board import Board
+from steps import ASSIGN, BACKTRACK, CLEAR, ELIMINATE, FORCE, RESTART, Step
+from structures import OutOfOptions
+
+
+class TestSteps(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'fill.trace')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_steps_pack_into_one_word(self):
+        for step in (Step(ASSIGN, 0, 1), Step(ELIMINATE, 65000, 255), Step(RESTART, -1, 0)):
+            word = steps.pack(step)
+            self.assertLess(word, 1 << 32)
+            self.assertEqual(step, steps.unpack(word))
+
+    def test_recorded_trace_reads_back(self):
+        board = Board(16, rng=Random(2))
+        board.set_givens([1, 2, 3])
+        count = steps.record(board, self.path)
+        trace = steps.TraceReader(self.path, chunk=100)
+        self.assertEqual(16, trace.size)
+        self.assertListEqual([1, 2, 3] + [0] * 253, trace.values)
+        read = list(trace)
+        self.assertEqual(count, len(read))
+        self.assertEqual(steps.HEADER.size + 2 * 256 + 4 * count, os.path.getsize(self.path))
+        self.assertTrue(board.validate())
+
+    def test_trace_of_a_failed_fill_is_kept(self):
+        board = Board.from_string('12..' '..3.' '....' '...3')
+        with self.assertRaises(OutOfOptions):
+            steps.record(board, self.path, exhaustive=True)
+        self.assertTrue(list(steps.TraceReader(self.path)))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'SUDOKUPK' + bytes(40))
+        with self.assertRaises(ValueError):
+            steps.TraceReader(self.path)
+
+    def test_frames_hold_only_changed_cells(self):
+        trace = [
+            Step(ASSIGN, 0, 1), Step(ELIMINATE, 1, 1), Step(FORCE, 1, 2),
+            Step(ASSIGN, 2, 3), Step(CLEAR, 2, 0), Step(CLEAR, 1, 0),
+            Step(BACKTRACK, 1, 2), Step(ELIMINATE, 3, 1),
+        ]
+        frames = list(steps.replay_frames(trace, steps_per_frame=3))
+        self.assertListEqual([{0: 1, 1: 2}, {1: 0}, {}], frames)
+
+    def test_frames_replay_a_fill(self):
+        board = Board(9, rng=Random(4))
+        values = {}
+        for changes in steps.replay_frames(board.iter_fill(), steps_per_frame=7):
+            values.update(changes)
+        self.assertListEqual([cell.value for cell in board.cells], [values[i] for i in range(81)])
+
+
+if __name__ == '__main__':
+    unittest.main()
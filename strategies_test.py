@@ -0,0 +1,94 @@
+import unittest
+from random import Random
+from board import Board
+from strategies import STRATEGIES, BoxLine, HiddenSubset, NakedSubset, Pipeline, Pointing, Strategy
+from structures import bit
+
+PUZZLE = '000000010400000000020000000000050407008000300001090000300400200050100000000806000'
+SOLUTION = '693784512487512936125963874932651487568247391741398625319475268856129743274836159'
+
+
+class TestStrategies(unittest.TestCase):
+    def setUp(self):
+        self.board = Board(9)
+
+    def remove(self, cells, value):
+        for index in cells:
+            self.board.cells[index].reduce(value)
+
+    def test_pointing_clears_rest_of_row(self):
+        self.remove([9, 10, 11, 18, 19, 20], 1)
+        self.assertEqual(6, Pointing().apply(self.board))
+        self.assertFalse(any(self.board.cells[i].mask & bit(1) for i in range(3, 9)))
+
+    def test_box_line_clears_rest_of_square(self):
+        self.remove(range(3, 9), 1)
+        self.assertEqual(6, BoxLine().apply(self.board))
+        self.assertFalse(any(self.board.cells[i].mask & bit(1) for i in (9, 10, 11, 18, 19, 20)))
+
+    def test_naked_pair_clears_rest_of_unit(self):
+        for value in range(3, 10):
+            self.remove([0, 1], value)
+        NakedSubset(2).apply(self.board)
+        self.assertFalse(any(self.board.cells[i].mask & (bit(1) | bit(2)) for i in range(2, 9)))
+
+    def test_hidden_pair_keeps_only_its_digits(self):
+        self.remove(range(2, 9), 1)
+        self.remove(range(2, 9), 2)
+        HiddenSubset(2).apply(self.board)
+        self.assertEqual({1, 2}, self.board.cells[0].options)
+        self.assertEqual({1, 2}, self.board.cells[1].options)
+
+    def test_eliminations_keep_the_solution_and_roll_back(self):
+        puzzle = Board.from_string(PUZZLE)
+        start = puzzle.checkpoint()
+        before = [cell.mask for cell in puzzle.cells]
+        Pipeline().run(puzzle)
+        for cell, value in zip(puzzle.cells, SOLUTION):
+            self.assertTrue(cell.value == int(value) or cell.mask & bit(int(value)))
+        puzzle.rollback_to(start)
+        self.assertEqual(before, [cell.mask for cell in puzzle.cells])
+
+    def test_fill_and_solve_with_every_strategy(self):
+        board = Board(9, rng=Random(6), strategies=Pipeline())
+        board.fill()
+        self.assertTrue(board.validate())
+        puzzle = Board.from_string(PUZZLE)
+        puzzle.strategies = Pipeline()
+        self.assertTrue(puzzle.solve())
+        self.assertEqual(SOLUTION, puzzle.to_string())
+
+    def test_strategy_without_apply_cannot_be_created(self):
+        class Unfinished(Strategy):
+            name = 'unfinished'
+
+        with self.assertRaises(TypeError):
+            Unfinished()
+
+
+class TestPipeline(unittest.TestCase):
+    def test_enables_every_strategy_by_default(self):
+        self.assertEqual(list(STRATEGIES), Pipeline().names)
+
+    def test_enable_disable_and_order(self):
+        pipeline = Pipeline(['pointing', 'naked_pairs'])
+        pipeline.enable('hidden_pairs', position=0)
+        self.assertEqual(['hidden_pairs', 'pointing', 'naked_pairs'], pipeline.names)
+        pipeline.disable('pointing')
+        pipeline.order(['naked_pairs', 'hidden_pairs'])
+        self.assertEqual(['naked_pairs', 'hidden_pairs'], pipeline.names)
+
+    def test_rejects_unknown_names(self):
+        with self.assertRaises(ValueError):
+            Pipeline(['x_wing'])
+        with self.assertRaises(ValueError):
+            Pipeline(['pointing']).order(['box_line'])
+
+    def test_counts_work_per_strategy(self):
+        pipeline = Pipeline(['pointing'])
+        Board(9, rng=Random(1), strategies=pipeline).fill()
+        self.assertGreater(pipeline.stats['pointing']['calls'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,46 +1,143 @@
 from __future__ import annotations
-from typing import List, Set, Optional
-from random import choice
+from typing import Iterable, List, Set, Optional
+from random import Random
 from collections import UserList, Counter
-from itertools import chain
-from dataclasses import dataclass, field
-from enum import Enum
-from turtle import Turtle
 
 
-def x_print(*args, **kwargs):
-    pass
-    # print(*args, **kwargs)
+# used by cells created without a board-supplied generator
+_shared_rng = Random()
 
 
-class StepType(Enum):
-    SET_VALUE = 'set value'
-    REDUCE = 'reduce'
-    NOTHING = 'nothing'
+class Trail:
+    """Board-wide undo log of cell changes.
 
+    Each entry is (cell, previous mask, previous value) and is only recorded
+    when a cell actually changes, so rolling back costs time proportional to
+    the real changes since the checkpoint.
+    """
 
-@dataclass
-class Step:
-    action: StepType
-    value: None = None  # value for undo will always be None
-    options: set = field(default_factory=set)
+    def __init__(self) -> None:
+        self.entries: List[tuple] = []
+
+    def record(self, cell: Cell) -> None:
+        self.entries.append((cell, cell.mask, cell._value))
+
+    def checkpoint(self) -> int:
+        return len(self.entries)
+
+    def rollback_to(self, mark: int) -> None:
+        entries = self.entries
+        while len(entries) > mark:
+            cell, mask, value = entries.pop()
+            cell.restore(mask, value)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def bit(value: int) -> int:
+    """Candidate bitmask holding only `value`: bit v stands for value v."""
+    return 1 << value
+
+
+def to_mask(values: Iterable[int]) -> int:
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+
+def to_values(mask: int) -> List[int]:
+    values = []
+    while mask:
+        low = mask & -mask
+        values.append(low.bit_length() - 1)
+        mask ^= low
+    return values
+
+
+class CellObserver:
+    """Receives notifications about cell changes, e.g. to draw them.
+
+    Observers are optional: a cell without observers never calls out, so
+    headless generation pays nothing for rendering.
+    """
+
+    def attach(self, board) -> None:
+        pass
+
+    def detach(self) -> None:
+        pass
+
+    def cell_assigned(self, cell: Cell) -> None:
+        pass
+
+    def cell_cleared(self, cell: Cell) -> None:
+        pass
+
+    def flush(self) -> None:
+        """A fill has ended; show anything held back."""
+        pass
 
 
 class Cell:
-    def __init__(self, options: Set[int], index: int, pos: tuple) -> None:
+    def __init__(
+            self,
+            options: Set[int],
+            index: int,
+            observers: Optional[List[CellObserver]] = None,
+            free_index: Optional[FreeCellIndex] = None,
+            trail: Optional[Trail] = None,
+            rng: Optional[Random] = None,
+    ) -> None:
         self.index = index
-        self.turtle = self.setup_turtle(pos)
+        # shared with the owning board, so attaching an observer there reaches every cell
+        self.observers: List[CellObserver] = observers if observers is not None else []
+        self.free_index: Optional[FreeCellIndex] = free_index
+        self._bucket: int = -1  # position inside free_index, maintained by it
+        self._slot: int = -1
         self.row: Optional[Row] = None
         self.column: Optional[Column] = None
         self.square: Optional[Square] = None
         self.rcs: tuple = (self.row, self.column, self.square)
         self.linked_cells: Optional[LinkedCells] = None
-        self.options: set = set(options)  # need to make a copy of parameter set because that one is mutable
-        self._len = len(options)
+        # units whose digit counters follow this cell; set by the board once counting starts
+        self.units: tuple = ()
+        # candidates are kept as a bitmask: bit v is set while v is still possible
+        self.mask: int = to_mask(options)
         self._value: int | None = None
         self.placeholder = '_'
-        self.history: List[Step] = []
+        # cells of one board share its trail; a standalone cell gets its own
+        self.trail: Trail = trail if trail is not None else Trail()
+        self._mark: int = -1  # trail checkpoint taken when the current value was set
+        self.rng: Random = rng if rng is not None else _shared_rng
+        if free_index is not None:
+            free_index.update(self)
 
+    @property
+    def options(self) -> Set[int]:
+        return set(to_values(self.mask))
+
+    @options.setter
+    def options(self, new_options: Iterable[int]) -> None:
+        self.trail.record(self)
+        before = self.effective_mask
+        self.mask = to_mask(new_options)
+        if self.free_index is not None:
+            self.free_index.update(self)
+        self._recount(before)
+
+    @property
+    def effective_mask(self) -> int:
+        """The digits this cell still covers: its value once set, its candidates before."""
+        return self.mask if self._value is None else bit(self._value)
+
+    def _recount(self, before: int) -> None:
+        """Tell the unit counters which digits this cell gained or lost since `before`."""
+        after = self.effective_mask
+        if before != after:
+            for unit in self.units:
+                unit.count_changed(before & ~after, after & ~before)
 
     @property
     def value(self) -> int | None:
@@ -48,37 +145,25 @@ class Cell:
 
     @value.setter
     def value(self, new_val: int) -> None:
-        self.history.append(
-            Step(
-                action=StepType.SET_VALUE,
-                options=self.options
-            )
-        )
+        self._mark = self.trail.checkpoint()
+        self.trail.record(self)
+        before = self.effective_mask
+        if self._value is not None:
+            for unit in self.units:
+                unit.placed &= ~bit(self._value)
         self._value = new_val
-        x_print(f'Setting Cell {self.index} value to {new_val}.')
+        self.mask = 0
+        if self.free_index is not None:
+            self.free_index.update(self)
+        for unit in self.units:
+            unit.placed |= bit(new_val)
+        self._recount(before)
         if self.linked_cells is None:
             raise ValueError('linked_cells must be established before setting cell value')
         self.linked_cells.reduce(new_val)
-        self.options = set()
-        self.turtle_draw_num(new_val)
-
-
-    def setup_turtle(self, position: tuple):
-        turtle = Turtle()
-        turtle.penup()
-        turtle.speed(0)
-        turtle.goto(position)
-        turtle.hideturtle()
-        return turtle
-
-    def turtle_draw_num(self, num: int):
-        self.turtle_clear()
-        self.turtle.write(num, align="center", font="20")
-
-
-    def turtle_clear(self):
-        self.turtle.clear()
-
+        if self.observers:
+            for observer in self.observers:
+                observer.cell_assigned(self)
 
     def get_options_from(self, what: CellGroup):
         return what.get_remaining_options(self)
@@ -89,52 +174,77 @@ class Cell:
             self.linked_cells = LinkedCells(*self.rcs, cell=self)
 
     def reduce(self, val: int) -> None:
-        if self.value is None:
-            self.history.append(
-                Step(
-                    action=StepType.REDUCE,
-                    options=set(self.options)
-                )
-            )
-            self.options.discard(val)
-            if self.options == set():
+        b = bit(val)
+        if self._value is None and self.mask & b:
+            self.trail.record(self)
+            self.mask ^= b
+            if self.free_index is not None:
+                self.free_index.update(self)
+            # the hot path of every assignment, so count_changed is inlined for a single digit
+            for unit in self.units:
+                counts = unit.counts
+                counts[val] -= 1
+                if counts[val] <= 1 and not unit.placed & b:
+                    unit.pending.append((unit, val))
+            if not self.mask:
                 self.placeholder = 'X'
-                raise OutOfOptions(f'Cell {self.index} cannot discard option {val}. Last element!')
-        else:
-            self.history.append(
-                Step(action=StepType.NOTHING)
-            )
+                raise OutOfOptions(f'Cell {self.index} cannot discard option {val}. Last element!', cell=self)
 
     def choose_value(self) -> int:
-        for cg in self.rcs:
-            other_opts = self.get_options_from(cg)
-            remaining_options = self.options - other_opts
-            if len(remaining_options) == 1:
-                self.value = remaining_options.pop()
-                break
-        else:
-            self.value = choice(tuple(self.options))
+        if not self.units:
+            # without unit counters, look for a value no other cell of a unit can take
+            for cg in self.rcs:
+                remaining = self.mask & ~cg.get_remaining_mask(self)
+                if remaining and not remaining & (remaining - 1):
+                    self.value = remaining.bit_length() - 1
+                    return self.value
+        self.value = self.rng.choice(to_values(self.mask))
         return self.value
 
-    def undo(self) -> Step:
+    def undo(self) -> int:
+        """Roll the trail back to this cell's assignment and drop the value it tried."""
+        saved_value = self._value
+        self.trail.rollback_to(self._mark)
+        if self.mask & bit(saved_value):
+            self.trail.record(self)
+            self.mask &= ~bit(saved_value)
+            if self.free_index is not None:
+                self.free_index.update(self)
+            for unit in self.units:
+                unit.count_changed(bit(saved_value), 0)
+        self.placeholder = 'X'
+        return saved_value
+
+    def restore(self, mask: int, value: int | None) -> None:
+        """Put back a state recorded on the trail."""
+        old_value = self._value
+        cleared = old_value is not None and value is None
+        if self.units:
+            before = self.mask if old_value is None else bit(old_value)
+            after = mask if value is None else bit(value)
+            if old_value != value:
+                for unit in self.units:
+                    if old_value is not None:
+                        unit.placed &= ~bit(old_value)
+                    if value is not None:
+                        unit.placed |= bit(value)
+            if before != after:
+                lost, gained = before & ~after, after & ~before
+                for unit in self.units:
+                    unit.count_changed(lost, gained)
+        self.mask = mask
+        self._value = value
         self.placeholder = '_'
-        last_step: Step = self.history.pop()
-        if last_step.action is not StepType.NOTHING:
-            saved_value = self._value
-            saved_options = self.options
-            self._value = last_step.value
-            self.options = last_step.options
-            if last_step.action is StepType.SET_VALUE:
-                self.options = last_step.options - {saved_value}
-                self.placeholder = 'X'
-                x_print(f'Undo in {self!r:<8}. Value rollback from {saved_value}, opts {self.options}')
-                self.linked_cells.undo()
-            else:
-                x_print(f'Undo in {self!r:<8}. Rollback reduce from {saved_options} to {self.options}')
-        return last_step
+        if cleared:
+            self._mark = -1
+        if self.free_index is not None:
+            self.free_index.update(self)
+        if cleared and self.observers:
+            for observer in self.observers:
+                observer.cell_cleared(self)
 
     def __len__(self):
-        return len(self.options)
+        return self.mask.bit_count()
 
     def __str__(self):
         return str(self.value or self.placeholder)
@@ -142,22 +252,99 @@ class Cell:
     def __repr__(self):
         return str(f'Cell({self.index})')
 
+    def __hash__(self):
+        # hashing by position keeps iteration over sets of cells, and so seeded runs, reproducible
+        return self.index
+
 
 class CellGroup(UserList):
     def __init__(self) -> None:
         self.data: List[Cell]
         super().__init__()
+        # counts[v]: cells that still cover digit v; filled by start_counting
+        self.counts: List[int] = []
+        self.placed: int = 0  # mask of the digits already placed in this unit
+        self.pending: Optional[list] = None
+
+    def start_counting(self, size: int, pending: list) -> None:
+        """Count, per digit, the cells of this unit that can still take it.
+
+        Cells report every change through `count_changed`, so hidden singles
+        (a digit with one place left) and dead units (a digit with none) show
+        up in constant time. Both are queued on `pending` as (unit, digit).
+        """
+        self.counts = [0] * (size + 1)
+        self.placed = 0
+        self.pending = pending
+        # cells of a fresh board all share one mask, so count each distinct mask once
+        masks = Counter()
+        for cell in self.data:
+            if cell.value is not None:
+                self.placed |= bit(cell.value)
+            masks[cell.effective_mask] += 1
+            cell.units += (self,)
+        for mask, cells in masks.items():
+            for value in to_values(mask):
+                self.counts[value] += cells
+
+    def reset_counts(self) -> None:
+        """Counters for a unit whose cells have all become free with every candidate."""
+        self.counts = [0] + [len(self.data)] * (len(self.counts) - 1)
+        self.placed = 0
+
+    def recount(self) -> None:
+        """Recompute the counters from the cells and queue every digit with one place or none."""
+        counts = [0] * len(self.counts)
+        placed = 0
+        for cell in self.data:
+            if cell.value is not None:
+                placed |= bit(cell.value)
+            for value in to_values(cell.effective_mask):
+                counts[value] += 1
+        self.counts = counts
+        self.placed = placed
+        for value in range(1, len(counts)):
+            if counts[value] <= 1 and not placed & bit(value):
+                self.pending.append((self, value))
+
+    def count_changed(self, lost: int, gained: int) -> None:
+        counts = self.counts
+        while gained:
+            low = gained & -gained
+            counts[low.bit_length() - 1] += 1
+            gained ^= low
+        while lost:
+            low = lost & -lost
+            value = low.bit_length() - 1
+            counts[value] -= 1
+            if counts[value] <= 1 and not self.placed & low:
+                self.pending.append((self, value))
+            lost ^= low
 
     def append(self, what: Cell) -> Cell:
         super().append(what)
         return what
 
-    def get_remaining_options(self, requestor: Cell):
-        return set(chain(*(c.options for c in self if c is not requestor)))
+    def get_remaining_mask(self, requestor: Cell) -> int:
+        mask = 0
+        for c in self.data:
+            if c is not requestor:
+                mask |= c.mask
+        return mask
+
+    def get_remaining_options(self, requestor: Cell) -> Set[int]:
+        return set(to_values(self.get_remaining_mask(requestor)))
+
+    @property
+    def mask(self) -> int:
+        mask = 0
+        for c in self.data:
+            mask |= c.mask
+        return mask
 
     @property
     def options(self) -> Set[int]:
-        return set().union(*(c.options for c in self))
+        return set(to_values(self.mask))
 
     def validate(self):
         cnt: Counter = Counter([cell.value for cell in self])
@@ -193,11 +380,91 @@ class Square(CellGroup):
         return what
 
 
-class LinkedCells(set):
-    def __init__(self, r: Row, c: Column, s: Square, cell) -> None:
-        super().__init__()
-        self.update(r, c, s)
-        self.remove(cell)
+class FreeCellIndex:
+    """Bucket queue of unfilled cells keyed by their number of options.
+
+    Cells report every change through `update`, which moves them between
+    buckets in O(1); filled cells are not kept at all. Bucket 0 holds cells
+    that ran out of options but are not filled.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.buckets: List[List[Cell]] = [[] for _ in range(size + 1)]
+        self._count = 0
+
+    def reset(self, cells: List[Cell], options: int) -> None:
+        """Hold exactly `cells`, all with `options` candidates, in the order given."""
+        for bucket in self.buckets:
+            bucket.clear()
+        self.buckets[options] = list(cells)
+        for slot, cell in enumerate(cells):
+            cell._bucket = options
+            cell._slot = slot
+        self._count = len(cells)
+
+    def rebuild(self, cells: List[Cell]) -> None:
+        """Hold the unfilled ones of `cells`, after their masks and values were overwritten."""
+        for bucket in self.buckets:
+            bucket.clear()
+        self._count = 0
+        for cell in cells:
+            cell._bucket = cell._slot = -1
+            self.update(cell)
+
+    def update(self, cell: Cell) -> None:
+        bucket = -1 if cell._value is not None else cell.mask.bit_count()
+        if bucket == cell._bucket:
+            return
+        if cell._bucket >= 0:
+            self._remove(cell)
+        if bucket >= 0:
+            cells = self.buckets[bucket]
+            cell._bucket = bucket
+            cell._slot = len(cells)
+            cells.append(cell)
+            self._count += 1
+
+    def _remove(self, cell: Cell) -> None:
+        cells = self.buckets[cell._bucket]
+        last = cells.pop()
+        if last is not cell:
+            cells[cell._slot] = last
+            last._slot = cell._slot
+        cell._bucket = cell._slot = -1
+        self._count -= 1
+
+    def least_free(self) -> List[Cell]:
+        """Unfilled cells sharing the smallest non-zero number of options."""
+        for cells in self.buckets[1:]:
+            if cells:
+                return cells
+        return []
+
+    def __iter__(self):
+        for cells in self.buckets[1:]:
+            yield from cells
+
+    def __len__(self) -> int:
+        return self._count - len(self.buckets[0])
+
+
+class LinkedCells(tuple):
+    """The other cells of a cell's row, column and square, in index order.
+
+    A tuple rather than a set: boards hold one per cell, and a set of 20
+    cells takes ten times the memory of a tuple.
+    """
+
+    def __new__(cls, r: Row, c: Column, s: Square, cell) -> LinkedCells:
+        peers = set(r.data)
+        peers.update(c.data, s.data)
+        peers.discard(cell)
+        return super().__new__(cls, sorted(peers, key=lambda peer: peer.index))
+
+    @classmethod
+    def from_cells(cls, cells: Iterable[Cell]) -> LinkedCells:
+        """Build from cells that are already known to be the peers, e.g. from a peer table."""
+        return tuple.__new__(cls, cells)
 
     def reduce(self, val):
         err = None
@@ -210,10 +477,15 @@ class LinkedCells(set):
         if err is not None:
             raise err
 
-    def undo(self):
-        for cell in self:
-            cell.undo()
-
 
 class OutOfOptions(Exception):
-    pass
+    """A cell without candidates (`cell`) or a unit without a place for `value` (`unit`).
+
+    Both are None when the cause is not a single cell or unit.
+    """
+
+    def __init__(self, message: str = '', cell: Optional[Cell] = None, unit: Optional[CellGroup] = None, value: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.cell = cell
+        self.unit = unit
+        self.value = value
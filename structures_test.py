@@ -3,7 +3,7 @@ from unittest import mock
 from itertools import chain
 from copy import copy
 
-from structures import Cell, CellGroup, Row, Column, Square, LinkedCells
+from structures import OutOfOptions, Cell, CellGroup, Row, Column, Square, LinkedCells, FreeCellIndex, Trail, bit, to_mask, to_values
 
 
 class TestCell(unittest.TestCase):
@@ -47,6 +47,32 @@ class TestCell(unittest.TestCase):
         self.cell.reduce(3)
         self.assertNotIn(3, self.cell.options)
 
+    def test_cell_keeps_options_as_bitmask(self):
+        self.assertEqual(0b11110, self.cell.mask)
+        self.cell.reduce(2)
+        self.assertEqual(0b11010, self.cell.mask)
+        self.assertEqual(3, len(self.cell))
+
+    def test_reduce_records_previous_mask_on_trail(self):
+        self.cell.reduce(1)
+        self.assertEqual([(self.cell, 0b11110, None)], self.cell.trail.entries)
+
+    def test_reducing_missing_option_records_nothing(self):
+        self.cell.reduce(1)
+        self.cell.reduce(1)
+        self.assertEqual(1, len(self.cell.trail))
+
+
+class TestMaskHelpers(unittest.TestCase):
+    def test_bit_of_value(self):
+        self.assertEqual(2, bit(1))
+        self.assertEqual(512, bit(9))
+
+    def test_mask_round_trip(self):
+        self.assertEqual(0b101010, to_mask({1, 3, 5}))
+        self.assertListEqual([1, 3, 5], to_values(0b101010))
+        self.assertListEqual([], to_values(0))
+
 
 class TestCellInContext(unittest.TestCase):
     def setUp(self):
@@ -65,7 +91,7 @@ class TestCellInContext(unittest.TestCase):
         for x in (row, col, sq):
             x.append(cell)
         cell.set_linked_cells()
-        self.assertSetEqual(expected_cells, cell.linked_cells)
+        self.assertSetEqual(expected_cells, set(cell.linked_cells))
 
     def test_setting_value_reduces_linked_cells(self):
         r, c, s = mock.Mock(), mock.Mock(), mock.Mock()
@@ -114,6 +140,21 @@ class TestCellGroup(unittest.TestCase):
         self.cg.append(new_cell)
         self.assertIn(new_cell, self.cg.data)
 
+    def test_counts_cells_per_digit(self):
+        for options in ({1, 2}, {2, 3}, {2, 4}, {1, 3}):
+            self.cg.append(Cell(options, 0))
+        self.cg.start_counting(4, [])
+        self.assertEqual([0, 2, 3, 2, 1], self.cg.counts)
+
+    def test_queues_digits_down_to_one_place(self):
+        pending = []
+        for options in ({1, 2}, {1, 2}, {1, 3}):
+            self.cg.append(Cell(options, 0))
+        self.cg.start_counting(3, pending)
+        self.cg.count_changed(bit(1) | bit(2), 0)
+        self.assertEqual([(self.cg, 2)], pending)
+        self.assertEqual([0, 2, 1, 1], self.cg.counts)
+
 
 class TestRow(unittest.TestCase):
     def setUp(self):
@@ -153,17 +194,49 @@ class TestLinkedCells(unittest.TestCase):
         self.linked_cells = LinkedCells(r, c, s, self.the_cell)
 
     def test_cells_interlinked_knows_constituent_cells(self):
-        self.assertSetEqual(self.expected_cells, self.linked_cells)
+        self.assertSetEqual(self.expected_cells, set(self.linked_cells))
+        self.assertListEqual(sorted(c.index for c in self.linked_cells), [c.index for c in self.linked_cells])
 
     def test_reducing_value_removes_it_from_cells(self):
         self.linked_cells.reduce(4)
         linked_cells_options = set(chain.from_iterable(cell.options for cell in self.linked_cells))
         self.assertNotIn(4, linked_cells_options)
 
-    def test_linked_cells_can_undo(self):
-        self.linked_cells.clear()
-        mocks = {mock.Mock() for _ in range(4)}
-        self.linked_cells.update(mocks)
-        self.linked_cells.undo()
-        for mck in mocks:
-            mck.undo.assert_called()
+    def test_trail_rolls_back_linked_cells(self):
+        trail = Trail()
+        for cell in self.linked_cells:
+            cell.trail = trail
+        mark = trail.checkpoint()
+        self.linked_cells.reduce(4)
+        trail.rollback_to(mark)
+        for cell in self.linked_cells:
+            self.assertSetEqual({1, 2, 3, 4}, cell.options)
+
+
+class TestFreeCellIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FreeCellIndex(4)
+        self.cells = [Cell({1, 2, 3, 4}, i, free_index=self.index) for i in range(3)]
+
+    def test_new_cells_are_indexed_by_option_count(self):
+        self.assertEqual(3, len(self.index))
+        self.assertListEqual(self.cells, self.index.buckets[4])
+
+    def test_reducing_moves_cell_to_smaller_bucket(self):
+        self.cells[1].reduce(2)
+        self.assertListEqual([self.cells[1]], self.index.least_free())
+        self.assertEqual(3, len(self.index))
+
+    def test_cell_without_options_is_not_free(self):
+        cell = Cell({1}, 3, free_index=self.index)
+        with self.assertRaises(OutOfOptions):
+            cell.reduce(1)
+        self.assertEqual(3, len(self.index))
+        self.assertIn(cell, self.index.buckets[0])
+
+    def test_filled_cell_leaves_index(self):
+        self.cells[0].linked_cells = mock.MagicMock()
+        self.cells[0].value = 1
+        self.assertNotIn(self.cells[0], set(self.index))
+        self.cells[0].undo()
+        self.assertIn(self.cells[0], self.index.buckets[3])
@@ -0,0 +1,152 @@
+"""Random grids from validity-preserving transforms of one solved grid.
+
+Relabelling digits, permuting rows inside a band, permuting bands, the
+same for columns and stacks, and (for square boxes) transposing all map a
+valid grid to another valid grid. Drawing those at random gives a random
+member of the seed grid's equivalence class in O(size^2) with no search.
+The seed grid is either supplied, e.g. from `Board.fill`, or the built-in
+pattern. With `fresh` above zero, `generate` replaces the seed with a newly
+searched grid that often, so the output is not limited to one class.
+
+    for grid in generate(1_000_000, 9, fresh=0.001, seed=1): ...
+    board = Board(9, TransformBackend(rng=Random(1)))
+
+Grids are strings in `Board.to_string` form.
+"""
+from __future__ import annotations
+from typing import Iterator, List, Optional, Sequence
+from random import Random
+from board import Board, SYMBOLS, box_shape
+from structures import OutOfOptions, bit
+
+
+def pattern_grid(size: int) -> List[int]:
+    """A valid filled grid built from a formula, row by row."""
+    box_rows, box_cols = box_shape(size)
+    return [
+        (box_cols * (r % box_rows) + r // box_rows + c) % size + 1
+        for r in range(size) for c in range(size)
+    ]
+
+
+def searched_grid(size: int, rng: Random) -> List[int]:
+    board = Board(size, rng=rng)
+    board.fill()
+    return [cell.value for cell in board.cells]
+
+
+class Transformer:
+    """Draws random transforms of one seed grid.
+
+    Up to 35x35 the seed is also kept as a string of symbols, so that a
+    transform is just an index permutation followed by `str.translate`.
+    """
+
+    def __init__(self, grid: Sequence[int], size: int, rng: Optional[Random] = None) -> None:
+        self.size = size
+        self.box_rows, self.box_cols = box_shape(size)
+        self.rng = rng if rng is not None else Random()
+        self.grid = list(grid)
+        self.symbols = SYMBOLS[:size] if size <= len(SYMBOLS) else None
+        self.text = ''.join(SYMBOLS[value - 1] for value in grid) if self.symbols else None
+
+    def _lines(self, group: int) -> List[int]:
+        """Random order of `size` lines that keeps groups of `group` lines together."""
+        groups = list(range(self.size // group))
+        self.rng.shuffle(groups)
+        order = []
+        for g in groups:
+            lines = list(range(g * group, (g + 1) * group))
+            self.rng.shuffle(lines)
+            order.extend(lines)
+        return order
+
+    def permutation(self) -> List[int]:
+        """Cell index of the seed grid that lands on each cell of a new grid."""
+        size = self.size
+        rows = self._lines(self.box_rows)     # rows within bands, then bands
+        columns = self._lines(self.box_cols)  # columns within stacks, then stacks
+        if self.box_rows == self.box_cols and self.rng.random() < 0.5:
+            return [r * size + c for c in columns for r in rows]
+        return [r * size + c for r in rows for c in columns]
+
+    def next_values(self) -> List[int]:
+        """A new random grid as a list of cell values."""
+        labels = list(range(1, self.size + 1))
+        self.rng.shuffle(labels)
+        grid = self.grid
+        return [labels[grid[i] - 1] for i in self.permutation()]
+
+    def next(self) -> str:
+        """A new random grid in `Board.to_string` form."""
+        if self.symbols is None:
+            return ','.join(map(str, self.next_values()))
+        text = self.text
+        cells = ''.join([text[i] for i in self.permutation()])
+        labels = list(self.symbols)
+        self.rng.shuffle(labels)
+        return cells.translate(str.maketrans(self.symbols, ''.join(labels)))
+
+
+def generate(
+        count: int,
+        size: int = 9,
+        grid: Optional[Sequence[int]] = None,
+        fresh: float = 0.0,
+        seed: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield `count` grids transformed from `grid`, or from the built-in pattern.
+
+    Each grid is replaced by a fresh `Board.fill` search with probability
+    `fresh`: 0 only ever transforms, 1 searches every grid.
+    """
+    rng = Random(seed)
+    transformer = Transformer(grid if grid is not None else pattern_grid(size), size, rng)
+    for _ in range(count):
+        if fresh and rng.random() < fresh:
+            transformer = Transformer(searched_grid(size, rng), size, rng)
+        yield transformer.next()
+
+
+class TransformBackend:
+    """`Board.fill` backend that writes a transformed grid instead of searching.
+
+    Only an empty board can be filled this way. The first fill searches a
+    seed grid unless one is given; later fills transform it.
+    """
+
+    def __init__(self, grid: Optional[Sequence[int]] = None, rng: Optional[Random] = None) -> None:
+        self.grid = grid
+        self.rng = rng if rng is not None else Random()
+        self.transformer: Optional[Transformer] = None
+
+    def fill(self, board: Board) -> None:
+        if any(cell.value is not None for cell in board.cells):
+            raise ValueError('Transforms can only fill an empty board.')
+        if self.transformer is None or self.transformer.size != board.size:
+            grid = self.grid if self.grid is not None else searched_grid(board.size, self.rng)
+            self.transformer = Transformer(grid, board.size, self.rng)
+        for cell, value in zip(board.cells, self.transformer.next_values()):
+            if not cell.mask & bit(value):
+                raise ValueError('The seed grid is not a valid solution.')
+            board.history.append(cell)
+            try:
+                cell.value = value
+            except OutOfOptions:
+                raise ValueError('The seed grid is not a valid solution.')
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    import sys
+
+    parser = ArgumentParser(description='Write transformed grids, one per line.')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--fresh', type=float, default=0.0, help='share of grids that get a fresh search')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    out = sys.stdout
+    for grid in generate(args.count, args.size, fresh=args.fresh, seed=args.seed):
+        out.write(grid + '\n')
@@ -0,0 +1,56 @@
+import unittest
+from random import Random
+
+import transforms
+from board import Board
+
+
+def _valid(text: str) -> bool:
+    board = Board.from_string(text)
+    return board.filled_cells == board.size ** 2 and board.validate()
+
+
+class TestTransforms(unittest.TestCase):
+    def test_pattern_grid_is_valid_for_square_and_rectangular_boxes(self):
+        for size in (4, 6, 8, 9, 12, 16):
+            grid = transforms.pattern_grid(size)
+            board = Board(size)
+            board.set_givens(grid)
+            self.assertTrue(board.validate(), size)
+
+    def test_generated_grids_are_valid_and_varied(self):
+        for size in (4, 6, 9, 16):
+            grids = list(transforms.generate(30, size, seed=1))
+            self.assertTrue(all(_valid(grid) for grid in grids), size)
+            self.assertGreater(len(set(grids)), 20)
+
+    def test_large_sizes_use_comma_form(self):
+        grid = next(transforms.generate(1, 36, seed=1))
+        self.assertIn(',', grid)
+        self.assertTrue(_valid(grid))
+
+    def test_same_seed_gives_same_grids(self):
+        self.assertListEqual(list(transforms.generate(5, 9, seed=3)), list(transforms.generate(5, 9, seed=3)))
+
+    def test_fresh_grids_are_valid(self):
+        self.assertTrue(all(_valid(grid) for grid in transforms.generate(5, 9, fresh=1.0, seed=2)))
+
+    def test_transforms_keep_a_supplied_seed_grid_valid(self):
+        seed = transforms.searched_grid(9, Random(8))
+        self.assertTrue(all(_valid(grid) for grid in transforms.generate(20, 9, grid=seed, seed=8)))
+
+    def test_backend_fills_empty_boards_only(self):
+        backend = transforms.TransformBackend(rng=Random(1))
+        board = Board(9, backend)
+        board.fill()
+        self.assertTrue(board.validate())
+        self.assertEqual(81, len(board.history))
+        given = Board(9, backend)
+        given.cells[0].value = 1
+        with self.assertRaises(ValueError):
+            given.fill()
+
+    def test_backend_rejects_invalid_seed_grid(self):
+        board = Board(4, transforms.TransformBackend(grid=[1] * 16, rng=Random(1)))
+        with self.assertRaises(ValueError):
+            board.fill()
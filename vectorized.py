@@ -0,0 +1,231 @@
+"""Lockstep generation of many grids at once with NumPy.
+
+The object model in `structures` is convenient but pays Python overhead for
+every cell. Here K boards are rows of a (K, size * size) value array and every
+step works on all of them together: candidates are recomputed from the values
+through a precomputed unit table, forced cells are filled for every board in
+one assignment, and the remaining boards take one random decision each.
+Every board starts with random permutations in its diagonal squares. A board
+that reaches a dead end starts over, and a board that completes frees its
+lane for the next one, so no lane waits for the slowest board.
+
+Candidate masks here use bit v - 1 for value v, in the narrowest unsigned
+type that holds `size` bits, so that 64x64 boards still fit into uint64.
+"""
+from __future__ import annotations
+from typing import List, Optional
+from math import isqrt
+import numpy as np
+from board import box_shape
+
+
+def unit_table(size: int) -> np.ndarray:
+    """Cell indices of every row, column and box, shape (3 * size, size)."""
+    box_rows, box_cols = box_shape(size)
+    rows = [[r * size + c for c in range(size)] for r in range(size)]
+    columns = [[r * size + c for r in range(size)] for c in range(size)]
+    squares = []
+    for s in range(size):
+        r0, c0 = (s // box_rows) * box_rows, (s % box_rows) * box_cols
+        squares.append([(r0 + i) * size + c0 + j for i in range(box_rows) for j in range(box_cols)])
+    return np.array(rows + columns + squares, dtype=np.intp)
+
+
+def cell_unit_table(units: np.ndarray) -> np.ndarray:
+    """For every cell the indices of its row, column and square, shape (size * size, 3)."""
+    size = units.shape[1]
+    table = np.empty((size * size, 3), dtype=np.intp)
+    for u, cells in enumerate(units):
+        table[cells, u // size] = u
+    return table
+
+
+def _or_all(parts: List[np.ndarray]) -> np.ndarray:
+    result = parts[0].copy()
+    for part in parts[1:]:
+        result |= part
+    return result
+
+
+class LockstepGenerator:
+    def __init__(self, size: int = 9, seed: Optional[int] = None) -> None:
+        self.size = size
+        self.units = unit_table(size)
+        self.cell_units = cell_unit_table(self.units)
+        self.mask_type = next(t for t in (np.uint16, np.uint32, np.uint64) if np.iinfo(t).bits >= size)
+        self.full = self.mask_type((1 << size) - 1)
+        # value -> mask with its bit set, value 0 (empty) -> 0
+        self.value_bits = np.array([0] + [1 << v for v in range(size)], dtype=self.mask_type)
+        self.rng = np.random.default_rng(seed)
+        self.restarts = 0
+        box_rows = box_shape(size)[0]
+        # boxes on the diagonal share no row or column, so they can be filled independently
+        self.diagonal = self.units[2 * size + np.arange(box_rows) * (box_rows + 1)]
+
+    def _start(self, values: np.ndarray, lanes: np.ndarray) -> None:
+        """Clear `lanes` and fill their diagonal squares with random permutations."""
+        values[lanes] = 0
+        digits = np.tile(np.arange(1, self.size + 1, dtype=values.dtype), (len(lanes), len(self.diagonal), 1))
+        values[lanes[:, None, None], self.diagonal[None]] = self.rng.permuted(digits, axis=2)
+
+    def _unit_or(self, cell_masks: np.ndarray) -> np.ndarray:
+        """OR of the given per-cell masks over each unit, shape (K, 3 * size)."""
+        return _or_all([cell_masks[:, self.units[:, i]] for i in range(self.size)])
+
+    def candidates(self, values: np.ndarray):
+        """Candidate masks of every cell plus the per-unit masks of placed values."""
+        placed = self._unit_or(self.value_bits[values])
+        used = _or_all([placed[:, self.cell_units[:, k]] for k in range(3)])
+        masks = self.full & ~used
+        masks[values > 0] = 0
+        return masks, placed
+
+    def dead_ends(self, values: np.ndarray, masks: np.ndarray, placed: np.ndarray) -> np.ndarray:
+        empty = ((values == 0) & (masks == 0)).any(axis=1)
+        # every placed value shows up in three units unless a unit holds it twice
+        duplicates = np.bitwise_count(placed).sum(axis=1, dtype=np.int64) < 3 * (values > 0).sum(axis=1)
+        missing = ((self._unit_or(masks) | placed) != self.full).any(axis=1)
+        return empty | duplicates | missing
+
+    def _assign_hidden_singles(self, values: np.ndarray, masks: np.ndarray, placed: np.ndarray) -> np.ndarray:
+        once = np.zeros(placed.shape, dtype=self.mask_type)
+        twice = np.zeros(placed.shape, dtype=self.mask_type)
+        for i in range(self.size):
+            unit_column = masks[:, self.units[:, i]]
+            twice |= once & unit_column
+            once |= unit_column
+        # values with exactly one possible cell left in a unit
+        hidden = once & ~twice & ~placed
+        per_cell = masks & _or_all([hidden[:, self.cell_units[:, k]] for k in range(3)])
+        boards, cells = np.nonzero(per_cell)
+        found = per_cell[boards, cells]
+        lowest = found & (~found + self.mask_type(1))
+        values[boards, cells] = np.frexp(lowest.astype(np.float64))[1]
+        assigned = np.zeros(len(values), dtype=bool)
+        assigned[boards] = True
+        return assigned
+
+    def _decide(self, values: np.ndarray, masks: np.ndarray, boards: np.ndarray) -> None:
+        masks = masks[boards]
+        counts = np.bitwise_count(masks).astype(np.float64)
+        counts[values[boards] > 0] = np.inf
+        # random tie-break between the cells with fewest candidates
+        cells = (counts + self.rng.random(counts.shape) * 0.5).argmin(axis=1)
+        chosen = masks[np.arange(len(boards)), cells]
+        pick = (self.rng.random(len(boards)) * np.bitwise_count(chosen)).astype(np.int64)
+        value = np.zeros(len(boards), dtype=values.dtype)
+        seen = np.zeros(len(boards), dtype=np.int64)
+        for digit in range(self.size):
+            has = ((chosen >> self.mask_type(digit)) & self.mask_type(1)).astype(bool)
+            value[has & (seen == pick)] = digit + 1
+            seen += has
+        values[boards, cells] = value
+
+    def fill(self, count: int, lanes: int = 2048) -> np.ndarray:
+        """Return `count` filled grids as an int array of shape (count, size * size).
+
+        Up to `lanes` boards are worked on at once; a lane that completes a
+        grid starts the next one straight away, so the batch never waits for
+        its slowest board.
+        """
+        area = self.size * self.size
+        dtype = np.int8 if self.size < 128 else np.int16
+        result = np.zeros((count, area), dtype=dtype)
+        values = np.zeros((min(count, lanes), area), dtype=dtype)
+        self._start(values, np.arange(len(values)))
+        started = len(values)
+        finished = 0
+        while len(values):
+            masks, placed = self.candidates(values)
+            dead = self.dead_ends(values, masks, placed)
+            if dead.any():
+                dead = np.nonzero(dead)[0]
+                self._start(values, dead)
+                self.restarts += len(dead)
+                masks[dead], placed[dead] = self.candidates(values[dead])
+
+            done = np.nonzero((values > 0).all(axis=1))[0]
+            if len(done):
+                result[finished:finished + len(done)] = values[done]
+                finished += len(done)
+                restart = done[:count - started]
+                self._start(values, restart)
+                masks[restart], placed[restart] = self.candidates(values[restart])
+                started += len(restart)
+                keep = np.ones(len(values), dtype=bool)
+                keep[done[len(restart):]] = False
+                values, masks, placed = values[keep], masks[keep], placed[keep]
+                if not len(values):
+                    break
+
+            singles = (values == 0) & (np.bitwise_count(masks) == 1)
+            forced = singles.any(axis=1)
+            boards, cells = np.nonzero(singles)
+            values[boards, cells] = np.frexp(masks[boards, cells].astype(np.float64))[1]
+            forced |= self._assign_hidden_singles(values, masks, placed)
+
+            free = np.nonzero(~forced)[0]
+            if len(free):
+                self._decide(values, masks, free)
+        return result
+
+
+def _mask_type(size: int) -> type:
+    return next(t for t in (np.uint16, np.uint32, np.uint64) if np.iinfo(t).bits >= size)
+
+
+def _unit_bits(values: np.ndarray, size: int):
+    """Per unit, the masks of values seen at least once and at least twice, shape (K, 3 * size) each.
+
+    Blanks (0) and values above `size` add nothing.
+    """
+    mask_type = _mask_type(size)
+    value_bits = np.array([0] + [1 << v for v in range(size)] + [0], dtype=mask_type)
+    cell_bits = value_bits[np.minimum(values, size + 1)]
+    units = unit_table(size)
+    once = np.zeros((len(values), len(units)), dtype=mask_type)
+    twice = np.zeros_like(once)
+    for i in range(size):
+        part = cell_bits[:, units[:, i]]
+        twice |= once & part
+        once |= part
+    return once, twice
+
+
+def validate(grids: np.ndarray, size: int) -> np.ndarray:
+    """Boolean array telling which grids hold every value once per row, column and square."""
+    grids = np.asarray(grids)
+    in_range = ((grids >= 1) & (grids <= size)).all(axis=1)
+    if size > 64:
+        unit_values = np.sort(grids[:, unit_table(size)], axis=2)
+        return in_range & (unit_values == np.arange(1, size + 1)).all(axis=(1, 2))
+    # size values in size cells: all present means none repeated
+    once, _ = _unit_bits(grids, size)
+    return in_range & (once == _mask_type(size)((1 << size) - 1)).all(axis=1)
+
+
+def validate_givens(puzzles: np.ndarray, size: int) -> np.ndarray:
+    """Boolean array telling which puzzles (0 for blanks) have no value twice in a row, column or square."""
+    puzzles = np.asarray(puzzles)
+    in_range = ((puzzles >= 0) & (puzzles <= size)).all(axis=1)
+    if size > 64:
+        unit_values = np.sort(puzzles[:, unit_table(size)], axis=2)
+        repeated = (unit_values[:, :, 1:] == unit_values[:, :, :-1]) & (unit_values[:, :, 1:] > 0)
+        return in_range & ~repeated.any(axis=(1, 2))
+    _, twice = _unit_bits(puzzles, size)
+    return in_range & ~twice.any(axis=1)
+
+
+def to_strings(grids: np.ndarray) -> List[str]:
+    from board import SYMBOLS
+
+    size = isqrt(grids.shape[1])
+    if size <= len(SYMBOLS):
+        table = np.array(list('.' + SYMBOLS))
+        return [''.join(row) for row in table[grids]]
+    return [','.join(map(str, row)) for row in grids.tolist()]
+
+
+def generate(count: int, size: int = 9, seed: Optional[int] = None, lanes: int = 2048) -> np.ndarray:
+    """`count` filled grids, with `lanes` boards in flight at a time."""
+    return LockstepGenerator(size, seed).fill(count, lanes)
@@ -0,0 +1,60 @@
+import unittest
+
+try:
+    import numpy as np
+    import vectorized
+except ImportError:  # numpy is only needed for the vectorized engine
+    np = None
+
+from board import Board
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestLockstepGenerator(unittest.TestCase):
+    def test_unit_table_matches_board_units(self):
+        board = Board(9)
+        units = vectorized.unit_table(9)
+        expected = [[c.index for c in group] for group in board.rows + board.columns + board.squares]
+        self.assertListEqual(expected, units.tolist())
+
+    def test_generates_valid_distinct_grids(self):
+        grids = vectorized.generate(50, 9, seed=1, lanes=16)
+        self.assertEqual((50, 81), grids.shape)
+        self.assertTrue(vectorized.validate(grids, 9).all())
+        self.assertEqual(50, len({g.tobytes() for g in grids}))
+
+    def test_grids_pass_board_validate(self):
+        for grid in vectorized.to_strings(vectorized.generate(3, 16, seed=2)):
+            self.assertTrue(Board.from_string(grid).validate())
+
+    def test_same_seed_gives_same_grids(self):
+        first = vectorized.generate(10, 4, seed=5)
+        second = vectorized.generate(10, 4, seed=5)
+        self.assertTrue((first == second).all())
+
+    def test_validate_flags_broken_grid(self):
+        grids = vectorized.generate(2, 9, seed=3)
+        grids[1, [0, 1]] = grids[1, [1, 0]]
+        self.assertListEqual([True, False], vectorized.validate(grids, 9).tolist())
+
+    def test_validate_givens_flags_repeated_values(self):
+        puzzles = vectorized.generate(4, 9, seed=6)
+        puzzles[:, ::2] = 0
+        puzzles[1, 1] = puzzles[1, 3]   # same row
+        puzzles[2, 9] = puzzles[2, 0] = 0
+        puzzles[2, 1] = 10              # out of range
+        self.assertListEqual([True, False, False, True], vectorized.validate_givens(puzzles, 9).tolist())
+        self.assertFalse(vectorized.validate(puzzles, 9).any())
+
+    def test_rectangular_boxes(self):
+        board = Board(6)
+        expected = [[c.index for c in group] for group in board.rows + board.columns + board.squares]
+        self.assertListEqual(expected, vectorized.unit_table(6).tolist())
+        grids = vectorized.generate(20, 6, seed=4)
+        self.assertTrue(vectorized.validate(grids, 6).all())
+        for grid in vectorized.to_strings(grids):
+            self.assertTrue(Board.from_string(grid).validate())
+
+    def test_rejects_size_without_boxes(self):
+        with self.assertRaises(ValueError):
+            vectorized.LockstepGenerator(7)
@@ -0,0 +1,186 @@
+"""Bulk validation of grid and puzzle files with NumPy.
+
+`Board.validate` needs a whole `Board` per grid, far too slow for files of
+millions of records. Here a file is read in chunks of `chunk` records into
+one (chunk, size * size) value array and every unit of every record is
+checked at once by `vectorized.validate`, or by `vectorized.validate_givens`
+for puzzles, where blanks are allowed and the givens must not repeat in a
+unit. Only one chunk is in memory at a time.
+
+Two kinds of files are read: text with one record per line, in either
+single-line form of `Board.to_string` ('.' or '0' for blanks in puzzles),
+and packed corpus files from `corpus`. Records are numbered from 0 in file
+order; blank lines of a text file are skipped and not numbered. Unless a
+size is given, a text file is read at the size most records of its first
+chunk have, so a malformed first record is only reported, like any other.
+
+    for index in invalid_records('grids.txt'): ...
+    python verify.py grids.sdk puzzles.txt --puzzles
+"""
+from __future__ import annotations
+from typing import Iterator, List, Optional, Tuple
+from collections import Counter
+from itertools import islice
+from math import isqrt
+import numpy as np
+from board import BLANKS, SYMBOLS
+from corpus import MAGIC, CorpusReader
+from vectorized import validate, validate_givens
+
+# byte -> cell value for single-character records; 255 marks a character that is not a cell
+BYTE_VALUES = np.full(256, 255, dtype=np.uint8)
+for _value, _symbol in enumerate(SYMBOLS, 1):
+    BYTE_VALUES[ord(_symbol)] = BYTE_VALUES[ord(_symbol.lower())] = _value
+for _blank in BLANKS:
+    BYTE_VALUES[ord(_blank)] = 0
+
+Chunk = Tuple[int, np.ndarray, np.ndarray]  # first record index, values, records that could be parsed
+
+
+def is_corpus(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _record_size(line: bytes) -> Optional[int]:
+    """Size of the grid `line` would be, or None if its cells do not make a square."""
+    tokens = line.replace(b',', b' ').split()
+    cells = len(tokens) if len(tokens) > 1 else len(line)
+    size = isqrt(cells)
+    if size * size != cells or size == 0:
+        return None
+    return size
+
+
+def _common_size(lines: List[bytes]) -> int:
+    """The size most of `lines` have, the earliest one on a tie."""
+    sizes = Counter(size for size in map(_record_size, lines) if size is not None)
+    if not sizes:
+        raise ValueError('No record makes a square grid; pass the size explicitly.')
+    return sizes.most_common(1)[0][0]
+
+
+def _parse_numbers(line: bytes, cells: int) -> Optional[List[int]]:
+    tokens = line.replace(b',', b' ').split()
+    if len(tokens) != cells:
+        return None
+    try:
+        return [0 if token in (b'.', b'_') else int(token) for token in tokens]
+    except ValueError:
+        return None
+
+
+def text_chunks(path: str, size: Optional[int] = None, chunk: int = 1 << 16) -> Iterator[Chunk]:
+    """Records of a text file, `chunk` at a time; the size is the most common one of the first chunk unless given."""
+    with open(path, 'rb') as f:
+        records = (line.strip() for line in f)
+        records = (line for line in records if line)
+        start = 0
+        while True:
+            lines = list(islice(records, chunk))
+            if not lines:
+                return
+            if size is None:
+                size = _common_size(lines)
+            cells = size * size
+            values = np.zeros((len(lines), cells), dtype=np.uint8 if size < 255 else np.uint16)
+            parsed = np.ones(len(lines), dtype=bool)
+            # most records are single characters per cell; those are looked up all at once
+            plain = np.array([len(line) == cells for line in lines], dtype=bool)
+            if plain.any():
+                text = b''.join([line for line in lines if len(line) == cells])
+                values[plain] = BYTE_VALUES[np.frombuffer(text, dtype=np.uint8)].reshape(-1, cells)
+                parsed[plain] = (values[plain] != 255).all(axis=1)
+            for i in np.nonzero(~plain)[0]:
+                numbers = _parse_numbers(lines[i], cells)
+                if numbers is None or not all(0 <= v <= size for v in numbers):
+                    parsed[i] = False
+                else:
+                    values[i] = numbers
+            yield start, values, parsed
+            start += len(lines)
+
+
+def corpus_chunks(path: str, chunk: int = 1 << 16) -> Iterator[Chunk]:
+    """Records of a packed corpus file, `chunk` at a time, unpacked with NumPy."""
+    with CorpusReader(path) as corpus:
+        cells = corpus.size * corpus.size
+        bits = corpus.codec.bits
+        for start in range(0, len(corpus), chunk):
+            count = min(chunk, len(corpus) - start)
+            offset = corpus.offset + start * corpus.record_bytes
+            records = np.frombuffer(corpus.map[offset:offset + count * corpus.record_bytes], dtype=np.uint8)
+            # cell i is in bits i * bits and up of each record read as a little-endian integer
+            unpacked = np.unpackbits(records.reshape(count, -1), axis=1, bitorder='little')
+            cell_bits = unpacked[:, :cells * bits].reshape(count, cells, bits)
+            values = np.zeros((count, cells), dtype=np.uint16)
+            for b in range(bits):
+                values |= cell_bits[:, :, b].astype(np.uint16) << b
+            yield start, values, np.ones(count, dtype=bool)
+
+
+def validate_chunks(
+        path: str,
+        puzzles: bool = False,
+        size: Optional[int] = None,
+        chunk: int = 1 << 16,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """(first record index, validity of each record) for every chunk of a file.
+
+    Grids must hold every value once per unit. With `puzzles`, blanks are
+    allowed and only repeated givens make a record invalid.
+    """
+    if is_corpus(path):
+        chunks = corpus_chunks(path, chunk)
+    else:
+        chunks = text_chunks(path, size, chunk)
+    for start, values, parsed in chunks:
+        record_size = isqrt(values.shape[1])
+        if size is not None and record_size != size:
+            raise ValueError(f'{path} holds {record_size}x{record_size} records, not {size}x{size}.')
+        check = validate_givens if puzzles else validate
+        yield start, parsed & check(values, record_size)
+
+
+def invalid_records(path: str, puzzles: bool = False, size: Optional[int] = None, chunk: int = 1 << 16) -> Iterator[int]:
+    """Indices of the invalid records of a file, in order."""
+    for start, valid in validate_chunks(path, puzzles, size, chunk):
+        for i in np.nonzero(~valid)[0].tolist():
+            yield start + i
+
+
+def count_records(path: str, puzzles: bool = False, size: Optional[int] = None, chunk: int = 1 << 16) -> Tuple[int, int]:
+    """(records, invalid records) of a file."""
+    records = invalid = 0
+    for _, valid in validate_chunks(path, puzzles, size, chunk):
+        records += len(valid)
+        invalid += int((~valid).sum())
+    return records, invalid
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    from time import perf_counter
+    import sys
+
+    parser = ArgumentParser(description='Print the indices of invalid records in grid or puzzle files.')
+    parser.add_argument('paths', nargs='+', help='text files with one record per line, or corpus files')
+    parser.add_argument('--puzzles', action='store_true', help='records may have blanks; check only the givens')
+    parser.add_argument('--size', type=int, default=None, help='expected size (default: the most common one)')
+    parser.add_argument('--chunk', type=int, default=1 << 16, help='records held in memory at a time')
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.paths:
+        start = perf_counter()
+        records = invalid = 0
+        for first, valid in validate_chunks(path, args.puzzles, args.size, args.chunk):
+            for i in np.nonzero(~valid)[0].tolist():
+                print(f'{path}:{first + i}')
+            records += len(valid)
+            invalid += int((~valid).sum())
+        elapsed = perf_counter() - start
+        print(f'{path}: {records} records, {invalid} invalid, {records / elapsed if elapsed else 0:.0f} records/s',
+              file=sys.stderr)
+        failed |= invalid > 0
+    sys.exit(1 if failed else 0)
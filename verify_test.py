@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    import verify
+except ImportError:  # numpy is only needed for bulk validation
+    np = None
+
+import corpus
+import transforms
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestVerify(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write_text(self, lines):
+        path = os.path.join(self.directory.name, 'records.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def broken(self, grids):
+        grids[3] = grids[3][1] + grids[3][0] + grids[3][2:]   # two cells swapped in a row
+        grids[7] = grids[7][:-1] + 'X'                       # not a cell symbol
+        grids[11] = grids[11][:40]                           # truncated
+        return grids
+
+    def test_text_file_in_chunks(self):
+        grids = self.broken(list(transforms.generate(30, 9, seed=1)))
+        path = self.write_text(grids[:15] + [''] + grids[15:])
+        for chunk in (4, 7, 1000):
+            self.assertListEqual([3, 7, 11], list(verify.invalid_records(path, chunk=chunk)))
+        self.assertTupleEqual((30, 3), verify.count_records(path, chunk=4))
+
+    def test_malformed_first_record_is_reported(self):
+        grids = list(transforms.generate(3, 9, seed=6))
+        for first in (grids[0][:40], grids[0][:16]):
+            path = self.write_text([first] + grids)
+            self.assertListEqual([0], list(verify.invalid_records(path)))
+        with self.assertRaises(ValueError):
+            list(verify.invalid_records(self.write_text(['12345', '123'])))
+
+    def test_comma_form_for_large_sizes(self):
+        grids = list(transforms.generate(4, 36, seed=2))
+        grids[2] = '0' + grids[2][grids[2].index(','):]
+        path = self.write_text(grids)
+        self.assertListEqual([2], list(verify.invalid_records(path)))
+        self.assertListEqual([], list(verify.invalid_records(path, puzzles=True)))
+
+    def test_puzzles_only_need_consistent_givens(self):
+        grids = list(transforms.generate(5, 9, seed=3))
+        puzzles = ['.' * 9 + grid[9:] for grid in grids]
+        puzzles[1] = puzzles[1][:9] + puzzles[1][10] + puzzles[1][10:]   # repeated given in a row
+        path = self.write_text(puzzles)
+        self.assertListEqual([1], list(verify.invalid_records(path, puzzles=True)))
+        self.assertListEqual(list(range(5)), list(verify.invalid_records(path)))
+
+    def test_corpus_file(self):
+        grids = list(transforms.generate(40, 9, seed=4))
+        grids[5] = grids[6]
+        grids[5] = grids[5][:80] + grids[5][79]
+        path = os.path.join(self.directory.name, 'grids.sdk')
+        corpus.write_corpus(path, grids, 9)
+        self.assertListEqual([5], list(verify.invalid_records(path, chunk=16)))
+        values = np.concatenate([v for _, v, _ in verify.corpus_chunks(path, chunk=16)])
+        with corpus.CorpusReader(path) as reader:
+            self.assertListEqual([list(record) for record in reader], values.tolist())
+
+    def test_records_of_another_size(self):
+        grids = list(transforms.generate(2, 4, seed=5))
+        self.assertListEqual([0, 1], list(verify.invalid_records(self.write_text(grids), size=9)))
+        path = os.path.join(self.directory.name, 'grids.sdk')
+        corpus.write_corpus(path, grids, 4)
+        with self.assertRaises(ValueError):
+            list(verify.invalid_records(path, size=9))
+
+
+if __name__ == '__main__':
+    unittest.main()